@@ -0,0 +1,49 @@
+import argparse
+import time
+
+from benchmarks.suite import STRATEGY_PARAMS
+from benchmarks.synthetic import generateMarketData
+from core.engine import Engine
+from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+
+
+def getConfigs(count: int) -> list:
+    """
+    Builds distinct configurations of the threshold strategy around the suite's parameters.
+
+    Parameters:
+        count (int): Number of configurations.
+
+    Returns:
+        configs (List[StrategyConfig]): Strategy class and parameters of each backtest.
+    """
+    return [
+        (ConstantPriceThresholdStrategy, dict(STRATEGY_PARAMS, threshold=STRATEGY_PARAMS["threshold"] - 2 + (i % 5), daysToClose=1 + i // 5))
+        for i in range(count)
+    ]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure backtesting many strategies in one pass against one backtest at a time.")
+
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--days", type=int, default=504)
+    parser.add_argument("--strategies", type=int, nargs="+", default=[1, 10, 50])
+    parser.add_argument("--modes", nargs="+", default=["linear", "vectorized"])
+
+    args = parser.parse_args()
+
+    data = generateMarketData(args.symbols, args.days)
+    print(f"{args.symbols} symbols x {args.days} days")
+    print(f"{'mode':>12} {'strategies':>11} {'one at a time':>14} {'batch':>10} {'speedup':>10}")
+    for mode in args.modes:
+        for count in args.strategies:
+            configs = getConfigs(count)
+            start = time.perf_counter()
+            expected = [Engine.runOnData(data, strategyClass, strategyParams, 1_000_000.0, mode)["profitLoss"] for strategyClass, strategyParams in configs]
+            single = time.perf_counter() - start
+            start = time.perf_counter()
+            results = Engine.runBatchOnData(data, configs, 1_000_000.0, mode)
+            batch = time.perf_counter() - start
+            if [result["profitLoss"] for result in results] != expected:
+                print("Error: batch disagrees with one backtest at a time")
+            print(f"{mode:>12} {count:>11} {single:>14.2f} {batch:>10.2f} {single / batch:>10.2f}")
@@ -0,0 +1,92 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from core.blotter import Blotter
+
+
+class ObjectTrade:
+    def __init__(self, symbol: str, shares: int, side: str, sharePrice: float, timestamp):
+        """
+        Stores a trade the way Trade used to, one object with a __dict__ per trade.
+        """
+        self.symbol = symbol
+        self.shares = shares
+        self.side = side
+        self.sharePrice = sharePrice
+        self.timestamp = timestamp
+
+def recordObjects(symbols: list, symbolIds: np.ndarray, prices: np.ndarray, dates: pd.DatetimeIndex):
+    """
+    Records trades into a list of objects and sums the traded value one trade at a time.
+
+    Parameters:
+        symbols (list): Symbol of every symbol id.
+        symbolIds (ndarray): Symbol id of every trade.
+        prices (ndarray): Price of every trade.
+        dates (DatetimeIndex): Date of every trade.
+    """
+    trades = []
+    for row in range(len(symbolIds)):
+        trades.append(ObjectTrade(symbols[symbolIds[row]], 10, "BUY" if row % 2 == 0 else "SELL", prices[row], dates[row]))
+    sum(trade.shares * trade.sharePrice for trade in trades)
+
+def recordBlotter(symbols: list, symbolIds: np.ndarray, prices: np.ndarray, dates: pd.DatetimeIndex):
+    """
+    Records trades into a blotter and sums the traded value from its columns.
+
+    Parameters:
+        symbols (list): Symbol of every symbol id.
+        symbolIds (ndarray): Symbol id of every trade.
+        prices (ndarray): Price of every trade.
+        dates (DatetimeIndex): Date of every trade.
+    """
+    blotter = Blotter(symbols)
+    for row in range(len(symbolIds)):
+        blotter.append(symbolIds[row], row % 2 == 0, 10, prices[row], dates[row])
+    arrays = blotter.getArrays()
+    np.sum(arrays["shares"] * arrays["price"])
+
+def measure(function, tradeCount: int):
+    """
+    Measures the time and peak traced memory of a recording function.
+
+    Parameters:
+        function (Callable): Recording function to measure.
+        tradeCount (int): Number of trades to record.
+
+    Returns:
+        measurement (tuple[float, int]): Seconds taken and peak bytes allocated.
+    """
+    rng = np.random.default_rng(0)
+    symbols = [f"SYM{i}" for i in range(100)]
+    symbolIds = rng.integers(0, len(symbols), size=tradeCount)
+    prices = rng.uniform(50, 150, size=tradeCount)
+    dates = pd.bdate_range("2000-01-03", periods=2520)[np.sort(rng.integers(0, 2520, size=tradeCount))]
+
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(symbols, symbolIds, prices, dates)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a list of trade objects with the columnar blotter.")
+
+    parser.add_argument("--trades", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+
+    args = parser.parse_args()
+
+    print(f"{'trades':>10} {'objects s':>10} {'blotter s':>10} {'objects B/trade':>16} {'blotter B/trade':>16}")
+    for tradeCount in args.trades:
+        objectsTime, objectsPeak = measure(recordObjects, tradeCount)
+        blotterTime, blotterPeak = measure(recordBlotter, tradeCount)
+        print(
+            f"{tradeCount:>10} {objectsTime:>10.2f} {blotterTime:>10.2f}"
+            f" {objectsPeak / tradeCount:>16.0f} {blotterPeak / tradeCount:>16.0f}"
+        )
@@ -0,0 +1,145 @@
+import argparse
+from contextlib import contextmanager
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from typing import Any, Callable, Iterator, Tuple
+
+from benchmarks.synthetic import generateMarketData
+from database.connectionPool import closePools
+from database.sqLiteDB import SQLiteDB
+
+
+class ConnectionPerRequest:
+    def __init__(self, path: str, setup: Callable[[sqlite3.Connection], None]):
+        """
+        Initializes a stand in for the connection pool opening a connection for every
+        read and write and creating the tables each time, the way every SQLiteDB did
+        before the pool. The database keeps the default rollback journal.
+
+        Parameters:
+            path (str): The file path of the SQLite database.
+            setup (Callable[[Connection], None]): Creates the tables.
+        """
+        self.path = path
+        self._setup = setup
+
+    def _connect(self) -> sqlite3.Connection:
+        connection = sqlite3.connect(self.path)
+        with connection:
+            self._setup(connection)
+        return connection
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        connection = self._connect()
+        try:
+            yield connection
+        finally:
+            connection.close()
+
+    def write(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        connection = self._connect()
+        try:
+            with connection:
+                return function(connection)
+        finally:
+            connection.close()
+
+def openUnpooled(path: str) -> SQLiteDB:
+    """
+    Opens a SQLiteDB using a connection per request instead of the pool.
+
+    Parameters:
+        path (str): The file path of the SQLite database.
+
+    Returns:
+        database (SQLiteDB): The database.
+    """
+    database = SQLiteDB.__new__(SQLiteDB)
+    database._pool = ConnectionPerRequest(path, database._createTable)
+    return database
+
+def runConcurrent(read: Callable[[], None], write: Callable[[], None], readers: int, seconds: float) -> Tuple[float, float, float]:
+    """
+    Runs reader threads and one writer thread against the same database.
+
+    Parameters:
+        read (Callable[[], None]): One read.
+        write (Callable[[], None]): One write.
+        readers (int): Number of reader threads.
+        seconds (float): How long the threads run.
+
+    Returns:
+        reads (float): Reads per second over every reader.
+        writes (float): Writes per second.
+        slowestRead (float): Seconds of the slowest read.
+    """
+    stop = time.perf_counter() + seconds
+    counts = {"reads": 0, "writes": 0, "slowest": 0.0}
+    lock = threading.Lock()
+
+    def readLoop():
+        while time.perf_counter() < stop:
+            start = time.perf_counter()
+            read()
+            elapsed = time.perf_counter() - start
+            with lock:
+                counts["reads"] += 1
+                counts["slowest"] = max(counts["slowest"], elapsed)
+
+    def writeLoop():
+        while time.perf_counter() < stop:
+            write()
+            with lock:
+                counts["writes"] += 1
+
+    threads = [threading.Thread(target=readLoop) for _ in range(readers)] + [threading.Thread(target=writeLoop)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return counts["reads"] / seconds, counts["writes"] / seconds, counts["slowest"]
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a connection per request with the pooled WAL connections of SQLiteDB.")
+
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--reads", type=int, default=500)
+    parser.add_argument("--readers", type=int, default=4)
+    parser.add_argument("--seconds", type=float, default=3.0)
+
+    args = parser.parse_args()
+
+    data = generateMarketData(args.symbols, args.days)
+    symbols = list(data.index.get_level_values("Symbol").unique())
+    dates = data.index.get_level_values("Date").unique()
+    # One month of one symbol, the size of a validation or backfill query
+    startDate, endDate = dates[len(dates) // 2], dates[len(dates) // 2 + 21]
+    bySymbol = {symbol: symbolData.droplevel("Symbol") for symbol, symbolData in data.groupby(level="Symbol")}
+    writeData = bySymbol[symbols[0]].iloc[:21]
+
+    with tempfile.TemporaryDirectory() as directory:
+        databases = {
+            "per request": openUnpooled(os.path.join(directory, "unpooled.db")),
+            "pooled WAL": SQLiteDB(os.path.join(directory, "pooled.db"))
+        }
+        print(f"{args.symbols} symbols x {args.days} days, reads of 22 days, {args.readers} readers and a writer")
+        print(f"{'connections':>12} {'ms/read':>8} {'reads/s with writer':>20} {'writes/s':>9} {'slowest read ms':>16}")
+        for name, database in databases.items():
+            database.setDataMany(bySymbol)
+            start = time.perf_counter()
+            for read in range(args.reads):
+                database.getDataRange(symbols[read % len(symbols)], startDate, endDate)
+            sequential = (time.perf_counter() - start) / args.reads
+            reads, writes, slowest = runConcurrent(
+                lambda: database.getDataRange(symbols[1], startDate, endDate),
+                lambda: database.setData(symbols[0], writeData),
+                args.readers,
+                args.seconds
+            )
+            print(f"{name:>12} {sequential * 1e3:>8.3f} {reads:>20.0f} {writes:>9.0f} {slowest * 1e3:>16.1f}")
+        closePools()
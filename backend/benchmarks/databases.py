@@ -0,0 +1,83 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.synthetic import generateMarketData
+from database.base import DBInterface
+from database.columnarDB import ColumnarDB
+from database.sqLiteDB import SQLiteDB
+
+
+def timeReads(database: DBInterface, symbols, startDate, endDate, repeats: int) -> float:
+    """
+    Times reading a date range of every symbol.
+
+    Parameters:
+        database (DBInterface): Database to read from.
+        symbols (List[str]): Symbols to read.
+        startDate (datetime): The start date for the data range, inclusive.
+        endDate (datetime): The end date for the data range, inclusive.
+        repeats (int): Number of times every symbol is read.
+
+    Returns:
+        elapsed (float): Seconds per read.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        for symbol in symbols:
+            database.getDataRange(symbol, startDate, endDate)
+    return (time.perf_counter() - start) / (repeats * len(symbols))
+
+def timeBatchedReads(database: DBInterface, symbols, startDate, endDate, repeats: int) -> float:
+    """
+    Times reading a date range of every symbol with one getDataRangeMany call.
+
+    Parameters:
+        database (DBInterface): Database to read from.
+        symbols (List[str]): Symbols to read.
+        startDate (datetime): The start date for the data range, inclusive.
+        endDate (datetime): The end date for the data range, inclusive.
+        repeats (int): Number of times the symbols are read.
+
+    Returns:
+        elapsed (float): Seconds per symbol read.
+    """
+    start = time.perf_counter()
+    for _ in range(repeats):
+        database.getDataRangeMany(symbols, startDate, endDate)
+    return (time.perf_counter() - start) / (repeats * len(symbols))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare range reads of the SQLite and columnar backends.")
+
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=2520)
+    parser.add_argument("--repeats", type=int, default=3)
+
+    args = parser.parse_args()
+
+    data = generateMarketData(args.symbols, args.days)
+    symbols = list(data.index.get_level_values("Symbol").unique())
+    dates = data.index.get_level_values("Date").unique()
+    ranges = {
+        "full": (dates[0], dates[-1]),
+        "last year": (dates[max(0, len(dates) - 252)], dates[-1])
+    }
+
+    with tempfile.TemporaryDirectory() as directory:
+        databases = {
+            "sqlite": SQLiteDB(os.path.join(directory, "symbol_data.db")),
+            "columnar": ColumnarDB(os.path.join(directory, "columnar"))
+        }
+        print(f"{args.symbols} symbols x {args.days} days")
+        print(f"{'backend':>10} {'write ms/symbol':>16} {'full ms/read':>13} {'last year ms/read':>18} {'batched full ms/symbol':>23}")
+        for name, database in databases.items():
+            start = time.perf_counter()
+            for symbol in symbols:
+                database.setData(symbol, data.xs(symbol, level="Symbol"))
+            write = (time.perf_counter() - start) / len(symbols)
+            reads = [timeReads(database, symbols, *ranges[key], args.repeats) for key in ranges]
+            batched = timeBatchedReads(database, symbols, *ranges["full"], args.repeats)
+            print(f"{name:>10} {write * 1e3:>16.2f} {reads[0] * 1e3:>13.3f} {reads[1] * 1e3:>18.3f} {batched * 1e3:>23.3f}")
+            database.close()
@@ -0,0 +1,148 @@
+import argparse
+import time
+from typing import List, Optional
+
+from pandas import DataFrame
+import pandas as pd
+
+from benchmarks.synthetic import generateMarketData
+from core.engine import Engine
+from core.portfolio import Portfolio
+from core.strategies.base import Strategy
+from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+from core.tradeRequest import TradeRequest
+
+
+class RoundTripStrategy(Strategy):
+    lookback = 1
+
+    def __init__(self, symbol: str):
+        """
+        Initializes a strategy buying a symbol on the third bar and selling it on the
+        fourth, then staying idle.
+
+        Parameters:
+            symbol (str): The asset symbol to trade.
+        """
+        super().__init__()
+        self.symbol = symbol
+        self.bar = 0
+
+    def onStart(self):
+        """
+        Nothing to prepare.
+        """
+        pass
+
+    def next(self, marketData: DataFrame, portfolio: Portfolio) -> List[TradeRequest]:
+        """
+        Buys on the third bar and sells on the fourth.
+
+        Parameters:
+            marketData (DataFrame): Market data up to the current bar.
+            portfolio (Portfolio): The current portfolio object.
+
+        Returns:
+            trades (List[TradeRequest]): The order of the bar, if any.
+        """
+        self.bar += 1
+        if self.bar == 3:
+            return [TradeRequest(self.symbol, 10, "BUY")]
+        if self.bar == 4:
+            return [TradeRequest(self.symbol, 10, "SELL")]
+        return []
+
+    def generateSignals(self, data: DataFrame) -> Optional[DataFrame]:
+        """
+        Generates the same two orders as next().
+
+        Parameters:
+            data (DataFrame): The complete market data.
+
+        Returns:
+            orders (DataFrame): The buy on the third date and the sell on the fourth.
+        """
+        dates = data.index.get_level_values("Date").unique()
+        index = pd.MultiIndex.from_tuples([(dates[2], self.symbol), (dates[3], self.symbol)], names=["Date", "Symbol"])
+        return pd.DataFrame({"Side": ["BUY", "SELL"], "Shares": [10, 10], "Orders": [1, 1]}, index=index)
+
+
+def timeViews(data: DataFrame, mode: str, lookback: int = 2) -> float:
+    """
+    Times handing every bar's market data view to a consumer that reads one
+    symbol from it, the way a strategy would.
+
+    Parameters:
+        data (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+        mode (str): "prefix" slices the history up to each date, "linear" uses
+        positional windows of lookback bars.
+        lookback (int): Bars in each linear window.
+
+    Returns:
+        elapsed (float): Seconds taken.
+    """
+    symbol = data.index.get_level_values("Symbol")[0]
+    start = time.perf_counter()
+    if mode == "prefix":
+        for date in data.index.get_level_values("Date").unique():
+            data.loc[:date].xs(symbol, level="Symbol")
+    else:
+        starts, ends = Engine._getBarOffsets(data)
+        for bar in range(len(starts)):
+            data.iloc[starts[max(0, bar - lookback + 1)]:ends[bar]].xs(symbol, level="Symbol")
+    return time.perf_counter() - start
+
+def timeBacktest(data: DataFrame, mode: str):
+    """
+    Times a single backtest over in-memory data.
+
+    Parameters:
+        data (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+        mode (str): Engine mode to run.
+
+    Returns:
+        timing (tuple[float, list]): Seconds taken and the executed trades.
+    """
+    strategyParams = {"threshold": 100.0, "daysToClose": 5, "quantity": 10}
+    start = time.perf_counter()
+    results = Engine.runOnData(data, ConstantPriceThresholdStrategy, strategyParams, 1_000_000.0, mode)
+    elapsed = time.perf_counter() - start
+    trades = [(t.symbol, t.shares, t.side, t.sharePrice, t.timestamp) for t in results["portfolio"].getTrades()]
+    return elapsed, trades
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the engine modes.")
+
+    parser.add_argument("--symbols", type=int, default=20)
+    parser.add_argument("--bars", type=int, nargs="+", default=[1000, 4000, 16000])
+    parser.add_argument("--backtest-bars", type=int, default=500)
+
+    args = parser.parse_args()
+
+    # Cost of delivering market data to the strategy, per bar
+    print(f"{'bars':>6} {'prefix us/bar':>14} {'linear us/bar':>14}")
+    for bars in args.bars:
+        data = generateMarketData(args.symbols, bars)
+        prefixTime = timeViews(data, "prefix")
+        linearTime = timeViews(data, "linear")
+        print(f"{bars:>6} {prefixTime / bars * 1e6:>14.1f} {linearTime / bars * 1e6:>14.1f}")
+
+    # Every mode must execute the same trades
+    data = generateMarketData(args.symbols, args.backtest_bars)
+    prefixTime, prefixTrades = timeBacktest(data, "prefix")
+    print(f"backtest {args.backtest_bars} bars, {len(prefixTrades)} trades")
+    print(f"{'prefix':>10} {prefixTime:>8.3f}s")
+    for mode in ("linear", "vectorized"):
+        elapsed, trades = timeBacktest(data, mode)
+        if trades != prefixTrades:
+            print(f"Error: {mode} disagrees with prefix at {args.backtest_bars} bars.")
+            exit(1)
+        print(f"{mode:>10} {elapsed:>8.3f}s")
+
+    # A round trip followed by idle bars is invested for the one bar it is held
+    for mode in ("prefix", "linear", "vectorized"):
+        results = Engine.runOnData(data, RoundTripStrategy, {"symbol": "SYM0"}, 1_000_000.0, mode)
+        if results["exposure"] != 1 / args.backtest_bars:
+            print(f"Error: {mode} reports exposure {results['exposure']} for a single bar round trip.")
+            exit(1)
+    print(f"round trip exposure {1 / args.backtest_bars:.4f} in every mode")
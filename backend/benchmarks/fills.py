@@ -0,0 +1,62 @@
+import argparse
+import time
+
+import numpy as np
+
+import core.portfolio as portfolioModule
+from benchmarks.synthetic import generateMarketData
+from core.portfolio import Portfolio
+from core.tradeRequest import TradeRequest
+from core.universe import Universe
+
+
+def timeFills(data, requests, batchMinRequests: int):
+    """
+    Times executing every bar's trade requests through _executeTrades.
+
+    Parameters:
+        data (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+        requests (list): Trade requests of every bar.
+        batchMinRequests (int): Requests per bar from which the batch fill path is used.
+
+    Returns:
+        timing (tuple[float, tuple]): Seconds per bar and the final cash and trades.
+    """
+    portfolioModule.BATCH_FILL_MIN_REQUESTS = batchMinRequests
+    portfolio = Portfolio(1_000_000.0, Universe(data))
+    bars = [barData for _, barData in data.groupby(level="Date", sort=False)]
+    start = time.perf_counter()
+    for barData, barRequests in zip(bars, requests):
+        portfolio._updateValue(barData)
+        portfolio._executeTrades(barData, barRequests)
+    elapsed = time.perf_counter() - start
+    trades = portfolio.getTrades().getArrays()
+    return elapsed / len(bars), (float(portfolio.getCash()), {name: array.tobytes() for name, array in trades.items()})
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare the one by one and batch fill paths.")
+
+    parser.add_argument("--symbols", type=int, default=500)
+    parser.add_argument("--bars", type=int, default=100)
+    parser.add_argument("--requests", type=int, nargs="+", default=[4, 16, 64, 256, 1024])
+
+    args = parser.parse_args()
+
+    data = generateMarketData(args.symbols, args.bars)
+    print(f"{args.bars} bars, {args.symbols} symbols")
+    print(f"{'requests/bar':>13} {'one by one us/bar':>18} {'batch us/bar':>13}")
+    for requestCount in args.requests:
+        rng = np.random.default_rng(0)
+        requests = [
+            [
+                TradeRequest(f"SYM{rng.integers(args.symbols)}", int(rng.integers(1, 50)), "BUY" if rng.random() < 0.6 else "SELL")
+                for _ in range(requestCount)
+            ]
+            for _ in range(args.bars)
+        ]
+        scalarTime, scalarResult = timeFills(data, requests, requestCount + 1)
+        batchTime, batchResult = timeFills(data, requests, 1)
+        if scalarResult != batchResult:
+            print(f"Error: batch fills disagree at {requestCount} requests per bar.")
+            exit(1)
+        print(f"{requestCount:>13} {scalarTime * 1e6:>18.1f} {batchTime * 1e6:>13.1f}")
@@ -0,0 +1,52 @@
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+from typing import Dict, List
+
+# Deferred imports, imported first to measure what importing them eagerly cost
+DEFERRED_MODULES = ["yfinance"]
+
+def timeImport(module: str, preload: List[str], repeats: int) -> Dict[str, float]:
+    """
+    Times importing a module in fresh interpreters, like the cold start of the API
+    or of a worker process.
+
+    Parameters:
+        module (str): Module to import.
+        preload (List[str]): Modules imported before it within the timed part.
+        repeats (int): Number of interpreters started.
+
+    Returns:
+        timing (Dict[str, float]): Median and minimum seconds, and whether yfinance
+        was imported by the module itself.
+    """
+    code = (
+        "import json, sys, time\n"
+        "start = time.perf_counter()\n"
+        + "".join(f"import {name}\n" for name in preload + [module])
+        + "print(json.dumps({'seconds': time.perf_counter() - start, 'yfinance': 'yfinance' in sys.modules}))\n"
+    )
+    backend = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+    times = []
+    for _ in range(repeats):
+        output = subprocess.run([sys.executable, "-c", code], cwd=backend, capture_output=True, text=True, check=True).stdout
+        run = json.loads(output)
+        times.append(run["seconds"])
+    return {"median": statistics.median(times), "min": min(times), "yfinance": run["yfinance"] and not preload}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the cold import time of the backend modules.")
+
+    parser.add_argument("--modules", nargs="+", default=["main", "core.engine", "core.sweep", "processing.ingester"])
+    parser.add_argument("--repeats", type=int, default=5)
+
+    args = parser.parse_args()
+
+    print(f"{'module':>20} {'median s':>10} {'min s':>10} {'eager median s':>15} {'yfinance':>9}")
+    for module in args.modules:
+        timing = timeImport(module, [], args.repeats)
+        eager = timeImport(module, DEFERRED_MODULES, args.repeats)
+        print(f"{module:>20} {timing['median']:>10.3f} {timing['min']:>10.3f} {eager['median']:>15.3f} {str(timing['yfinance']):>9}")
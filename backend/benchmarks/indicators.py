@@ -0,0 +1,46 @@
+import argparse
+import time
+
+from benchmarks.synthetic import generateMarketData
+from core.indicators import ATR, EMA, RSI, SMA, IndicatorSet, RollingMax, RollingMin, RollingStd, indicatorCache
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the incremental and batch forms of the indicators.")
+
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=2520)
+    parser.add_argument("--period", type=int, default=20)
+
+    args = parser.parse_args()
+
+    data = generateMarketData(args.symbols, args.bars)
+    barGroups = [barData for _, barData in data.groupby(level="Date", sort=False)]
+    indicators = [
+        SMA(args.period),
+        EMA(args.period),
+        RollingStd(args.period),
+        RSI(args.period),
+        ATR(args.period),
+        RollingMin(args.period),
+        RollingMax(args.period)
+    ]
+
+    print(f"{args.bars} bars, {args.symbols} symbols")
+    print(f"{'indicator':>12} {'incremental s':>14} {'batch s':>10} {'cached s':>10}")
+    for indicator in indicators:
+        indicatorSet = IndicatorSet([indicator])
+        start = time.perf_counter()
+        for barData in barGroups:
+            indicatorSet.update(barData)
+        incremental = time.perf_counter() - start
+
+        indicatorCache.clear()
+        start = time.perf_counter()
+        indicatorSet.compute(indicator, data)
+        batch = time.perf_counter() - start
+
+        start = time.perf_counter()
+        indicatorSet.compute(indicator, data)
+        cached = time.perf_counter() - start
+        print(f"{type(indicator).__name__:>12} {incremental:>14.3f} {batch:>10.3f} {cached:>10.3f}")
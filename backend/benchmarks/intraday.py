@@ -0,0 +1,107 @@
+import argparse
+from concurrent.futures import ProcessPoolExecutor
+import multiprocessing
+import os
+import tempfile
+import time
+from typing import Dict
+
+from benchmarks.suite import STRATEGY_PARAMS
+from benchmarks.synthetic import generateBars
+from database.backends import openDatabase
+from database.connectionPool import closePools
+
+
+def getPeakMemory() -> float:
+    """
+    Retrieves the peak resident memory of this process. ru_maxrss isn't used since
+    Linux keeps it across the exec of a spawned process, VmHWM starts over.
+
+    Returns:
+        peak (float): Peak resident memory in MB.
+    """
+    with open("/proc/self/status") as status:
+        for line in status:
+            if line.startswith("VmHWM:"):
+                return int(line.split()[1]) / 1024
+    return float("nan")
+
+def runInProcess(dataPath: str, backend: str, symbols, startTime, endTime, mode: str, chunkRows: int, backtest: bool) -> Dict[str, float]:
+    """
+    Reads the bars like a backtest of a mode would, or runs the backtest, meant for
+    a fresh process so its peak memory is its own.
+
+    Parameters:
+        dataPath (str): Directory holding the bars.
+        backend (str): Database backend to read from.
+        symbols (List[str]): Symbols to backtest on.
+        startTime (datetime): Start of the time range, inclusive.
+        endTime (datetime): End of the time range, inclusive.
+        mode (str): Engine mode to run.
+        chunkRows (int): Rows read per chunk in "stream" mode.
+        backtest (bool): Run the backtest instead of only reading the bars.
+
+    Returns:
+        run (Dict[str, float]): Seconds, peak resident MB before and after the run,
+        and the rows read or the profit of the backtest.
+    """
+    os.environ["BACKTESTER_DATA"] = dataPath
+    os.environ["BACKTESTER_DB"] = backend
+    from core.engine import Engine
+    from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+
+    before = getPeakMemory()
+    start = time.perf_counter()
+    if backtest:
+        output = Engine.runBacktest(
+            symbols, startTime, endTime, ConstantPriceThresholdStrategy, STRATEGY_PARAMS, 1_000_000.0,
+            mode, interval="1m", chunkRows=chunkRows
+        )["profitLoss"]
+    elif mode == "stream":
+        output = sum(len(chunk) for chunk in Engine.streamData(symbols, startTime, endTime, "1m", chunkRows))
+    else:
+        output = len(Engine.loadData(symbols, startTime, endTime, "1m"))
+    elapsed = time.perf_counter() - start
+    after = getPeakMemory()
+    return {"seconds": elapsed, "before": before, "peak": after, "output": output}
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the peak memory of streaming minute bars against loading them at once.")
+
+    parser.add_argument("--symbols", type=int, default=50)
+    parser.add_argument("--days", type=int, default=60)
+    parser.add_argument("--backend", choices=["sqlite", "columnar"], default="sqlite")
+    parser.add_argument("--chunk-rows", type=int, nargs="+", default=[10000, 100000])
+    parser.add_argument("--backtest", action="store_true", help="Run the backtests instead of only reading the bars, far slower.")
+
+    args = parser.parse_args()
+
+    data = generateBars(args.symbols, args.days)
+    symbols = list(data.index.get_level_values("Symbol").unique())
+    times = data.index.get_level_values("Date")
+    startTime = times[0].to_pydatetime()
+    endTime = times[-1].to_pydatetime()
+
+    with tempfile.TemporaryDirectory() as directory:
+        os.environ["BACKTESTER_DATA"] = directory
+        database = openDatabase(args.backend)
+        try:
+            database.setBarsMany("1m", {symbol: symbolData.droplevel("Symbol") for symbol, symbolData in data.groupby(level="Symbol")})
+        finally:
+            database.close()
+            closePools()
+        del data
+
+        runs = [("linear", 0)] + [("stream", chunkRows) for chunkRows in args.chunk_rows]
+        print(f"{args.symbols} symbols x {args.days} days of minute bars, {args.backend}, {'backtest' if args.backtest else 'read'}")
+        print(f"{'run':>16} {'seconds':>10} {'peak MB':>10} {'run MB':>10}")
+        outputs = set()
+        for mode, chunkRows in runs:
+            # A spawned process starts without the memory of the data generated here
+            with ProcessPoolExecutor(max_workers=1, mp_context=multiprocessing.get_context("spawn")) as executor:
+                run = executor.submit(runInProcess, directory, args.backend, symbols, startTime, endTime, mode, chunkRows, args.backtest).result()
+            outputs.add(round(run["output"], 6))
+            name = mode if mode == "linear" else f"stream {chunkRows}"
+            print(f"{name:>16} {run['seconds']:>10.2f} {run['peak']:>10.1f} {run['peak'] - run['before']:>10.1f}")
+        if len(outputs) > 1:
+            print("Error: stream disagrees with linear")
@@ -0,0 +1,77 @@
+import argparse
+import time
+import tracemalloc
+
+import pandas as pd
+
+from core.ledger import Ledger
+
+
+def recordFrames(bars: int, holdings: int):
+    """
+    Records equity the way the portfolio used to, growing DataFrames with .loc.
+
+    Parameters:
+        bars (int): Number of bars to record.
+        holdings (int): Number of holdings recorded per bar.
+    """
+    history = pd.DataFrame(index=pd.MultiIndex.from_tuples([], names=["Date", "Symbol"]), columns=["Value"])
+    cashHistory = pd.DataFrame(columns=["Value"])
+    for date in pd.bdate_range("2000-01-03", periods=bars):
+        cashHistory.loc[date, "Value"] = 1.0
+        for holding in range(holdings):
+            history.loc[(date, f"SYM{holding}"), "Value"] = 1.0
+
+def recordLedger(bars: int, holdings: int):
+    """
+    Records equity into a preallocated ledger and builds the DataFrames once.
+
+    Parameters:
+        bars (int): Number of bars to record.
+        holdings (int): Number of holdings recorded per bar.
+    """
+    ledger = Ledger(bars, holdings)
+    for date in pd.bdate_range("2000-01-03", periods=bars):
+        bar = ledger.addBar(date)
+        ledger.recordCash(bar, 1.0)
+        for holding in range(holdings):
+            ledger.recordValue(bar, f"SYM{holding}", 1.0)
+    ledger.getHistory()
+    ledger.getCashHistory()
+
+def measure(function, bars: int, holdings: int):
+    """
+    Measures the time and peak traced memory of a recording function.
+
+    Parameters:
+        function (Callable): Recording function to measure.
+        bars (int): Number of bars to record.
+        holdings (int): Number of holdings recorded per bar.
+
+    Returns:
+        measurement (tuple[float, int]): Seconds taken and peak bytes allocated.
+    """
+    tracemalloc.start()
+    start = time.perf_counter()
+    function(bars, holdings)
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare DataFrame and ledger equity recording.")
+
+    parser.add_argument("--holdings", type=int, default=5)
+    parser.add_argument("--bars", type=int, nargs="+", default=[250, 500, 1000])
+
+    args = parser.parse_args()
+
+    print(f"{'bars':>6} {'frames us/bar':>14} {'ledger us/bar':>14} {'frames peak KiB':>16} {'ledger peak KiB':>16}")
+    for bars in args.bars:
+        framesTime, framesPeak = measure(recordFrames, bars, args.holdings)
+        ledgerTime, ledgerPeak = measure(recordLedger, bars, args.holdings)
+        print(
+            f"{bars:>6} {framesTime / bars * 1e6:>14.1f} {ledgerTime / bars * 1e6:>14.1f}"
+            f" {framesPeak / 1024:>16.0f} {ledgerPeak / 1024:>16.0f}"
+        )
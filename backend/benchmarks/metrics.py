@@ -0,0 +1,76 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generateTrades
+from core.metrics import computeMetrics
+
+
+def legacyWinProbability(trades) -> float:
+    """
+    Calculates the win probability the way Metrics used to, updating a DataFrame
+    of positions with .loc for every trade.
+
+    Parameters:
+        trades (Dict[str, ndarray]): Trade arrays as returned by generateTrades.
+
+    Returns:
+        winRate (float): The win probability as a decimal.
+    """
+    closed = 0
+    wins = 0
+    positions = pd.DataFrame(columns=["Shares", "Avg Price"])
+    for symbol, isBuy, shares, price in zip(trades["symbol"], trades["buy"], trades["shares"], trades["price"]):
+        if isBuy:
+            if symbol not in positions.index:
+                positions.loc[symbol] = [shares, price]
+                continue
+            heldShares = positions.loc[symbol, "Shares"]
+            avgPrice = positions.loc[symbol, "Avg Price"]
+            totalShares = heldShares + shares
+            positions.loc[symbol] = [totalShares, (heldShares * avgPrice + shares * price) / (heldShares + totalShares)]
+        else:
+            if symbol not in positions.index:
+                continue
+            positions.loc[symbol, "Shares"] -= shares
+            if price > positions.loc[symbol, "Avg Price"]:
+                wins += 1
+            closed += 1
+    return wins / closed if closed else 0
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the vectorized metrics against the per trade loop.")
+
+    parser.add_argument("--symbols", type=int, default=100)
+    parser.add_argument("--bars", type=int, default=2520)
+    parser.add_argument("--trades", type=int, nargs="+", default=[10_000, 100_000, 1_000_000])
+    parser.add_argument("--legacy-max", type=int, default=10_000, help="Largest trade count run through the per trade loop.")
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(start="2000-01-03", periods=args.bars).values
+    equity = 1_000_000 * np.cumprod(1 + rng.normal(0.0003, 0.01, size=args.bars))
+    invested = rng.random(args.bars) < 0.9
+
+    print(f"{args.bars} bars, {args.symbols} symbols")
+    print(f"{'trades':>10} {'vectorized s':>13} {'loop s':>10} {'identical reruns':>17} {'same win rate':>14}")
+    for tradeCount in args.trades:
+        trades = generateTrades(tradeCount, args.symbols, args.bars)
+
+        start = time.perf_counter()
+        metrics = computeMetrics(dates, equity, invested, trades, 1_000_000.0, float(equity[-1]))
+        elapsed = time.perf_counter() - start
+        rerun = computeMetrics(dates, equity, invested, trades, 1_000_000.0, float(equity[-1]))
+        identical = all(np.float64(metrics[name]).tobytes() == np.float64(rerun[name]).tobytes() for name in metrics)
+
+        loop = "-"
+        same = "-"
+        if tradeCount <= args.legacy_max:
+            start = time.perf_counter()
+            winProbability = legacyWinProbability(trades)
+            loop = f"{time.perf_counter() - start:.2f}"
+            same = str(winProbability == metrics["winProbability"])
+        print(f"{tradeCount:>10} {elapsed:>13.3f} {loop:>10} {str(identical):>17} {same:>14}")
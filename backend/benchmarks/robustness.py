@@ -0,0 +1,65 @@
+import argparse
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generateTrades
+from core.metrics import computeMetrics
+from core.robustness import bootstrapReturns
+
+
+def loopBootstrap(dates: np.ndarray, equity: np.ndarray, trades, resamples: int, blockSize: int, seed: int) -> None:
+    """
+    Block bootstraps an equity curve one resample at a time through computeMetrics.
+
+    Parameters:
+        dates (ndarray): Date of every bar as datetime64[ns].
+        equity (ndarray): Cash plus the value of every holding per bar.
+        trades (Dict[str, ndarray]): Trade arrays as returned by generateTrades.
+        resamples (int): Number of resampled curves.
+        blockSize (int): Bars per block.
+        seed (int): Seed for the random generator.
+    """
+    rng = np.random.default_rng(seed)
+    returns = equity[1:] / equity[:-1] - 1
+    invested = np.ones(len(equity), dtype=bool)
+    for _ in range(resamples):
+        starts = rng.integers(0, len(returns), size=-(-len(returns) // blockSize))
+        indices = (starts[:, None] + np.arange(blockSize)).ravel()[:len(returns)] % len(returns)
+        curve = equity[0] * np.concatenate(([1.0], np.cumprod(1 + returns[indices])))
+        computeMetrics(dates, curve, invested, trades, 1_000_000.0, float(curve[-1]))
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure the batched block bootstrap against resampling one curve at a time.")
+
+    parser.add_argument("--bars", type=int, default=2520)
+    parser.add_argument("--resamples", type=int, default=10000)
+    parser.add_argument("--trades", type=int, default=1000)
+    parser.add_argument("--max-mb", type=int, nargs="+", default=[16, 64, 256])
+    parser.add_argument("--loop-resamples", type=int, default=200, help="Resamples run one at a time, extrapolated to --resamples.")
+
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    dates = pd.bdate_range(start="2000-01-03", periods=args.bars).values
+    equity = 1_000_000 * np.cumprod(1 + rng.normal(0.0003, 0.01, size=args.bars))
+    trades = generateTrades(args.trades, 100, args.bars)
+    blockSize = max(1, round((args.bars - 1) ** (1 / 3)))
+
+    start = time.perf_counter()
+    loopBootstrap(dates, equity, trades, args.loop_resamples, blockSize, 0)
+    loop = (time.perf_counter() - start) / args.loop_resamples * args.resamples
+
+    print(f"{args.resamples} resamples of {args.bars} bars, blocks of {blockSize} bars")
+    print(f"{'run':>16} {'seconds':>10} {'peak MB':>10}")
+    print(f"{'one at a time':>16} {loop:>10.2f} {'-':>10}")
+    for maxMb in args.max_mb:
+        tracemalloc.start()
+        start = time.perf_counter()
+        bootstrapReturns(dates, equity, 1_000_000.0, 0.5, args.trades // 2, args.resamples, blockSize, 0, maxMb * 1024 * 1024)
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        print(f"{f'batched {maxMb} MB':>16} {elapsed:>10.2f} {peak / 1024 / 1024:>10.1f}")
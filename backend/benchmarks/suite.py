@@ -0,0 +1,256 @@
+import argparse
+import json
+import os
+import platform
+import shutil
+import statistics
+import sys
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+import numpy as np
+import pandas as pd
+
+from benchmarks.synthetic import generateMarketData
+from core.engine import Engine
+from core.metrics import METRICS, Metrics
+from core.resultCache import ResultCache
+from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+from database.cache import marketDataCache
+from database.connectionPool import closePool, closePools
+from database.sqLiteDB import SQLiteDB
+import main
+from processing.validator import Validator
+
+
+STRATEGY_PARAMS = {"threshold": 100.0, "daysToClose": 5, "quantity": 10}
+DEFAULT_SCALES = ["10x252", "20x504", "50x1260"]
+
+def parseScale(scale: str) -> Tuple[int, int]:
+    """
+    Parses a benchmark scale.
+
+    Parameters:
+        scale (str): Number of symbols and days as SYMBOLSxDAYS, e.g. 50x1260.
+
+    Returns:
+        scale (Tuple[int, int]): Number of symbols and number of days.
+    """
+    symbols, days = scale.lower().split("x")
+    return int(symbols), int(days)
+
+def fillDatabase(path: str, symbolCount: int, days: int, seed: int = 0) -> pd.DataFrame:
+    """
+    Creates a SQLite database filled with seeded synthetic market data.
+
+    Parameters:
+        path (str): Path of the database file to create.
+        symbolCount (int): Number of symbols, named SYM0, SYM1, ...
+        days (int): Number of business days per symbol.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        data (DataFrame): The generated market data with a (Date, Symbol) MultiIndex.
+    """
+    data = generateMarketData(symbolCount, days, seed)
+    database = SQLiteDB(path)
+    try:
+        database.setDataMany({symbol: symbolData.droplevel("Symbol") for symbol, symbolData in data.groupby(level="Symbol")})
+    finally:
+        database.close()
+        # Checkpoints the WAL into the file before it is copied
+        closePool(path)
+    return data
+
+def timeStage(function: Callable[[], Any], repeats: int, setup: Optional[Callable[[], Any]] = None) -> Dict[str, float]:
+    """
+    Times a stage several times.
+
+    Parameters:
+        function (Callable[[], Any]): The stage to time.
+        repeats (int): Number of timed runs.
+        setup (Callable[[], Any]): Called untimed before every run.
+
+    Returns:
+        timing (Dict[str, float]): Median and minimum seconds of the runs.
+    """
+    times = []
+    for _ in range(repeats):
+        if setup:
+            setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+    return {"median": statistics.median(times), "min": min(times)}
+
+def runScale(directory: str, symbolCount: int, days: int, repeats: int) -> Dict[str, Dict[str, float]]:
+    """
+    Times every stage of a backtest on a fresh database of one size.
+
+    Parameters:
+        directory (str): Empty directory the databases are created in.
+        symbolCount (int): Number of symbols.
+        days (int): Number of business days.
+        repeats (int): Number of timed runs per stage.
+
+    Returns:
+        timings (Dict[str, Dict[str, float]]): Timing of every stage by name.
+    """
+    pristinePath = os.path.join(directory, "pristine.db")
+    data = fillDatabase(pristinePath, symbolCount, days)
+    symbols = list(data.index.get_level_values("Symbol").unique())
+    dates = data.index.get_level_values("Date").unique()
+    startDate = dates[0].to_pydatetime()
+    endDate = dates[-1].to_pydatetime()
+    databasePath = os.path.join(directory, "symbol_data.db")
+    timings = {}
+
+    # Reads and validation run on a copy without recorded coverage every time
+    def freshDatabase():
+        closePool(databasePath)
+        shutil.copyfile(pristinePath, databasePath)
+
+    def readRanges():
+        database = SQLiteDB(databasePath)
+        database.getDataRangeMany(symbols, startDate, endDate)
+        database.close()
+
+    def validate():
+        database = SQLiteDB(databasePath)
+        for symbol in symbols:
+            Validator.getDataRange(symbol, startDate, endDate, database)
+        database.close()
+
+    timings["dbRead"] = timeStage(readRanges, repeats, freshDatabase)
+    timings["validation"] = timeStage(validate, repeats, freshDatabase)
+
+    # End to end backtests load through openDatabase without the market data cache
+    freshDatabase()
+    os.environ["BACKTESTER_DATA"] = directory
+    for mode in ("linear", "vectorized"):
+        timings[f"backtest.{mode}"] = timeStage(
+            lambda: Engine.runBacktest(symbols, startDate, endDate, ConstantPriceThresholdStrategy, STRATEGY_PARAMS, 1_000_000.0, mode),
+            repeats,
+            marketDataCache.invalidate
+        )
+    marketDataCache.invalidate()
+
+    backtestResults = Engine.runBacktest(symbols, startDate, endDate, ConstantPriceThresholdStrategy, STRATEGY_PARAMS, 1_000_000.0, "linear")
+    timings["metrics"] = timeStage(lambda: Metrics(data, backtestResults["portfolio"]).getMetrics(), repeats)
+    # Results in the shape returned by main.executeBacktest
+    results = {metric: backtestResults[metric] for metric in METRICS}
+    results["trades"] = backtestResults["portfolio"].getTrades()
+    resultCache = ResultCache(os.path.join(directory, "results"))
+    resultCache.put("suite", results)
+    timings["resultCache.hit"] = timeStage(lambda: resultCache.get("suite"), repeats)
+    timings["serialization.json"] = timeStage(
+        lambda: main.BacktestResponse(**main.getOutput(results, 0, None, False)).model_dump_json(),
+        repeats
+    )
+    timings["serialization.stream"] = timeStage(lambda: "".join(main.streamOutput(results, 0, None, False)), repeats)
+    return timings
+
+def runSuite(scales: List[str], repeats: int) -> Dict[str, Any]:
+    """
+    Runs every stage at every scale on temporary databases.
+
+    Parameters:
+        scales (List[str]): Sizes to run as SYMBOLSxDAYS.
+        repeats (int): Number of timed runs per stage.
+
+    Returns:
+        results (Dict[str, Any]): The environment and a timing per "stage@scale" key.
+    """
+    results = {
+        "environment": {
+            "python": platform.python_version(),
+            "numpy": np.__version__,
+            "pandas": pd.__version__,
+            "platform": platform.platform(),
+            "cpus": os.cpu_count()
+        },
+        "repeats": repeats,
+        "timings": {}
+    }
+    dataPath = os.environ.get("BACKTESTER_DATA")
+    try:
+        for scale in scales:
+            symbolCount, days = parseScale(scale)
+            with tempfile.TemporaryDirectory() as directory:
+                try:
+                    for stage, timing in runScale(directory, symbolCount, days, repeats).items():
+                        results["timings"][f"{stage}@{scale}"] = timing
+                finally:
+                    closePools()
+    finally:
+        if dataPath is None:
+            os.environ.pop("BACKTESTER_DATA", None)
+        else:
+            os.environ["BACKTESTER_DATA"] = dataPath
+    return results
+
+def compareResults(
+        results: Dict[str, Any],
+        baseline: Dict[str, Any],
+        tolerance: float,
+        minSeconds: float
+    ) -> List[Tuple[str, float, float, bool]]:
+    """
+    Compares the fastest timings of a run against a baseline run. The fastest of the
+    repeats is the least affected by other load on the machine.
+
+    Parameters:
+        results (Dict[str, Any]): Results returned by runSuite.
+        baseline (Dict[str, Any]): Earlier results returned by runSuite.
+        tolerance (float): Allowed slowdown as a fraction, e.g. 0.2 for 20%.
+        minSeconds (float): Slowdowns smaller than this many seconds are never regressions.
+
+    Returns:
+        comparison (List[Tuple[str, float, float, bool]]): Key, baseline seconds, current
+        seconds and whether it regressed, for every key in both runs.
+    """
+    comparison = []
+    for key, timing in results["timings"].items():
+        previous = baseline["timings"].get(key)
+        if previous is None:
+            continue
+        slowdown = timing["min"] - previous["min"]
+        regressed = slowdown > previous["min"] * tolerance and slowdown > minSeconds
+        comparison.append((key, previous["min"], timing["min"], regressed))
+    return comparison
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Time the backend stages on synthetic databases and compare them to a baseline.")
+
+    parser.add_argument("--scales", type=str, nargs="+", default=DEFAULT_SCALES, help="Sizes as SYMBOLSxDAYS.")
+    parser.add_argument("--repeats", type=int, default=3)
+    parser.add_argument("--output", type=str, help="Write the results as JSON to this path.")
+    parser.add_argument("--baseline", type=str, help="JSON results of an earlier run to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed slowdown against the baseline as a fraction.")
+    parser.add_argument("--min-seconds", type=float, default=0.005, help="Smaller slowdowns are never regressions.")
+
+    args = parser.parse_args()
+
+    results = runSuite(args.scales, args.repeats)
+
+    print(f"{'stage@scale':>32} {'median s':>10} {'min s':>10}")
+    for key, timing in results["timings"].items():
+        print(f"{key:>32} {timing['median']:>10.4f} {timing['min']:>10.4f}")
+
+    if args.output:
+        with open(args.output, "w") as file:
+            json.dump(results, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline) as file:
+            baseline = json.load(file)
+        comparison = compareResults(results, baseline, args.tolerance, args.min_seconds)
+        print(f"\n{'stage@scale':>32} {'baseline s':>11} {'current s':>10} {'ratio':>7}")
+        for key, previous, current, regressed in comparison:
+            flag = "  slower" if regressed else ""
+            print(f"{key:>32} {previous:>11.4f} {current:>10.4f} {current / previous:>7.2f}{flag}")
+        regressions = [key for key, _, _, regressed in comparison if regressed]
+        if regressions:
+            print(f"Error: {len(regressions)} stages are more than {args.tolerance:.0%} slower than the baseline.")
+            sys.exit(1)
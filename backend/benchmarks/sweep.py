@@ -0,0 +1,36 @@
+import argparse
+import os
+import time
+
+from benchmarks.synthetic import generateMarketData
+from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+from core.sweep import Sweep
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Measure parameter sweep throughput per number of workers.")
+
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--bars", type=int, default=1000)
+    parser.add_argument("--mode", type=str, default="vectorized")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, 2, os.cpu_count() or 1}))
+
+    args = parser.parse_args()
+
+    data = generateMarketData(args.symbols, args.bars)
+    combinations = Sweep.expandGrid({
+        "threshold": {"start": 98, "stop": 102, "step": 0.5},
+        "daysToClose": [1, 3, 5, 10],
+        "quantity": [10]
+    })
+
+    print(f"{len(combinations)} combinations, {args.bars} bars, {args.symbols} symbols")
+    print(f"{'workers':>8} {'seconds':>10} {'runs/s':>10} {'speedup':>10}")
+    baseline = None
+    for workers in args.workers:
+        start = time.perf_counter()
+        for _ in Sweep.runSweep(data, ConstantPriceThresholdStrategy, combinations, 1_000_000.0, args.mode, workers):
+            pass
+        elapsed = time.perf_counter() - start
+        baseline = baseline or elapsed
+        print(f"{workers:>8} {elapsed:>10.2f} {len(combinations) / elapsed:>10.1f} {baseline / elapsed:>10.2f}")
@@ -0,0 +1,133 @@
+from typing import Dict
+
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+
+
+def generateMarketData(symbolCount: int, days: int, seed: int = 0, start: str = "2000-01-03") -> DataFrame:
+    """
+    Generates seeded synthetic OHLCV data that mean reverts around 100 so
+    threshold style strategies trade regularly.
+
+    Parameters:
+        symbolCount (int): Number of symbols to generate, named SYM0, SYM1, ...
+        days (int): Number of business days to generate.
+        seed (int): Seed for the random generator.
+        start (str): First date of the data in YYYY-MM-DD.
+
+    Returns:
+        data (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex
+        and the columns Open, High, Low, Close, Adj Close and Volume.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start=start, periods=days)
+    symbols = [f"SYM{i}" for i in range(symbolCount)]
+
+    # AR(1) deviation from 100, one column per symbol
+    shocks = rng.normal(0, 1.5, size=(days, symbolCount))
+    deviation = np.empty_like(shocks)
+    previous = np.zeros(symbolCount)
+    for day in range(days):
+        previous = 0.8 * previous + shocks[day]
+        deviation[day] = previous
+    close = 100 + deviation
+    open = close + rng.normal(0, 0.5, size=close.shape)
+    spread = np.abs(rng.normal(0, 1, size=close.shape))
+
+    index = pd.MultiIndex.from_product([dates, symbols], names=["Date", "Symbol"])
+    data = pd.DataFrame({
+            "Open": open.ravel(),
+            "High": np.maximum(open, close).ravel() + spread.ravel(),
+            "Low": np.minimum(open, close).ravel() - spread.ravel(),
+            "Close": close.ravel(),
+            "Adj Close": close.ravel(),
+            "Volume": rng.integers(1000, 100000, size=close.size)
+        },
+        index=index
+    )
+    return data.sort_index()
+
+def generateTrades(tradeCount: int, symbolCount: int, days: int, seed: int = 0) -> Dict[str, np.ndarray]:
+    """
+    Generates seeded round trips, each buying shares of a symbol and selling them
+    1 to 20 bars later, in the arrays computeMetrics takes.
+
+    Parameters:
+        tradeCount (int): Number of trades to generate, half buys and half sells.
+        symbolCount (int): Number of symbols traded.
+        days (int): Number of business days the trades are spread over, at least 2.
+        seed (int): Seed for the random generator.
+
+    Returns:
+        trades (Dict[str, ndarray]): "symbol", "buy", "shares", "price" and "time"
+        arrays in execution order, sells before buys within a bar.
+    """
+    rng = np.random.default_rng(seed)
+    dates = pd.bdate_range(start="2000-01-03", periods=days).values
+    prices = 100 + np.cumsum(rng.normal(0, 1, size=(days, symbolCount)), axis=0) * 0.1
+
+    roundTrips = tradeCount // 2
+    symbols = rng.integers(symbolCount, size=roundTrips)
+    buyBars = rng.integers(days - 1, size=roundTrips)
+    sellBars = np.minimum(buyBars + rng.integers(1, 21, size=roundTrips), days - 1)
+    shares = rng.integers(1, 100, size=roundTrips).astype(np.float64)
+
+    bars = np.concatenate((buyBars, sellBars))
+    isBuy = np.concatenate((np.ones(roundTrips, dtype=bool), np.zeros(roundTrips, dtype=bool)))
+    order = np.lexsort((isBuy, bars))
+    tradeSymbols = np.concatenate((symbols, symbols))[order]
+    return {
+        "symbol": tradeSymbols.astype(np.int64),
+        "buy": isBuy[order],
+        "shares": np.concatenate((shares, shares))[order],
+        "price": prices[bars[order], tradeSymbols],
+        "time": dates[bars[order]]
+    }
+
+def generateBars(symbolCount: int, days: int, barsPerDay: int = 390, seed: int = 0, start: str = "2000-01-03") -> DataFrame:
+    """
+    Generates seeded synthetic intraday OHLCV bars one minute apart from 9:30,
+    mean reverting around 100 like generateMarketData.
+
+    Parameters:
+        symbolCount (int): Number of symbols to generate, named SYM0, SYM1, ...
+        days (int): Number of business days to generate.
+        barsPerDay (int): Number of bars per day.
+        seed (int): Seed for the random generator.
+        start (str): First date of the data in YYYY-MM-DD.
+
+    Returns:
+        data (DataFrame): Bars with a sorted (Date, Symbol) MultiIndex, the Date
+        level holding the time of each bar, and the columns Open, High, Low, Close,
+        Adj Close and Volume.
+    """
+    rng = np.random.default_rng(seed)
+    days = pd.bdate_range(start=start, periods=days)
+    minutes = pd.to_timedelta(np.arange(barsPerDay), unit="min") + pd.Timedelta(hours=9, minutes=30)
+    times = pd.DatetimeIndex((days.values[:, None] + minutes.values).ravel())
+    symbols = [f"SYM{i}" for i in range(symbolCount)]
+
+    # AR(1) deviation from 100 with smaller steps than daily data
+    shocks = rng.normal(0, 0.3, size=(len(times), symbolCount))
+    deviation = np.empty_like(shocks)
+    previous = np.zeros(symbolCount)
+    for bar in range(len(times)):
+        previous = 0.98 * previous + shocks[bar]
+        deviation[bar] = previous
+    close = 100 + deviation
+    open = close + rng.normal(0, 0.1, size=close.shape)
+    spread = np.abs(rng.normal(0, 0.2, size=close.shape))
+
+    index = pd.MultiIndex.from_product([times, symbols], names=["Date", "Symbol"])
+    data = pd.DataFrame({
+            "Open": open.ravel(),
+            "High": np.maximum(open, close).ravel() + spread.ravel(),
+            "Low": np.minimum(open, close).ravel() - spread.ravel(),
+            "Close": close.ravel(),
+            "Adj Close": close.ravel(),
+            "Volume": rng.integers(10, 1000, size=close.size)
+        },
+        index=index
+    )
+    return data.sort_index()
@@ -0,0 +1,92 @@
+import argparse
+import os
+import tempfile
+import time
+
+from benchmarks.suite import STRATEGY_PARAMS, fillDatabase
+from core.engine import Engine
+from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+from core.sweep import Sweep
+from database.cache import marketDataCache
+from database.connectionPool import closePools
+
+
+def runByHand(symbols, windows, combinations, mode: str) -> list:
+    """
+    Runs a walk-forward optimization the way it was scripted before, a full
+    backtest with a fresh load of the market data for every window and combination.
+
+    Parameters:
+        symbols (List[str]): Symbols to backtest on.
+        windows (List[Dict[str, Timestamp]]): Walk-forward windows.
+        combinations (List[Dict[str, Any]]): Strategy parameters tried on each train period.
+        mode (str): Engine mode of each backtest.
+
+    Returns:
+        params (list): The best parameters of each window.
+    """
+    chosen = []
+    for window in windows:
+        best = None
+        for strategyParams in combinations:
+            marketDataCache.invalidate()
+            results = Engine.runBacktest(symbols, window["trainStart"], window["trainEnd"], ConstantPriceThresholdStrategy, strategyParams, 1_000_000.0, mode)
+            if best is None or results["profitLoss"] > best[1]:
+                best = (strategyParams, results["profitLoss"])
+        marketDataCache.invalidate()
+        Engine.runBacktest(symbols, window["testStart"], window["testEnd"], ConstantPriceThresholdStrategy, best[0], 1_000_000.0, mode)
+        chosen.append(best[0])
+    return chosen
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Compare a walk-forward optimization on shared data with reloading the data for every backtest.")
+
+    parser.add_argument("--symbols", type=int, default=10)
+    parser.add_argument("--days", type=int, default=1260)
+    parser.add_argument("--train", type=int, default=252)
+    parser.add_argument("--test", type=int, default=63)
+    parser.add_argument("--mode", type=str, default="vectorized")
+    parser.add_argument("--workers", type=int, nargs="+", default=sorted({1, os.cpu_count() or 1}))
+
+    args = parser.parse_args()
+
+    paramRanges = {
+        "threshold": [STRATEGY_PARAMS["threshold"] - 1, STRATEGY_PARAMS["threshold"], STRATEGY_PARAMS["threshold"] + 1],
+        "daysToClose": [1, 5],
+        "quantity": [STRATEGY_PARAMS["quantity"]]
+    }
+    combinations = Sweep.expandGrid(paramRanges)
+    dataPath = os.environ.get("BACKTESTER_DATA")
+    with tempfile.TemporaryDirectory() as directory:
+        try:
+            os.environ["BACKTESTER_DATA"] = directory
+            data = fillDatabase(os.path.join(directory, "symbol_data.db"), args.symbols, args.days)
+            symbols = list(data.index.get_level_values("Symbol").unique())
+            dates = data.index.get_level_values("Date").unique()
+            windows = Sweep.splitWindows(dates, args.train, args.test)
+            # Validate once so both runs read checked data
+            Engine.loadData(symbols, dates[0], dates[-1])
+
+            print(f"{len(windows)} windows x {len(combinations)} combinations, {args.symbols} symbols x {args.days} days")
+            print(f"{'run':>22} {'seconds':>10} {'speedup':>10}")
+            start = time.perf_counter()
+            expected = runByHand(symbols, windows, combinations, args.mode)
+            baseline = time.perf_counter() - start
+            print(f"{'reload per backtest':>22} {baseline:>10.2f} {1:>10.2f}")
+            for workers in args.workers:
+                marketDataCache.invalidate()
+                start = time.perf_counter()
+                results = Sweep.walkForward(
+                    symbols, dates[0], dates[-1], ConstantPriceThresholdStrategy, paramRanges,
+                    1_000_000.0, args.train, args.test, mode=args.mode, workers=workers
+                )
+                elapsed = time.perf_counter() - start
+                if [result["train"]["params"] for result in results] != expected:
+                    print("Error: walk-forward chose different parameters")
+                print(f"{f'{workers} workers':>22} {elapsed:>10.2f} {baseline / elapsed:>10.2f}")
+        finally:
+            closePools()
+            if dataPath is None:
+                os.environ.pop("BACKTESTER_DATA", None)
+            else:
+                os.environ["BACKTESTER_DATA"] = dataPath
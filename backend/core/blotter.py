@@ -0,0 +1,192 @@
+from datetime import datetime
+from typing import Dict, Iterator, List, Optional, Sequence, Union
+
+import numpy as np
+import pandas as pd
+
+from core.trade import Trade
+
+
+class Blotter:
+    __slots__ = (
+        "_count",
+        "_symbols",
+        "_symbolIds",
+        "_buy",
+        "_shares",
+        "_prices",
+        "_times"
+    )
+
+    def __init__(self, symbols: Sequence[str], capacity: int = 0):
+        """
+        Initializes an empty trade log keeping one growable typed array per field
+        instead of one object per trade.
+
+        Parameters:
+            symbols (Sequence[str]): Symbol of every symbol id traded.
+            capacity (int): Number of trades to preallocate.
+        """
+        self._count = 0
+        self._symbols = list(symbols)
+        self._symbolIds = np.empty(capacity, dtype=np.int32)
+        self._buy = np.empty(capacity, dtype=bool)
+        self._shares = np.empty(capacity, dtype=np.int64)
+        self._prices = np.empty(capacity, dtype=np.float64)
+        self._times = np.empty(capacity, dtype=np.int64) # nanoseconds since epoch
+
+    def fromArrays(
+            symbols: Sequence[str],
+            symbolIds: np.ndarray,
+            buy: np.ndarray,
+            shares: np.ndarray,
+            sharePrices: np.ndarray,
+            times: np.ndarray
+        ) -> "Blotter":
+        """
+        Builds a trade log from the arrays of its trades, such as the ones returned
+        by getArrays.
+
+        Parameters:
+            symbols (Sequence[str]): Symbol of every symbol id traded.
+            symbolIds (ndarray): Id of the symbol of each trade.
+            buy (ndarray): Whether each trade is a BUY, otherwise a SELL.
+            shares (ndarray): The number of shares of each trade.
+            sharePrices (ndarray): The price per share of each trade.
+            times (ndarray): The time of each trade as datetime64[ns] or nanoseconds
+            since the epoch.
+
+        Returns:
+            blotter (Blotter): The trade log holding copies of the arrays.
+        """
+        blotter = Blotter(symbols)
+        blotter._symbolIds = np.array(symbolIds, dtype=np.int32)
+        blotter._buy = np.array(buy, dtype=bool)
+        blotter._shares = np.array(shares, dtype=np.int64)
+        blotter._prices = np.array(sharePrices, dtype=np.float64)
+        blotter._times = np.array(times).view(np.int64).astype(np.int64)
+        blotter._count = len(blotter._shares)
+        return blotter
+
+    def reserve(self, capacity: int):
+        """
+        Grows the arrays to hold at least the given number of trades.
+
+        Parameters:
+            capacity (int): Number of trades to make room for.
+        """
+        if capacity <= len(self._shares):
+            return
+        used = self._count
+        for name in ("_symbolIds", "_buy", "_shares", "_prices", "_times"):
+            old = getattr(self, name)
+            new = np.empty(capacity, dtype=old.dtype)
+            new[:used] = old[:used]
+            setattr(self, name, new)
+
+    def append(self, symbolId: int, buy: bool, shares: int, sharePrice: float, timestamp: datetime):
+        """
+        Records an executed trade.
+
+        Parameters:
+            symbolId (int): Id of the symbol traded.
+            buy (bool): Whether the trade is a BUY, otherwise a SELL.
+            shares (int): The number of shares transacted.
+            sharePrice (float): The price per share at which the trade executed.
+            timestamp (datetime): The date and time the trade was executed.
+        """
+        row = self._count
+        if row == len(self._shares):
+            self.reserve(max(2 * row, 64))
+        self._symbolIds[row] = symbolId
+        self._buy[row] = buy
+        self._shares[row] = shares
+        self._prices[row] = sharePrice
+        self._times[row] = pd.Timestamp(timestamp).value
+        self._count += 1
+
+    def extend(self, symbolIds: np.ndarray, buy: np.ndarray, shares: np.ndarray, sharePrices: np.ndarray, timestamp: datetime):
+        """
+        Records several trades executed at the same time in one write per field.
+
+        Parameters:
+            symbolIds (ndarray): Id of the symbol of each trade.
+            buy (ndarray): Whether each trade is a BUY, otherwise a SELL.
+            shares (ndarray): The number of shares of each trade.
+            sharePrices (ndarray): The price per share of each trade.
+            timestamp (datetime): The date and time the trades were executed.
+        """
+        start = self._count
+        end = start + len(symbolIds)
+        if end > len(self._shares):
+            self.reserve(max(2 * len(self._shares), end, 64))
+        self._symbolIds[start:end] = symbolIds
+        self._buy[start:end] = buy
+        self._shares[start:end] = shares
+        self._prices[start:end] = sharePrices
+        self._times[start:end] = pd.Timestamp(timestamp).value
+        self._count = end
+
+    def getSymbols(self) -> List[str]:
+        """
+        Retrieves the symbol of every symbol id.
+
+        Returns:
+            symbols (List[str]): Symbols indexed by symbol id.
+        """
+        return self._symbols
+
+    def getArrays(self, start: int = 0, end: Optional[int] = None) -> Dict[str, np.ndarray]:
+        """
+        Retrieves a range of trades as one read-only array view per field, in
+        execution order.
+
+        Parameters:
+            start (int): First trade, inclusive.
+            end (int): Last trade, exclusive, None for every trade after start.
+
+        Returns:
+            arrays (Dict[str, ndarray]): "symbol" as symbol ids, "buy" as booleans,
+            "shares", "price" and "time" as datetime64[ns].
+        """
+        start, end, _ = slice(start, end).indices(self._count)
+        arrays = {
+            "symbol": self._symbolIds[start:end],
+            "buy": self._buy[start:end],
+            "shares": self._shares[start:end],
+            "price": self._prices[start:end],
+            "time": self._times[start:end].view("datetime64[ns]")
+        }
+        for array in arrays.values():
+            array.flags.writeable = False
+        return arrays
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __getitem__(self, key: Union[int, slice]) -> Union[Trade, List[Trade]]:
+        """
+        Builds Trade rows for compatibility with code reading trades one at a time.
+
+        Parameters:
+            key (int | slice): Position of a trade, negative from the end, or a range.
+
+        Returns:
+            trades (Trade | List[Trade]): The trade, or a list of the trades in the range.
+        """
+        if isinstance(key, slice):
+            return [self[row] for row in range(*key.indices(self._count))]
+        row = key + self._count if key < 0 else key
+        if row < 0 or row >= self._count:
+            raise IndexError("trade index out of range")
+        return Trade(
+            self._symbols[self._symbolIds[row]],
+            int(self._shares[row]),
+            "BUY" if self._buy[row] else "SELL",
+            self._prices[row],
+            pd.Timestamp(self._times[row])
+        )
+
+    def __iter__(self) -> Iterator[Trade]:
+        for row in range(self._count):
+            yield self[row]
@@ -1,14 +1,26 @@
+from contextlib import nullcontext
 from datetime import datetime
-import os
-from typing import Any, Dict, List, Type
+from typing import Any, Callable, Dict, Iterator, List, Literal, Optional, Tuple, Type
+import numpy as np
 import pandas as pd
-from core.metrics import Metrics
+from pandas import DataFrame
+from core.indicators import IndicatorSet
+from core.ledger import EquityLedger
+from core.metrics import TRADING_DAYS_PER_YEAR, Metrics
 from core.portfolio import Portfolio
+from core.profiler import Profiler, profileCalls, profileRows, profileStage
 from core.strategies.base import Strategy
-from database.sqLiteDB import SQLiteDB
+from core.universe import Universe
+from database.backends import openDatabase
+from database.base import BARS_PER_DAY, DEFAULT_CHUNK_ROWS, Interval, getEndTime
+from database.cache import marketDataCache
 from processing.validator import Validator
 
 
+Mode = Literal["prefix", "linear", "vectorized", "stream"]
+# Strategy class and parameters of one backtest of a batch
+StrategyConfig = Tuple[Type[Strategy], Dict[str, Any]]
+
 class Engine:
     def runBacktest(
             symbols: List[str],
@@ -16,11 +28,16 @@ class Engine:
             endDate: datetime,
             strategyClass: Type[Strategy],
             strategyParams: Dict[str, Any],
-            startingCash: float
+            startingCash: float,
+            mode: Mode = "linear",
+            progress: Optional[Callable[[int, int], None]] = None,
+            profiler: Optional[Profiler] = None,
+            interval: Interval = "1d",
+            chunkRows: int = DEFAULT_CHUNK_ROWS
         ) -> Dict[str, Any]:
         """
         Run backtest on a list of symbols within a date range using the specified strategy
-        
+
         Parameters:
             symbols (List[str]): List of symbols to backtest on.
             startDate (datetime): Start date for the data range, inclusive.
@@ -28,49 +45,534 @@ class Engine:
             strategyClass (Strategy): Strategy class to use in the backtest.
             strategyParams (Dict[str, Any]): Dictionary for parameters of strategy class.
             startingCash (float): Initial cash to start backtest with.
+            mode (Mode): "linear" walks the data once with bounded views, "prefix"
+            re-slices the full history on every bar, "vectorized" simulates the
+            orders from the strategy's generateSignals, "stream" walks the bars like
+            "linear" while reading them from storage in chunks.
+            progress (Callable[[int, int], None]): Called with the bars done and the
+            total bars as the backtest advances.
+            profiler (Profiler): Records the time, calls, rows and memory of every
+            stage of the backtest.
+            interval (Interval): Interval of the bars, the dates are times for intraday bars.
+            chunkRows (int): Rows read from storage per chunk in "stream" mode.
 
         Returns:
             results (Dict[str, Any]): Contains metrics of backtest and portfolio after backtest run.
         """
+        with profiler.activate() if profiler is not None else nullcontext():
+            if mode == "stream":
+                return Engine.runStream(symbols, startDate, endDate, strategyClass, strategyParams, startingCash, interval, chunkRows, progress)
+            completeData = Engine.loadData(symbols, startDate, endDate, interval)
+            return Engine.runOnData(completeData, strategyClass, strategyParams, startingCash, mode, progress, interval)
+
+    def loadData(symbols: List[str], startDate: datetime, endDate: datetime, interval: Interval = "1d") -> DataFrame:
+        """
+        Loads and validates market data for a list of symbols within a date range.
+        Data already in the process-wide market data cache is served from memory
+        unless its version in the database changed. Intraday bars are read as stored.
+
+        Parameters:
+            symbols (List[str]): List of symbols to load.
+            startDate (datetime): Start date for the data range, inclusive.
+            endDate (datetime): End date for the data range, inclusive, the whole day
+            for intraday bars unless it has a time.
+            interval (Interval): Interval of the bars.
+
+        Returns:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+        """
+        if interval != "1d":
+            with profileStage("loadData"):
+                database = openDatabase()
+                try:
+                    with profileStage("dbRead"):
+                        completeData = database.getBarsRangeMany(symbols, interval, startDate, getEndTime(endDate, interval))
+                finally:
+                    database.close()
+            profileRows("loadData", len(completeData))
+            return completeData
+
+        database = None
 
-        # check db for no missing data
-        dbPath = os.path.abspath(os.path.join("..", "data", "symbol_data.db"))
-        os.makedirs(os.path.dirname(dbPath), exist_ok=True)
-        database = SQLiteDB(dbPath)
-        startDate = startDate
-        endDate = endDate
+        def connect():
+            # One connection shared by the version check and the loaders
+            nonlocal database
+            if database is None:
+                database = openDatabase()
+            return database
+
+        def loadSymbol(symbol: str, start: datetime, end: datetime) -> DataFrame:
+            # check db for no missing data
+            with profileStage("validation"):
+                return Validator.getDataRange(symbol, start, end, connect())
+
+        def loadSymbols(symbols: List[str], start: datetime, end: datetime) -> Dict[str, DataFrame]:
+            # Query every symbol at once, then check each for missing data
+            with profileStage("dbRead"):
+                batch = connect().getDataRangeMany(symbols, start, end)
+            profileRows("dbRead", len(batch))
+            bySymbol = {symbol: data for symbol, data in batch.groupby(level="Symbol")}
+            empty = batch.iloc[:0]
+            loaded = {}
+            for symbol in symbols:
+                singleData = bySymbol.get(symbol, empty).reset_index("Symbol")
+                with profileStage("validation"):
+                    loaded[symbol] = Validator.getDataRange(symbol, start, end, database, singleData)
+            return loaded
 
         # Get data
-        listOfData = []
-        for symbol in symbols:
-            singleData = Validator.getDataRange(symbol, startDate, endDate, database)
-            listOfData.append(singleData)
+        with profileStage("loadData"):
+            try:
+                marketDataCache.syncVersions(
+                    symbols,
+                    connect().getGeneration(),
+                    lambda staleSymbols: connect().getDataVersions(staleSymbols, startDate, endDate)
+                )
+                listOfData = marketDataCache.getDataRangeMany(symbols, startDate, endDate, loadSymbol, loadSymbols)
+            finally:
+                if database is not None:
+                    database.close()
+        with profileStage("concat"):
+            completeData = pd.concat(listOfData)
+            completeData = completeData.set_index("Symbol", append=True).sort_index()
+        profileRows("loadData", len(completeData))
+        return completeData
+
+    def getDataVersions(symbols: List[str], startDate: datetime, endDate: datetime) -> Dict[str, int]:
+        """
+        Retrieves the version of the stored market data of a list of symbols within a
+        date range, which changes whenever rows in the range are written.
 
-        database.close()
-        completeData = pd.concat(listOfData)
-        completeData = completeData.set_index("Symbol", append=True).sort_index()
+        Parameters:
+            symbols (List[str]): List of symbols to check.
+            startDate (datetime): Start date for the data range, inclusive.
+            endDate (datetime): End date for the data range, inclusive.
+
+        Returns:
+            versions (Dict[str, int]): Data version keyed by symbol.
+        """
+        database = openDatabase()
+        try:
+            return database.getDataVersions(symbols, startDate, endDate)
+        finally:
+            database.close()
 
-        portfolio = Portfolio(startingCash)
-        strategy = strategyClass(**strategyParams)
-        strategy.onStart()
+    def runOnData(
+            completeData: DataFrame,
+            strategyClass: Type[Strategy],
+            strategyParams: Dict[str, Any],
+            startingCash: float,
+            mode: Mode = "linear",
+            progress: Optional[Callable[[int, int], None]] = None,
+            interval: Interval = "1d"
+        ) -> Dict[str, Any]:
+        """
+        Run backtest on already loaded market data.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            strategyClass (Strategy): Strategy class to use in the backtest.
+            strategyParams (Dict[str, Any]): Dictionary for parameters of strategy class.
+            startingCash (float): Initial cash to start backtest with.
+            mode (Mode): "linear" walks the data once with bounded views, "prefix"
+            re-slices the full history on every bar, "vectorized" simulates the
+            orders from the strategy's generateSignals. "stream" reads from storage,
+            see runStream.
+            progress (Callable[[int, int], None]): Called with the bars done and the
+            total bars as the backtest advances.
+            interval (Interval): Interval of the bars, annualizes the metrics.
+
+        Returns:
+            results (Dict[str, Any]): Contains metrics of backtest and portfolio after backtest run.
+        """
+        with profileStage("setup"):
+            portfolio = Portfolio(startingCash, Universe(completeData))
+            strategy = strategyClass(**strategyParams)
+            strategy.indicators = IndicatorSet(strategy.getIndicators())
+            strategy.onStart()
 
         # Main backtest loop
-        for date in completeData.index.get_level_values("Date").unique():
-            marketData = completeData.loc[:date]
+        with profileStage("mainLoop"):
+            if mode == "prefix":
+                dates = completeData.index.get_level_values("Date").unique()
+                hasIndicators = len(strategy.indicators.getIndicators()) > 0
+                updateValue = profileCalls("portfolio.updateValue", portfolio._updateValue)
+                updateIndicators = profileCalls("indicators.update", strategy.indicators.update)
+                strategyNext = profileCalls("strategy.next", strategy.next)
+                executeTrades = profileCalls("portfolio.executeTrades", portfolio._executeTrades)
+                for bar, date in enumerate(dates):
+                    marketData = completeData.loc[:date]
 
-            portfolio._updateValue(marketData)
-            trades = strategy.next(marketData, portfolio)
-            portfolio._executeTrades(marketData, trades)
+                    updateValue(marketData)
+                    if hasIndicators:
+                        updateIndicators(completeData.xs(date, level="Date", drop_level=False))
+                    trades = strategyNext(marketData, portfolio)
+                    executeTrades(marketData, trades)
+                    if progress:
+                        progress(bar + 1, len(dates))
+            elif mode == "linear":
+                Engine._runLinear(completeData, strategy, portfolio, progress)
+            elif mode == "vectorized":
+                Engine._runVectorized(completeData, strategy, portfolio)
+                if progress:
+                    progress(1, 1)
+            elif mode == "stream":
+                raise ValueError("The stream mode reads its bars from storage, use Engine.runStream")
+            else:
+                raise ValueError(f"Unknown engine mode: {mode}")
+        profileRows("mainLoop", len(completeData))
 
-        portfolio._liquidate(completeData)
+        with profileStage("liquidate"):
+            portfolio._liquidate(completeData)
 
         # Calculate metrics of backtest
-        metrics = Metrics(completeData, portfolio)
-        results = {
-            "profitLoss": metrics.getProfitLoss(),
-            "annualizedReturn": metrics.getAnnualizedReturn(),
-            "maxDrawdown": metrics.getMaxDrawdown(),
-            "winProbability": metrics.getWinProbability(),
-            "portfolio": portfolio
-        }
+        with profileStage("metrics"):
+            metrics = Metrics(completeData, portfolio, TRADING_DAYS_PER_YEAR * BARS_PER_DAY[interval])
+            results = dict(metrics.getMetrics())
+        results["portfolio"] = portfolio
+        return results
+
+    def runBatch(
+            symbols: List[str],
+            startDate: datetime,
+            endDate: datetime,
+            configs: List[StrategyConfig],
+            startingCash: float,
+            mode: Mode = "linear",
+            progress: Optional[Callable[[int, int], None]] = None,
+            profiler: Optional[Profiler] = None,
+            interval: Interval = "1d"
+        ) -> List[Dict[str, Any]]:
+        """
+        Run a backtest of several strategies on a list of symbols within a date range,
+        loading the market data once and walking it once for all of them.
+
+        Parameters:
+            symbols (List[str]): List of symbols to backtest on.
+            startDate (datetime): Start date for the data range, inclusive.
+            endDate (datetime): End date for the data range, inclusive.
+            configs (List[StrategyConfig]): Strategy class and parameters of each backtest.
+            startingCash (float): Initial cash of each backtest.
+            mode (Mode): "linear" or "vectorized", see runBatchOnData.
+            progress (Callable[[int, int], None]): Called with the bars done and the
+            total bars as the backtests advance.
+            profiler (Profiler): Records the time, calls, rows and memory of every
+            stage of the backtests.
+            interval (Interval): Interval of the bars.
+
+        Returns:
+            results (List[Dict[str, Any]]): Metrics and portfolio of each backtest, in
+            the order of configs.
+        """
+        with profiler.activate() if profiler is not None else nullcontext():
+            completeData = Engine.loadData(symbols, startDate, endDate, interval)
+            return Engine.runBatchOnData(completeData, configs, startingCash, mode, progress, interval)
+
+    def runBatchOnData(
+            completeData: DataFrame,
+            configs: List[StrategyConfig],
+            startingCash: float,
+            mode: Mode = "linear",
+            progress: Optional[Callable[[int, int], None]] = None,
+            interval: Interval = "1d"
+        ) -> List[Dict[str, Any]]:
+        """
+        Run a backtest of several strategies on already loaded market data at once.
+        Every strategy trades its own portfolio, while the universe, the indicators
+        and the views of every bar are built once and shared, so the market data
+        handed to the strategies must not be modified.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            configs (List[StrategyConfig]): Strategy class and parameters of each backtest.
+            startingCash (float): Initial cash of each backtest.
+            mode (Mode): "linear" walks the data once calling every strategy on each
+            bar, "vectorized" simulates the orders from each strategy's generateSignals.
+            progress (Callable[[int, int], None]): Called with the bars done and the
+            total bars as the backtests advance.
+            interval (Interval): Interval of the bars, annualizes the metrics.
+
+        Returns:
+            results (List[Dict[str, Any]]): Metrics and portfolio of each backtest, in
+            the order of configs.
+        """
+        if mode not in ("linear", "vectorized"):
+            raise ValueError(f"A batch runs in the linear or vectorized mode, not {mode}")
+        with profileStage("setup"):
+            universe = Universe(completeData)
+            indicators = IndicatorSet()
+            strategies = []
+            portfolios = []
+            for strategyClass, strategyParams in configs:
+                strategy = strategyClass(**strategyParams)
+                indicators.add(strategy.getIndicators())
+                strategy.indicators = indicators
+                strategies.append(strategy)
+                portfolios.append(Portfolio(startingCash, universe))
+            for strategy in strategies:
+                strategy.onStart()
+
+        with profileStage("mainLoop"):
+            if mode == "linear":
+                Engine._runLinearBatch(completeData, strategies, portfolios, indicators, progress)
+            else:
+                for strategy, portfolio in zip(strategies, portfolios):
+                    Engine._runVectorized(completeData, strategy, portfolio)
+                if progress:
+                    progress(1, 1)
+        profileRows("mainLoop", len(completeData) * len(configs))
+
+        results = []
+        for portfolio in portfolios:
+            with profileStage("liquidate"):
+                portfolio._liquidate(completeData)
+            with profileStage("metrics"):
+                metrics = Metrics(completeData, portfolio, TRADING_DAYS_PER_YEAR * BARS_PER_DAY[interval])
+                result = dict(metrics.getMetrics())
+            result["portfolio"] = portfolio
+            results.append(result)
+        return results
+
+    def runStream(
+            symbols: List[str],
+            startDate: datetime,
+            endDate: datetime,
+            strategyClass: Type[Strategy],
+            strategyParams: Dict[str, Any],
+            startingCash: float,
+            interval: Interval = "1d",
+            chunkRows: int = DEFAULT_CHUNK_ROWS,
+            progress: Optional[Callable[[int, int], None]] = None
+        ) -> Dict[str, Any]:
+        """
+        Run backtest on bars streamed from storage in time ordered chunks, walking
+        every chunk like the "linear" mode. The strategy, its indicators and the
+        portfolio carry over from chunk to chunk, and the last lookback bars of a chunk
+        are kept for the windows of the next. Only the chunk, its windows and the
+        per bar equity are held in memory, not the whole range.
+
+        Parameters:
+            symbols (List[str]): List of symbols to backtest on.
+            startDate (datetime): Start date for the data range, inclusive.
+            endDate (datetime): End date for the data range, inclusive, the whole day
+            for intraday bars unless it has a time.
+            strategyClass (Strategy): Strategy class to use in the backtest, must set a lookback.
+            strategyParams (Dict[str, Any]): Dictionary for parameters of strategy class.
+            startingCash (float): Initial cash to start backtest with.
+            interval (Interval): Interval of the bars.
+            chunkRows (int): Rows read from storage per chunk.
+            progress (Callable[[int, int], None]): Called after every chunk with the
+            nanoseconds of the range done and the nanoseconds of the whole range.
+
+        Returns:
+            results (Dict[str, Any]): Contains metrics of backtest and portfolio after
+            backtest run, whose history only holds the total value per bar.
+        """
+        with profileStage("setup"):
+            strategy = strategyClass(**strategyParams)
+            if strategy.lookback is None:
+                raise ValueError(f"{strategyClass.__name__} needs a lookback to be streamed")
+            strategy.indicators = IndicatorSet(strategy.getIndicators())
+            strategy.onStart()
+        startTime = pd.Timestamp(startDate)
+        endTime = getEndTime(endDate, interval)
+        symbols = list(dict.fromkeys(symbols))
+
+        universe = None
+        portfolio = None
+        history = None
+        windowData = None
+        with profileStage("mainLoop"):
+            for chunk in Engine.streamData(symbols, startTime, endTime, interval, chunkRows):
+                if universe is None:
+                    universe = Universe(chunk, symbols)
+                    portfolio = Portfolio(startingCash, universe, EquityLedger(len(universe.dates)))
+                else:
+                    universe.advance(chunk)
+                windowData = chunk if history is None else pd.concat([history, chunk])
+                starts, _ = Engine._getBarOffsets(windowData)
+                Engine._runLinear(windowData, strategy, portfolio, firstBar=len(starts) - len(universe.dates))
+                # The first windows of the next chunk reach back lookback - 1 bars
+                keep = strategy.lookback - 1
+                history = windowData.iloc[starts[max(0, len(starts) - keep)]:] if keep > 0 else None
+                profileRows("mainLoop", len(chunk))
+                if progress:
+                    progress((universe.dates[-1] - startTime).value, max((endTime - startTime).value, 1))
+        if portfolio is None:
+            raise ValueError("No market data for the symbols within the date range")
+
+        with profileStage("liquidate"):
+            portfolio._liquidate(windowData)
+
+        with profileStage("metrics"):
+            metrics = Metrics(windowData, portfolio, TRADING_DAYS_PER_YEAR * BARS_PER_DAY[interval])
+            results = dict(metrics.getMetrics())
+        results["portfolio"] = portfolio
         return results
+
+    def streamData(
+            symbols: List[str],
+            startTime: datetime,
+            endTime: datetime,
+            interval: Interval = "1d",
+            chunkRows: int = DEFAULT_CHUNK_ROWS
+        ) -> Iterator[DataFrame]:
+        """
+        Streams market data from storage in time ordered chunks. Daily data is checked
+        for missing days one symbol at a time first, intraday bars are read as stored.
+
+        Parameters:
+            symbols (List[str]): List of symbols to stream.
+            startTime (datetime): Start of the time range, inclusive.
+            endTime (datetime): End of the time range, inclusive.
+            interval (Interval): Interval of the bars.
+            chunkRows (int): Rows read from storage per chunk.
+
+        Returns:
+            chunks (Iterator[DataFrame]): Consecutive chunks with a sorted (Date, Symbol)
+            MultiIndex, each holding every symbol's bar of the dates it covers.
+        """
+        database = openDatabase()
+        chunks = None
+        try:
+            if interval == "1d":
+                for symbol in symbols:
+                    with profileStage("validation"):
+                        Validator.getDataRange(symbol, startTime, endTime, database)
+            chunks = database.iterBars(symbols, interval, startTime, endTime, chunkRows)
+            while True:
+                with profileStage("dbRead"):
+                    chunk = next(chunks, None)
+                if chunk is None:
+                    break
+                profileRows("dbRead", len(chunk))
+                yield chunk
+        finally:
+            if chunks is not None:
+                chunks.close()
+            database.close()
+
+    def _getBarOffsets(completeData: DataFrame) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Finds the row offsets of each date's block in the sorted market data.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+
+        Returns:
+            offsets (Tuple[ndarray, ndarray]): Start and end (exclusive) row of every bar.
+        """
+        dates = completeData.index.get_level_values("Date").values
+        if len(dates) == 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        boundaries = np.flatnonzero(dates[1:] != dates[:-1]) + 1
+        starts = np.concatenate(([0], boundaries))
+        ends = np.concatenate((boundaries, [len(dates)]))
+        return starts, ends
+
+    def _runLinear(
+            completeData: DataFrame,
+            strategy: Strategy,
+            portfolio: Portfolio,
+            progress: Optional[Callable[[int, int], None]] = None,
+            firstBar: int = 0
+        ):
+        """
+        Walks the pre-sorted market data once. Each bar is handed out as positional
+        views, so the cost of a step does not grow with the length of the history.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            strategy (Strategy): Strategy to run, its lookback bounds the window it sees.
+            portfolio (Portfolio): Portfolio the trades are executed on.
+            progress (Callable[[int, int], None]): Called with the bars done and the
+            total bars after every bar.
+            firstBar (int): First bar to run, earlier bars are history already run
+            that only fills the windows.
+        """
+        starts, ends = Engine._getBarOffsets(completeData)
+        lookback = strategy.lookback
+        updateValue = profileCalls("portfolio.updateValue", portfolio._updateValue)
+        updateIndicators = profileCalls("indicators.update", strategy.indicators.update)
+        strategyNext = profileCalls("strategy.next", strategy.next)
+        executeTrades = profileCalls("portfolio.executeTrades", portfolio._executeTrades)
+        for bar in range(firstBar, len(starts)):
+            end = ends[bar]
+            barData = completeData.iloc[starts[bar]:end]
+            if lookback is None:
+                windowData = completeData.iloc[:end]
+            else:
+                windowData = completeData.iloc[starts[max(0, bar - lookback + 1)]:end]
+
+            updateValue(barData)
+            updateIndicators(barData)
+            trades = strategyNext(windowData, portfolio)
+            executeTrades(barData, trades)
+            if progress:
+                progress(bar + 1, len(starts))
+
+    def _runLinearBatch(
+            completeData: DataFrame,
+            strategies: List[Strategy],
+            portfolios: List[Portfolio],
+            indicators: IndicatorSet,
+            progress: Optional[Callable[[int, int], None]] = None
+        ):
+        """
+        Walks the pre-sorted market data once for several strategies like _runLinear.
+        Each bar is sliced once, with one window per distinct lookback, and the shared
+        indicators are advanced once before the strategies run in order.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            strategies (List[Strategy]): Strategies to run, each reading the shared indicators.
+            portfolios (List[Portfolio]): Portfolio of each strategy.
+            indicators (IndicatorSet): Indicators of every strategy.
+            progress (Callable[[int, int], None]): Called with the bars done and the
+            total bars after every bar.
+        """
+        starts, ends = Engine._getBarOffsets(completeData)
+        lookbacks = set(strategy.lookback for strategy in strategies)
+        updateIndicators = profileCalls("indicators.update", indicators.update)
+        runs = [
+            (
+                strategy.lookback,
+                profileCalls("portfolio.updateValue", portfolio._updateValue),
+                profileCalls("strategy.next", strategy.next),
+                profileCalls("portfolio.executeTrades", portfolio._executeTrades),
+                portfolio
+            )
+            for strategy, portfolio in zip(strategies, portfolios)
+        ]
+        for bar in range(len(starts)):
+            end = ends[bar]
+            barData = completeData.iloc[starts[bar]:end]
+            windows = {
+                lookback: completeData.iloc[:end] if lookback is None else completeData.iloc[starts[max(0, bar - lookback + 1)]:end]
+                for lookback in lookbacks
+            }
+
+            updateIndicators(barData)
+            for lookback, updateValue, strategyNext, executeTrades, portfolio in runs:
+                updateValue(barData)
+                trades = strategyNext(windows[lookback], portfolio)
+                executeTrades(barData, trades)
+            if progress:
+                progress(bar + 1, len(starts))
+
+    def _runVectorized(completeData: DataFrame, strategy: Strategy, portfolio: Portfolio):
+        """
+        Generates all orders of the strategy in one pass and simulates their fills
+        without calling the strategy per bar.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            strategy (Strategy): Strategy to run, must implement generateSignals.
+            portfolio (Portfolio): Portfolio the orders are executed on.
+        """
+        with profileStage("strategy.generateSignals"):
+            orders = strategy.generateSignals(completeData)
+        if orders is None:
+            raise ValueError(f"{type(strategy).__name__} does not implement generateSignals")
+        with profileStage("portfolio.executeOrders"):
+            portfolio._executeOrders(orders)
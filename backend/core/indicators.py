@@ -0,0 +1,589 @@
+from abc import ABC, abstractmethod
+from collections import OrderedDict, deque
+import hashlib
+import math
+import threading
+from typing import Dict, Iterable, List, Tuple
+
+import numpy as np
+from pandas import DataFrame, Series
+import pandas as pd
+
+
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+
+class Indicator(ABC):
+    # Columns of the market data the indicator reads, in the order update() takes them
+    inputs: Tuple[str, ...] = ("Close",)
+
+    def __init__(self, period: int, column: str = "Close"):
+        """
+        Initializes an indicator over a window of bars.
+
+        Parameters:
+            period (int): Number of bars the indicator looks back over.
+            column (str): Column of the market data the indicator reads.
+        """
+        if period < 1:
+            raise ValueError("period must be at least 1")
+        self.period = period
+        self.column = column
+        if type(self).inputs == ("Close",):
+            self.inputs = (column,)
+        self.reset()
+
+    @property
+    def key(self) -> Tuple:
+        """
+        Identifies the indicator by its type and parameters, indicators with equal
+        keys compute the same values.
+
+        Returns:
+            key (Tuple): Name of the indicator class followed by its parameters.
+        """
+        return (type(self).__name__, self.period, self.inputs)
+
+    def copy(self) -> "Indicator":
+        """
+        Creates an indicator with the same parameters and a fresh state.
+
+        Returns:
+            indicator (Indicator): The new indicator.
+        """
+        return type(self)(self.period, self.column)
+
+    @abstractmethod
+    def reset(self):
+        """
+        Clears the incremental state.
+        """
+        pass
+
+    @abstractmethod
+    def update(self, *values: float) -> float:
+        """
+        Advances the incremental state by one bar in O(1).
+
+        Parameters:
+            values (float): Values of the bar for each column in inputs.
+
+        Returns:
+            value (float): The indicator on this bar, NaN until enough bars were seen.
+        """
+        pass
+
+    @abstractmethod
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the indicator for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The indicator per bar, NaN until enough bars were seen.
+        """
+        pass
+
+class SMA(Indicator):
+    """
+    Simple moving average, the mean of the last period values, kept as a running
+    sum of a window of values.
+    """
+
+    def reset(self):
+        """
+        Clears the window and its sum.
+        """
+        self._window = deque()
+        self._sum = 0.0
+
+    def update(self, value: float) -> float:
+        """
+        Adds a bar to the window and drops the value leaving it.
+
+        Parameters:
+            value (float): Value of the bar.
+
+        Returns:
+            value (float): The average of the last period values, NaN until period bars were seen.
+        """
+        self._window.append(value)
+        self._sum += value
+        if len(self._window) > self.period:
+            self._sum -= self._window.popleft()
+        if len(self._window) < self.period:
+            return math.nan
+        return self._sum / self.period
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the average for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The average per bar, NaN until period bars were seen.
+        """
+        return data[self.column].rolling(self.period).mean()
+
+class EMA(Indicator):
+    """
+    Exponential moving average with the span convention, alpha = 2 / (period + 1):
+    average = (1 - alpha) * previous average + alpha * value, seeded with the
+    first value and unadjusted, like pandas' ewm(span=period, adjust=False).
+    """
+
+    def reset(self):
+        """
+        Clears the average and the number of bars seen.
+        """
+        self._average = math.nan
+        self._count = 0
+
+    def update(self, value: float) -> float:
+        """
+        Moves the average towards a bar's value.
+
+        Parameters:
+            value (float): Value of the bar.
+
+        Returns:
+            value (float): The average, NaN until period bars were seen.
+        """
+        alpha = 2 / (self.period + 1)
+        self._count += 1
+        self._average = value if self._count == 1 else (1 - alpha) * self._average + alpha * value
+        return self._average if self._count >= self.period else math.nan
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the average for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The average per bar, NaN until period bars were seen.
+        """
+        return data[self.column].ewm(span=self.period, adjust=False, min_periods=self.period).mean()
+
+class RollingStd(Indicator):
+    """
+    Sample standard deviation of the last period values, dividing by period - 1
+    like pandas' rolling std, kept with Welford's running mean and sum of squares.
+    """
+
+    def reset(self):
+        """
+        Clears the window, its mean and its sum of squares.
+        """
+        self._window = deque()
+        self._mean = 0.0
+        self._squares = 0.0 # sum of squared differences from the mean
+
+    def update(self, value: float) -> float:
+        """
+        Adds a bar to the window and removes the value leaving it.
+
+        Parameters:
+            value (float): Value of the bar.
+
+        Returns:
+            value (float): The standard deviation, NaN until period bars were seen
+            and always NaN for a period of 1.
+        """
+        # Welford's update, undone for the value leaving the window
+        self._window.append(value)
+        delta = value - self._mean
+        self._mean += delta / len(self._window)
+        self._squares += delta * (value - self._mean)
+        if len(self._window) > self.period:
+            removed = self._window.popleft()
+            delta = removed - self._mean
+            self._mean -= delta / len(self._window)
+            self._squares -= delta * (removed - self._mean)
+        if len(self._window) < self.period or self.period < 2:
+            return math.nan
+        return math.sqrt(max(self._squares, 0.0) / (self.period - 1))
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the standard deviation for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The standard deviation per bar, NaN until period bars were seen.
+        """
+        return data[self.column].rolling(self.period).std()
+
+class RollingMin(Indicator):
+    """
+    Lowest of the last period values, kept in a monotonic queue of the values that
+    can still become the lowest, so every value is added and removed once.
+    """
+
+    def reset(self):
+        """
+        Clears the queue and the number of bars seen.
+        """
+        self._bar = 0
+        self._candidates = deque() # (bar, value) with increasing values
+
+    def update(self, value: float) -> float:
+        """
+        Adds a bar, dropping the candidates it outlasts with higher or equal values and the
+        candidate leaving the window.
+
+        Parameters:
+            value (float): Value of the bar.
+
+        Returns:
+            value (float): The lowest of the last period values, NaN until period bars were seen.
+        """
+        while self._candidates and self._candidates[-1][1] >= value:
+            self._candidates.pop()
+        self._candidates.append((self._bar, value))
+        if self._candidates[0][0] <= self._bar - self.period:
+            self._candidates.popleft()
+        self._bar += 1
+        return self._candidates[0][1] if self._bar >= self.period else math.nan
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the lowest value for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The lowest value per bar, NaN until period bars were seen.
+        """
+        return data[self.column].rolling(self.period).min()
+
+class RollingMax(Indicator):
+    """
+    Highest of the last period values, kept in a monotonic queue of the values that
+    can still become the highest, so every value is added and removed once.
+    """
+
+    def reset(self):
+        """
+        Clears the queue and the number of bars seen.
+        """
+        self._bar = 0
+        self._candidates = deque() # (bar, value) with decreasing values
+
+    def update(self, value: float) -> float:
+        """
+        Adds a bar, dropping the candidates it outlasts with lower or equal values and the
+        candidate leaving the window.
+
+        Parameters:
+            value (float): Value of the bar.
+
+        Returns:
+            value (float): The highest of the last period values, NaN until period bars were seen.
+        """
+        while self._candidates and self._candidates[-1][1] <= value:
+            self._candidates.pop()
+        self._candidates.append((self._bar, value))
+        if self._candidates[0][0] <= self._bar - self.period:
+            self._candidates.popleft()
+        self._bar += 1
+        return self._candidates[0][1] if self._bar >= self.period else math.nan
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the highest value for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The highest value per bar, NaN until period bars were seen.
+        """
+        return data[self.column].rolling(self.period).max()
+
+class RSI(Indicator):
+    """
+    Relative strength index, 100 - 100 / (1 + average gain / average loss) of the
+    changes between bars. The gains and losses use Wilder's smoothing, an
+    exponential average with alpha = 1 / period seeded with the first change. It is
+    100 without losses and 50 without any change.
+    """
+
+    def reset(self):
+        """
+        Clears the previous value, the average gain and loss and the number of changes seen.
+        """
+        self._previous = math.nan
+        self._gain = 0.0
+        self._loss = 0.0
+        self._count = 0
+
+    def update(self, value: float) -> float:
+        """
+        Smooths the change from the previous bar into the average gain and loss.
+
+        Parameters:
+            value (float): Value of the bar.
+
+        Returns:
+            value (float): The index between 0 and 100, NaN until period changes
+            were seen, which takes period + 1 bars.
+        """
+        previous = self._previous
+        self._previous = value
+        if math.isnan(previous):
+            return math.nan
+        # Wilder's smoothing of the gains and losses
+        alpha = 1 / self.period
+        change = value - previous
+        gain = max(change, 0.0)
+        loss = max(-change, 0.0)
+        self._count += 1
+        if self._count == 1:
+            self._gain, self._loss = gain, loss
+        else:
+            self._gain = (1 - alpha) * self._gain + alpha * gain
+            self._loss = (1 - alpha) * self._loss + alpha * loss
+        if self._count < self.period:
+            return math.nan
+        if self._loss == 0:
+            return 100.0 if self._gain > 0 else 50.0
+        return 100 - 100 / (1 + self._gain / self._loss)
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the index for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The index per bar, NaN until period changes were seen.
+        """
+        change = data[self.column].diff()
+        smoothing = {"alpha": 1 / self.period, "adjust": False, "min_periods": self.period}
+        gain = change.clip(lower=0).ewm(**smoothing).mean()
+        loss = (-change).clip(lower=0).ewm(**smoothing).mean()
+        with np.errstate(divide="ignore", invalid="ignore"):
+            rsi = 100 - 100 / (1 + gain / loss)
+        rsi = rsi.mask(loss == 0, np.where(gain > 0, 100.0, 50.0))
+        return rsi.where(gain.notna())
+
+class ATR(Indicator):
+    """
+    Average true range. The true range of a bar is the largest of high - low and
+    the distances of the high and the low from the previous close, high - low on
+    the first bar. It is averaged with Wilder's smoothing, alpha = 1 / period,
+    seeded with the first true range.
+    """
+
+    inputs = ("High", "Low", "Close")
+
+    def reset(self):
+        """
+        Clears the previous close, the average and the number of bars seen.
+        """
+        self._previousClose = math.nan
+        self._average = math.nan
+        self._count = 0
+
+    def update(self, high: float, low: float, close: float) -> float:
+        """
+        Smooths the true range of a bar into the average.
+
+        Parameters:
+            high (float): High of the bar.
+            low (float): Low of the bar.
+            close (float): Close of the bar.
+
+        Returns:
+            value (float): The average true range, NaN until period bars were seen.
+        """
+        previousClose = self._previousClose
+        self._previousClose = close
+        if math.isnan(previousClose):
+            trueRange = high - low
+        else:
+            trueRange = max(high - low, abs(high - previousClose), abs(low - previousClose))
+        # Wilder's smoothing of the true range
+        alpha = 1 / self.period
+        self._count += 1
+        self._average = trueRange if self._count == 1 else (1 - alpha) * self._average + alpha * trueRange
+        return self._average if self._count >= self.period else math.nan
+
+    def compute(self, data: DataFrame) -> Series:
+        """
+        Computes the average true range for every bar of one symbol at once.
+
+        Parameters:
+            data (DataFrame): Market data of a single symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The average true range per bar, NaN until period bars were seen.
+        """
+        previousClose = data["Close"].shift(1)
+        trueRange = pd.concat(
+            [
+                data["High"] - data["Low"],
+                (data["High"] - previousClose).abs(),
+                (data["Low"] - previousClose).abs()
+            ],
+            axis=1
+        ).max(axis=1)
+        return trueRange.ewm(alpha=1 / self.period, adjust=False, min_periods=self.period).mean()
+
+class IndicatorCache:
+    def __init__(self, maxBytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initializes an empty least recently used cache of batch computed indicators,
+        shared by every backtest in the process.
+
+        Parameters:
+            maxBytes (int): Memory budget of the cached values in bytes.
+        """
+        self._maxBytes = maxBytes
+        self._entries: "OrderedDict[Tuple, Series]" = OrderedDict()
+        self._bytes = 0
+        self._lock = threading.Lock()
+
+    def compute(self, indicator: Indicator, symbol: str, data: DataFrame) -> Series:
+        """
+        Computes an indicator for one symbol, or returns it from the cache if the same
+        indicator was computed on the same data before.
+
+        Parameters:
+            indicator (Indicator): The indicator to compute.
+            symbol (str): The asset symbol of the data.
+            data (DataFrame): Market data of the symbol, sorted chronologically.
+
+        Returns:
+            values (Series): The indicator per bar. It is shared with the cache and
+            must not be modified.
+        """
+        fingerprint = hashlib.blake2b(digest_size=16)
+        fingerprint.update(np.ascontiguousarray(data.index.get_level_values("Date").values).tobytes())
+        for column in indicator.inputs:
+            fingerprint.update(np.ascontiguousarray(data[column].to_numpy(dtype=np.float64)).tobytes())
+        key = (indicator.key, symbol, fingerprint.hexdigest())
+
+        with self._lock:
+            values = self._entries.get(key)
+            if values is not None:
+                self._entries.move_to_end(key)
+                return values
+        values = indicator.compute(data)
+        with self._lock:
+            if key not in self._entries:
+                self._entries[key] = values
+                self._bytes += values.memory_usage(index=True)
+                # Evict the least recently used values until the budget is met
+                while self._bytes > self._maxBytes and len(self._entries) > 1:
+                    _, evicted = self._entries.popitem(last=False)
+                    self._bytes -= evicted.memory_usage(index=True)
+        return values
+
+    def clear(self):
+        """
+        Drops every cached indicator.
+        """
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+# Cache shared by every backtest in the process
+indicatorCache = IndicatorCache()
+
+class IndicatorSet:
+    def __init__(self, indicators: Iterable[Indicator] = ()):
+        """
+        Initializes the indicators of a backtest. Indicators with equal keys are
+        computed once per symbol, however many strategies declare them.
+
+        Parameters:
+            indicators (Iterable[Indicator]): The declared indicators.
+        """
+        self._indicators: Dict[Tuple, Indicator] = {}
+        self._states: Dict[Tuple, Indicator] = {} # {(key, symbol): indicator}
+        self._values: Dict[Tuple, float] = {} # {(key, symbol): latest value}
+        self.add(indicators)
+
+    def add(self, indicators: Iterable[Indicator]):
+        """
+        Declares more indicators, ones already declared are ignored.
+
+        Parameters:
+            indicators (Iterable[Indicator]): The indicators to declare.
+        """
+        for indicator in indicators:
+            self._indicators.setdefault(indicator.key, indicator)
+
+    def getIndicators(self) -> List[Indicator]:
+        """
+        Retrieves one indicator per distinct key.
+
+        Returns:
+            indicators (List[Indicator]): The declared indicators.
+        """
+        return list(self._indicators.values())
+
+    def update(self, barData: DataFrame):
+        """
+        Advances every indicator of every symbol in a bar by one step.
+
+        Parameters:
+            barData (DataFrame): Market data of a single date, indexed by (Date, Symbol).
+        """
+        if not self._indicators:
+            return
+        symbols = barData.index.get_level_values("Symbol")
+        columns = {}
+        for key, indicator in self._indicators.items():
+            for column in indicator.inputs:
+                if column not in columns:
+                    columns[column] = barData[column].to_numpy(dtype=np.float64).tolist()
+            for row, symbol in enumerate(symbols):
+                state = self._states.get((key, symbol))
+                if state is None:
+                    state = self._states[(key, symbol)] = indicator.copy()
+                self._values[(key, symbol)] = state.update(*(columns[column][row] for column in indicator.inputs))
+
+    def get(self, indicator: Indicator, symbol: str) -> float:
+        """
+        Retrieves the latest value of an indicator for a symbol in an event driven run.
+
+        Parameters:
+            indicator (Indicator): A declared indicator or one with the same key.
+            symbol (str): The asset symbol.
+
+        Returns:
+            value (float): The indicator on the symbol's latest bar, NaN if it hasn't
+            had enough bars yet.
+        """
+        return self._values.get((indicator.key, symbol), math.nan)
+
+    def compute(self, indicator: Indicator, data: DataFrame) -> Series:
+        """
+        Computes an indicator for every bar of every symbol at once, reusing values
+        computed on the same data anywhere in the process.
+
+        Parameters:
+            indicator (Indicator): The indicator to compute.
+            data (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+
+        Returns:
+            values (Series): The indicator per row of data, with the same index.
+        """
+        parts = []
+        for symbol, symbolData in data.groupby(level="Symbol", sort=False):
+            values = indicatorCache.compute(indicator, symbol, symbolData)
+            parts.append(pd.Series(values.to_numpy(), index=symbolData.index))
+        if not parts:
+            return pd.Series(np.empty(0), index=data.index)
+        return pd.concat(parts).reindex(data.index)
@@ -0,0 +1,194 @@
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import os
+import threading
+import time
+from typing import Any, Callable, Dict, Literal, Optional, Type
+import uuid
+
+
+JobStatus = Literal["queued", "running", "done", "failed", "cancelled"]
+
+class JobCancelled(Exception):
+    """
+    Raised inside a running job once it has been cancelled.
+    """
+    pass
+
+class Job:
+    def __init__(self, jobId: str):
+        """
+        Initializes a Job object, representing a unit of work submitted to a JobQueue.
+
+        Parameters:
+            jobId (str): Unique id of the job.
+        """
+        self.jobId = jobId
+        self.status: JobStatus = "queued"
+        self.progress = 0.0
+        self.result = None
+        self.error = None
+        self.errorType: Optional[Type[Exception]] = None # class of the exception a failed job raised
+        self.createdAt = time.time()
+        self.finishedAt = None
+        self._cancelled = threading.Event()
+        self._future = None
+
+    async def wait(self):
+        """
+        Waits without blocking the event loop until the job is done, failed or cancelled.
+        Its outcome is read from status, result, error and errorType, wait itself
+        doesn't raise it.
+        """
+        await asyncio.wait([asyncio.wrap_future(self._future)])
+
+    def _reportProgress(self, done: int, total: int):
+        """
+        Progress callback handed to the job's function, which stops the job by
+        raising JobCancelled once it has been cancelled.
+
+        Parameters:
+            done (int): Units of work done.
+            total (int): Total units of work.
+        """
+        if self._cancelled.is_set():
+            raise JobCancelled()
+        if total > 0:
+            self.progress = done / total
+
+class JobQueue:
+    def __init__(self, workers: Optional[int] = None, ttl: float = 3600.0):
+        """
+        Initializes the job queue and its bounded pool of worker threads.
+
+        Parameters:
+            workers (int): Number of jobs run at the same time, defaults to the
+            number of CPUs capped at 4.
+            ttl (float): Seconds a finished job and its result are kept.
+        """
+        self._executor = ThreadPoolExecutor(max_workers=workers or min(4, os.cpu_count() or 1))
+        self._ttl = ttl
+        self._jobs: Dict[str, Job] = {}
+        self._lock = threading.Lock()
+
+    def submit(self, function: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queues a function to run on the pool. It is called with the given arguments
+        and a progress keyword argument, a callback taking (done, total).
+
+        Parameters:
+            function (Callable[..., Any]): The work to run, its return value is
+            stored as the job's result.
+
+        Returns:
+            job (Job): The queued job.
+        """
+        job = Job(uuid.uuid4().hex)
+        with self._lock:
+            self._evict()
+            self._jobs[job.jobId] = job
+        job._future = self._executor.submit(self._run, job, function, args, kwargs)
+        return job
+
+    def get(self, jobId: str) -> Optional[Job]:
+        """
+        Retrieves a job that has not been evicted.
+
+        Parameters:
+            jobId (str): Id of the job.
+
+        Returns:
+            job (Job): The job, None if it doesn't exist or expired.
+        """
+        with self._lock:
+            self._evict()
+            return self._jobs.get(jobId)
+
+    def cancel(self, jobId: str) -> Optional[Job]:
+        """
+        Cancels a job. A queued job never starts, a running job stops at its next
+        progress report.
+
+        Parameters:
+            jobId (str): Id of the job.
+
+        Returns:
+            job (Job): The job, None if it doesn't exist or expired.
+        """
+        job = self.get(jobId)
+        if job is None or job.status in ("done", "failed", "cancelled"):
+            return job
+        job._cancelled.set()
+        if job._future.cancel():
+            self._finish(job, "cancelled")
+        return job
+
+    def remove(self, jobId: str) -> Optional[Job]:
+        """
+        Removes a job before its time to live ends, used once its result was
+        handed over directly.
+
+        Parameters:
+            jobId (str): Id of the job.
+
+        Returns:
+            job (Job): The removed job, None if it doesn't exist or expired.
+        """
+        with self._lock:
+            return self._jobs.pop(jobId, None)
+
+    def shutdown(self):
+        """
+        Cancels queued jobs and waits for running jobs to stop.
+        """
+        with self._lock:
+            jobs = list(self._jobs.values())
+        for job in jobs:
+            job._cancelled.set()
+        self._executor.shutdown(wait=True, cancel_futures=True)
+
+    def _run(self, job: Job, function: Callable[..., Any], args: tuple, kwargs: Dict[str, Any]):
+        """
+        Runs a job's function on a worker thread and records its outcome.
+
+        Parameters:
+            job (Job): The job to run.
+            function (Callable[..., Any]): The work to run.
+            args (tuple): Positional arguments of the function.
+            kwargs (Dict[str, Any]): Keyword arguments of the function.
+        """
+        if job._cancelled.is_set():
+            self._finish(job, "cancelled")
+            return
+        job.status = "running"
+        try:
+            job.result = function(*args, progress=job._reportProgress, **kwargs)
+        except JobCancelled:
+            self._finish(job, "cancelled")
+        except Exception as error:
+            job.error = f"{type(error).__name__}: {error}"
+            job.errorType = type(error)
+            self._finish(job, "failed")
+        else:
+            job.progress = 1.0
+            self._finish(job, "done")
+
+    def _finish(self, job: Job, status: JobStatus):
+        """
+        Marks a job as finished, starting its time to live.
+
+        Parameters:
+            job (Job): The finished job.
+            status (JobStatus): Final status of the job.
+        """
+        job.finishedAt = time.time()
+        job.status = status
+
+    def _evict(self):
+        """
+        Removes finished jobs older than the time to live, must hold the lock.
+        """
+        expiry = time.time() - self._ttl
+        expired = [jobId for jobId, job in self._jobs.items() if job.finishedAt is not None and job.finishedAt < expiry]
+        for jobId in expired:
+            del self._jobs[jobId]
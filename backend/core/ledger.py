@@ -0,0 +1,354 @@
+from datetime import datetime
+from typing import List, Tuple
+
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+
+
+class Ledger:
+    __slots__ = (
+        "_bars",
+        "_dates",
+        "_cash",
+        "_values",
+        "_held",
+        "_invested",
+        "_symbols",
+        "_symbolIds",
+        "_history",
+        "_cashHistory"
+    )
+
+    def __init__(self, bars: int = 0, symbols: int = 0):
+        """
+        Initializes an empty ledger recording the cash and the value of each
+        holding per bar in preallocated arrays indexed by bar and symbol id.
+
+        Parameters:
+            bars (int): Number of bars to preallocate.
+            symbols (int): Number of symbols to preallocate.
+        """
+        self._bars = 0
+        self._dates = np.empty(bars, dtype="datetime64[ns]")
+        self._cash = np.empty(bars, dtype=np.float64)
+        self._values = np.empty((bars, symbols), dtype=np.float64)
+        self._held = np.zeros((bars, symbols), dtype=bool)
+        self._invested = np.zeros(bars, dtype=bool) # any shares held
+        self._symbols = [] # symbol per id, in the order first recorded
+        self._symbolIds = {} # {symbol: id}
+        self._history = None
+        self._cashHistory = None
+
+    def reserve(self, bars: int, symbols: int):
+        """
+        Grows the arrays to hold at least the given number of bars and symbols.
+
+        Parameters:
+            bars (int): Number of bars to make room for.
+            symbols (int): Number of symbols to make room for.
+        """
+        barCapacity, symbolCapacity = self._held.shape
+        if bars <= barCapacity and symbols <= symbolCapacity:
+            return
+        bars = max(bars, barCapacity)
+        symbols = max(symbols, symbolCapacity)
+        used = self._bars
+        usedSymbols = len(self._symbols)
+
+        dates = np.empty(bars, dtype="datetime64[ns]")
+        dates[:used] = self._dates[:used]
+        cash = np.empty(bars, dtype=np.float64)
+        cash[:used] = self._cash[:used]
+        values = np.empty((bars, symbols), dtype=np.float64)
+        values[:used, :usedSymbols] = self._values[:used, :usedSymbols]
+        held = np.zeros((bars, symbols), dtype=bool)
+        held[:used, :usedSymbols] = self._held[:used, :usedSymbols]
+        invested = np.zeros(bars, dtype=bool)
+        invested[:used] = self._invested[:used]
+
+        self._dates = dates
+        self._cash = cash
+        self._values = values
+        self._held = held
+        self._invested = invested
+
+    def addBar(self, date: datetime) -> int:
+        """
+        Starts recording a new bar, or returns the latest bar if it has the same date.
+
+        Parameters:
+            date (datetime): Date of the bar.
+
+        Returns:
+            bar (int): Index of the bar to record into.
+        """
+        date = np.datetime64(date, "ns")
+        if self._bars > 0 and self._dates[self._bars - 1] == date:
+            return self._bars - 1
+        if self._bars == self._held.shape[0]:
+            self.reserve(max(2 * self._bars, 16), self._held.shape[1])
+        bar = self._bars
+        self._dates[bar] = date
+        self._cash[bar] = np.nan
+        self._invested[bar] = False
+        self._bars += 1
+        self._invalidate()
+        return bar
+
+    def getSymbolId(self, symbol: str) -> int:
+        """
+        Retrieves the id of a symbol, assigning the next id on first use.
+
+        Parameters:
+            symbol (str): The asset symbol.
+
+        Returns:
+            symbolId (int): Column of the symbol in the value arrays.
+        """
+        symbolId = self._symbolIds.get(symbol)
+        if symbolId is None:
+            symbolId = len(self._symbols)
+            if symbolId == self._held.shape[1]:
+                self.reserve(self._held.shape[0], max(2 * symbolId, 8))
+            self._symbolIds[symbol] = symbolId
+            self._symbols.append(symbol)
+        return symbolId
+
+    def recordCash(self, bar: int, cash: float):
+        """
+        Records the cash balance of a bar.
+
+        Parameters:
+            bar (int): Index of the bar.
+            cash (float): Cash balance.
+        """
+        self._cash[bar] = cash
+        self._cashHistory = None
+
+    def recordInvested(self, bar: int, invested: bool):
+        """
+        Records whether any shares were held on a bar. Symbols sold out stay in the
+        value history at 0, so this isn't derived from it.
+
+        Parameters:
+            bar (int): Index of the bar.
+            invested (bool): Whether the share count of any symbol was non-zero.
+        """
+        self._invested[bar] = invested
+
+    def recordValue(self, bar: int, symbol: str, value: float):
+        """
+        Records the market value of a holding on a bar.
+
+        Parameters:
+            bar (int): Index of the bar.
+            symbol (str): The asset symbol held.
+            value (float): Market value of the holding.
+        """
+        symbolId = self.getSymbolId(symbol)
+        self._values[bar, symbolId] = value
+        self._held[bar, symbolId] = True
+        self._history = None
+
+    def recordValues(self, bar: int, symbols: List[str], values: np.ndarray):
+        """
+        Records the market value of several holdings on a bar at once.
+
+        Parameters:
+            bar (int): Index of the bar.
+            symbols (List[str]): The asset symbols held.
+            values (ndarray): Market value of each holding.
+        """
+        symbolIds = [self.getSymbolId(symbol) for symbol in symbols]
+        self._values[bar, symbolIds] = values
+        self._held[bar, symbolIds] = True
+        self._history = None
+
+    def recordAll(
+            self,
+            dates: pd.DatetimeIndex,
+            cash: np.ndarray,
+            symbols: List[str],
+            values: np.ndarray,
+            held: np.ndarray,
+            invested: np.ndarray
+        ):
+        """
+        Records a whole backtest at once, replacing anything recorded before.
+
+        Parameters:
+            dates (DatetimeIndex): Date of every bar.
+            cash (ndarray): Cash balance per bar.
+            symbols (List[str]): Symbols held, in the order they were first bought.
+            values (ndarray): Market value per bar and symbol.
+            held (ndarray): Whether each symbol was held on each bar.
+            invested (ndarray): Whether any shares were held on each bar.
+        """
+        self._bars = len(dates)
+        self._dates = dates.values.astype("datetime64[ns]")
+        self._cash = np.asarray(cash, dtype=np.float64)
+        self._values = np.asarray(values, dtype=np.float64)
+        self._held = np.asarray(held, dtype=bool)
+        self._invested = np.asarray(invested, dtype=bool)
+        self._symbols = list(symbols)
+        self._symbolIds = {symbol: symbolId for symbolId, symbol in enumerate(self._symbols)}
+        self._invalidate()
+
+    def getHistory(self) -> DataFrame:
+        """
+        Builds the historical market value of each holding.
+
+        Returns:
+            history (DataFrame): A pandas DataFrame with a (Date, Symbol) MultiIndex
+            and a Value column, ordered by date then by the order symbols were first held.
+        """
+        if self._history is None:
+            symbolCount = len(self._symbols)
+            held = self._held[:self._bars, :symbolCount]
+            bars, symbolIds = np.nonzero(held)
+            index = pd.MultiIndex.from_arrays(
+                [
+                    pd.DatetimeIndex(self._dates[bars]),
+                    pd.Index(self._symbols, dtype=object)[symbolIds]
+                ],
+                names=["Date", "Symbol"]
+            )
+            self._history = pd.DataFrame({"Value": self._values[bars, symbolIds]}, index=index)
+        return self._history
+
+    def getCashHistory(self) -> DataFrame:
+        """
+        Builds the historical cash balance.
+
+        Returns:
+            cashHistory (DataFrame): A pandas DataFrame indexed by Date with a Value column.
+        """
+        if self._cashHistory is None:
+            index = pd.DatetimeIndex(self._dates[:self._bars], name="Date")
+            self._cashHistory = pd.DataFrame({"Value": self._cash[:self._bars].copy()}, index=index)
+        return self._cashHistory
+
+    def getEquityCurve(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Builds the total value of the portfolio per bar without building DataFrames.
+
+        Returns:
+            equityCurve (Tuple[ndarray, ndarray, ndarray]): Date of every bar, cash plus
+            the value of every holding per bar, and whether anything was held per bar.
+        """
+        symbolCount = len(self._symbols)
+        held = self._held[:self._bars, :symbolCount]
+        # Holdings without a price on a bar add nothing, like the DataFrame history sums
+        values = np.where(held, self._values[:self._bars, :symbolCount], 0.0)
+        equity = self._cash[:self._bars] + np.nansum(values, axis=1)
+        return self._dates[:self._bars].copy(), equity, self._invested[:self._bars].copy()
+
+    def _invalidate(self):
+        """
+        Drops the DataFrames built from the arrays after they changed.
+        """
+        self._history = None
+        self._cashHistory = None
+
+class EquityLedger(Ledger):
+    __slots__ = ("_totals",)
+
+    def __init__(self, bars: int = 0):
+        """
+        Initializes an empty ledger recording only the cash and the total value of
+        the holdings per bar, so its size doesn't grow with the number of symbols.
+        Used when streaming bars, where a value per bar and symbol doesn't fit.
+
+        Parameters:
+            bars (int): Number of bars to preallocate.
+        """
+        super().__init__(bars, 0)
+        self._totals = np.zeros(bars, dtype=np.float64)
+
+    def reserve(self, bars: int, symbols: int = 0):
+        """
+        Grows the arrays to hold at least the given number of bars.
+
+        Parameters:
+            bars (int): Number of bars to make room for.
+            symbols (int): Ignored, no value is kept per symbol.
+        """
+        if bars <= len(self._dates):
+            return
+        used = self._bars
+        for name in ("_dates", "_cash", "_totals", "_invested"):
+            array = getattr(self, name)
+            grown = np.zeros(bars, dtype=array.dtype)
+            grown[:used] = array[:used]
+            setattr(self, name, grown)
+        self._held = np.zeros((bars, 0), dtype=bool)
+
+    def recordValue(self, bar: int, symbol: str, value: float):
+        """
+        Adds the market value of a holding to the total of a bar.
+
+        Parameters:
+            bar (int): Index of the bar.
+            symbol (str): The asset symbol held.
+            value (float): Market value of the holding, NaN adds nothing.
+        """
+        if not np.isnan(value):
+            self._totals[bar] += value
+
+    def recordValues(self, bar: int, symbols: List[str], values: np.ndarray):
+        """
+        Adds the market value of several holdings to the total of a bar.
+
+        Parameters:
+            bar (int): Index of the bar.
+            symbols (List[str]): The asset symbols held.
+            values (ndarray): Market value of each holding, NaN adds nothing.
+        """
+        self._totals[bar] += np.nansum(values)
+
+    def recordAll(
+            self,
+            dates: pd.DatetimeIndex,
+            cash: np.ndarray,
+            symbols: List[str],
+            values: np.ndarray,
+            held: np.ndarray,
+            invested: np.ndarray
+        ):
+        """
+        Records a whole backtest at once, replacing anything recorded before.
+
+        Parameters:
+            dates (DatetimeIndex): Date of every bar.
+            cash (ndarray): Cash balance per bar.
+            symbols (List[str]): Symbols held, in the order they were first bought.
+            values (ndarray): Market value per bar and symbol.
+            held (ndarray): Whether each symbol was held on each bar.
+            invested (ndarray): Whether any shares were held on each bar.
+        """
+        held = np.asarray(held, dtype=bool)
+        self._bars = len(dates)
+        self._dates = dates.values.astype("datetime64[ns]")
+        self._cash = np.asarray(cash, dtype=np.float64)
+        self._totals = np.nansum(np.where(held, values, 0.0), axis=1)
+        self._invested = np.asarray(invested, dtype=bool)
+        self._held = np.zeros((self._bars, 0), dtype=bool)
+        self._invalidate()
+
+    def getHistory(self) -> DataFrame:
+        """
+        Not available, the value of each holding isn't kept.
+        """
+        raise ValueError("The value of each holding isn't kept by an EquityLedger")
+
+    def getEquityCurve(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Builds the total value of the portfolio per bar.
+
+        Returns:
+            equityCurve (Tuple[ndarray, ndarray, ndarray]): Date of every bar, cash plus
+            the value of every holding per bar, and whether anything was held per bar.
+        """
+        bars = self._bars
+        return self._dates[:bars].copy(), self._cash[:bars] + self._totals[:bars], self._invested[:bars].copy()
@@ -1,20 +1,272 @@
+from typing import Dict, Optional, Tuple
+
+import numpy as np
 from pandas import DataFrame
-import pandas as pd
 
+from core.blotter import Blotter
 from core.portfolio import Portfolio
 
 
+METRICS = [
+    "profitLoss",
+    "annualizedReturn",
+    "maxDrawdown",
+    "winProbability",
+    "sharpeRatio",
+    "sortinoRatio",
+    "cagr",
+    "volatility",
+    "exposure",
+    "turnover",
+    "averageHoldingPeriod"
+]
+TRADING_DAYS_PER_YEAR = 252
+NANOSECONDS_PER_DAY = 24 * 60 * 60 * 10**9
+
+def getTradeArrays(trades: Blotter) -> Dict[str, np.ndarray]:
+    """
+    Reads the columns of the executed trades, in execution order.
+
+    Parameters:
+        trades (Blotter): Executed trades.
+
+    Returns:
+        arrays (Dict[str, ndarray]): "symbol" as integer ids, "buy" as booleans,
+        "shares" and "price" as floats and "time" as datetime64[ns].
+    """
+    arrays = trades.getArrays()
+    arrays["shares"] = arrays["shares"].astype(np.float64)
+    return arrays
+
+def matchLots(trades: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Matches the shares of every sell to the buys they close, first in first out.
+
+    Buys of each symbol are laid end to end on one axis of shares, symbol after
+    symbol, and so are the sells. Cutting the axis at every buy and sell boundary
+    gives pieces that each belong to exactly one buy and at most one sell.
+
+    Parameters:
+        trades (Dict[str, ndarray]): Trade arrays as returned by getTradeArrays.
+
+    Returns:
+        lots (Tuple[ndarray, ndarray, ndarray]): Trade index of the buy, trade index
+        of the sell and number of shares of every matched piece.
+    """
+    empty = np.empty(0, dtype=np.int64)
+    symbols = trades["symbol"]
+    isBuy = trades["buy"]
+    if not isBuy.any() or isBuy.all():
+        return empty, empty, np.empty(0)
+    order = np.argsort(symbols, kind="stable")
+    buys = order[isBuy[order]]
+    sells = order[~isBuy[order]]
+    buyShares = trades["shares"][buys]
+    sellShares = trades["shares"][sells]
+    symbolCount = symbols.max() + 1
+
+    buyEnds = np.cumsum(buyShares)
+    buyStartOfSymbol = np.concatenate(([0.0], np.cumsum(np.bincount(symbols[buys], buyShares, symbolCount))))
+    sellStartOfSymbol = np.concatenate(([0.0], np.cumsum(np.bincount(symbols[sells], sellShares, symbolCount))))
+    # Sells of a symbol start where its buys start
+    sellEnds = np.cumsum(sellShares) - sellStartOfSymbol[symbols[sells]] + buyStartOfSymbol[symbols[sells]]
+    sellStarts = sellEnds - sellShares
+
+    upper = np.unique(np.concatenate((buyEnds, sellStarts, sellEnds)))
+    lower = np.concatenate(([0.0], upper[:-1]))
+    buyIds = np.searchsorted(buyEnds, upper, side="left")
+    sellIds = np.searchsorted(sellEnds, upper, side="left")
+    valid = (upper > lower) & (buyIds < len(buys)) & (sellIds < len(sells))
+    buyIds = buyIds[valid]
+    sellIds = sellIds[valid]
+    lower = lower[valid]
+    upper = upper[valid]
+    # Pieces past the shares sold of a symbol are still held
+    matched = (sellStarts[sellIds] <= lower) & (symbols[buys[buyIds]] == symbols[sells[sellIds]])
+    return buys[buyIds[matched]], sells[sellIds[matched]], (upper - lower)[matched]
+
+def getAverageCosts(trades: Dict[str, np.ndarray]) -> Tuple[np.ndarray, np.ndarray]:
+    """
+    Calculates the average price of the position every sell closes against, the
+    way Metrics always has. The first buy of a symbol sets the average price, every
+    later buy averages its price in, weighted by its shares against twice the shares
+    held, and sells leave it unchanged.
+
+    The average after a buy is an affine function of the average before it, so the
+    averages are a prefix scan of composed affine maps, computed in log2(n) passes.
+
+    Parameters:
+        trades (Dict[str, ndarray]): Trade arrays as returned by getTradeArrays.
+
+    Returns:
+        sells (ndarray): Trade index of every sell made after a buy of its symbol,
+        sells before any buy aren't closing trades.
+        averagePrices (ndarray): Average price of the position each of those sells closes against.
+    """
+    isBuy = trades["buy"]
+    if not isBuy.any() or isBuy.all():
+        return np.empty(0, dtype=np.int64), np.empty(0)
+    order = np.argsort(trades["symbol"], kind="stable")
+    symbols = trades["symbol"][order]
+    buy = isBuy[order]
+    shares = trades["shares"][order]
+    price = trades["price"][order]
+
+    positions = np.arange(len(order))
+    firstOfSymbol = np.concatenate(([True], symbols[1:] != symbols[:-1]))
+    symbolStarts = np.maximum.accumulate(np.where(firstOfSymbol, positions, 0))
+    buyCounts = np.cumsum(buy)
+    buysBefore = buyCounts - buy - np.concatenate(([0], buyCounts))[symbolStarts]
+    # Sells before the first buy of their symbol don't change the shares held
+    active = buy | (buysBefore > 0)
+    change = np.where(buy, shares, np.where(active, -shares, 0.0))
+    changeSums = np.cumsum(change)
+    held = changeSums - change - np.concatenate(([0.0], changeSums))[symbolStarts]
+
+    # Average after a trade = scale * average before it + offset
+    denominator = np.where(buy, 2 * held + shares, 1.0)
+    scale = np.where(buy, held / denominator, 1.0)
+    offset = np.where(buy, shares * price / denominator, 0.0)
+    firstBuy = buy & (buysBefore == 0)
+    scale[firstBuy] = 0.0
+    offset[firstBuy] = price[firstBuy]
+    step = 1
+    while step < len(order):
+        offset[step:] = scale[step:] * offset[:-step] + offset[step:]
+        scale[step:] = scale[step:] * scale[:-step]
+        step *= 2
+
+    closing = ~buy & active
+    return order[closing], offset[closing]
+
+def getProfitPerSell(trades: Dict[str, np.ndarray], lots: Optional[Tuple[np.ndarray, np.ndarray, np.ndarray]] = None) -> np.ndarray:
+    """
+    Calculates the profit of every sell against the buys it closes.
+
+    Parameters:
+        trades (Dict[str, ndarray]): Trade arrays as returned by getTradeArrays.
+        lots (Tuple[ndarray, ndarray, ndarray]): Lots as returned by matchLots, matched
+        when None.
+
+    Returns:
+        profits (ndarray): Profit of every sell in execution order.
+    """
+    sells = np.flatnonzero(~trades["buy"])
+    buyIds, sellIds, shares = matchLots(trades) if lots is None else lots
+    profits = shares * (trades["price"][sellIds] - trades["price"][buyIds])
+    return np.bincount(np.searchsorted(sells, sellIds), profits, len(sells))
+
+def computeMetrics(
+        dates: np.ndarray,
+        equity: np.ndarray,
+        invested: np.ndarray,
+        trades: Dict[str, np.ndarray],
+        initialCash: float,
+        finalCash: float,
+        barsPerYear: float = TRADING_DAYS_PER_YEAR
+    ) -> Dict[str, float]:
+    """
+    Calculates every metric of a backtest from its equity curve and trades in one
+    vectorized pass. The result only depends on the inputs, so equal backtests give
+    bit for bit equal metrics.
+
+    Parameters:
+        dates (ndarray): Date of every bar as datetime64[ns].
+        equity (ndarray): Cash plus the value of every holding per bar.
+        invested (ndarray): Whether anything was held per bar.
+        trades (Dict[str, ndarray]): Trade arrays as returned by getTradeArrays.
+        initialCash (float): Cash the portfolio started with.
+        finalCash (float): Cash after the holdings were liquidated.
+        barsPerYear (float): Bars in a trading year, TRADING_DAYS_PER_YEAR for daily bars.
+
+    Returns:
+        metrics (Dict[str, float]): Every metric in METRICS. Returns are per bar,
+        annualized with barsPerYear, and the holding period is in days.
+    """
+    metrics = dict.fromkeys(METRICS, 0.0)
+    profitLoss = finalCash - initialCash
+    metrics["profitLoss"] = float(profitLoss)
+
+    durationYears = 0.0
+    if len(dates) > 1:
+        durationYears = int((dates[-1] - dates[0]).astype(np.int64) // NANOSECONDS_PER_DAY) / 365.25
+    if durationYears > 0:
+        metrics["annualizedReturn"] = float(pow(1 + profitLoss / initialCash, 1 / durationYears) - 1)
+
+    if len(equity) > 0:
+        rollingPeak = np.maximum.accumulate(equity)
+        positive = rollingPeak > 0
+        if positive.any():
+            metrics["maxDrawdown"] = float(np.max((rollingPeak[positive] - equity[positive]) / rollingPeak[positive]))
+        metrics["exposure"] = float(np.mean(invested))
+
+    if len(equity) > 1:
+        returns = equity[1:] / equity[:-1] - 1
+        meanReturn = np.mean(returns)
+        deviation = np.std(returns, ddof=1) if len(returns) > 1 else 0.0
+        downsideDeviation = np.sqrt(np.mean(np.minimum(returns, 0.0) ** 2))
+        annualizer = np.sqrt(barsPerYear)
+        metrics["volatility"] = float(deviation * annualizer)
+        if deviation > 0:
+            metrics["sharpeRatio"] = float(meanReturn / deviation * annualizer)
+        if downsideDeviation > 0:
+            metrics["sortinoRatio"] = float(meanReturn / downsideDeviation * annualizer)
+        if initialCash > 0:
+            tradingYears = (len(equity) - 1) / barsPerYear
+            metrics["cagr"] = float(pow(finalCash / initialCash, 1 / tradingYears) - 1)
+
+    averageEquity = np.mean(equity) if len(equity) > 0 else 0.0
+    if durationYears > 0 and averageEquity > 0:
+        tradedValue = np.sum(trades["shares"] * trades["price"])
+        # Buying and selling the whole portfolio once is one turnover
+        metrics["turnover"] = float(tradedValue / 2 / averageEquity / durationYears)
+
+    closing, averagePrices = getAverageCosts(trades)
+    if len(closing) > 0:
+        metrics["winProbability"] = float(np.count_nonzero(trades["price"][closing] > averagePrices) / len(closing))
+
+    if not trades["buy"].all():
+        buyIds, sellIds, shares = matchLots(trades)
+        if shares.sum() > 0:
+            heldDays = (trades["time"][sellIds] - trades["time"][buyIds]).astype(np.int64) / NANOSECONDS_PER_DAY
+            metrics["averageHoldingPeriod"] = float(np.sum(shares * heldDays) / np.sum(shares))
+
+    return metrics
+
 class Metrics:
-    def __init__(self, marketData: DataFrame, portfolio: Portfolio):
+    def __init__(self, marketData: DataFrame, portfolio: Portfolio, barsPerYear: float = TRADING_DAYS_PER_YEAR):
         """
         Initializes the metrics calculation object.
 
         Parameters:
             marketData (DataFrame): The complete market data used in the backtest.
             portfolio (Portfolio): The portfolio object after the backtest is complete.
+            barsPerYear (float): Bars in a trading year, TRADING_DAYS_PER_YEAR for daily bars.
         """
         self.marketData = marketData
         self.portfolio = portfolio
+        self.barsPerYear = barsPerYear
+        self._metrics = None
+
+    def getMetrics(self) -> Dict[str, float]:
+        """
+        Calculates every metric of the backtest once.
+
+        Returns:
+            metrics (Dict[str, float]): Every metric in METRICS, see computeMetrics.
+        """
+        if self._metrics is None:
+            dates, equity, invested = self.portfolio.getEquityCurve()
+            self._metrics = computeMetrics(
+                dates,
+                equity,
+                invested,
+                getTradeArrays(self.portfolio.getTrades()),
+                self.portfolio.getInitialCash(),
+                self.portfolio.getCash(),
+                self.barsPerYear
+            )
+        return self._metrics
 
     def getProfitLoss(self):
         """
@@ -23,7 +275,7 @@ class Metrics:
         Returns:
             pnl (float): The total profit or loss in currency units.
         """
-        return self.portfolio.getCash() - self.portfolio.getInitialCash()
+        return self.getMetrics()["profitLoss"]
 
     def getAnnualizedReturn(self):
         """
@@ -32,13 +284,7 @@ class Metrics:
         Returns:
             annualizedReturn (float): The annualized return as a decimal.
         """
-        if self.marketData.empty:
-            return 0.0
-        duration = self.marketData.index.get_level_values("Date")[-1] - self.marketData.index.get_level_values("Date")[0]
-        cumulativeReturn = self.getProfitLoss() / self.portfolio._initialCash
-        durationYears = duration.days / 365.25
-        annualizedReturn = pow((1 + cumulativeReturn), (1 / durationYears)) - 1
-        return annualizedReturn
+        return self.getMetrics()["annualizedReturn"]
 
     def getMaxDrawdown(self):
         """
@@ -47,15 +293,7 @@ class Metrics:
         Returns:
             mdd (float): The maximum drawdown as a positive decimal.
         """
-        accountValue = self.portfolio.getHistory().groupby(level="Date").sum()["Value"]
-        accountValue += self.portfolio.getCashHistory()["Value"]
-        rollingPeak = accountValue.cummax()
-        drawdown = (rollingPeak - accountValue) / rollingPeak.replace(0, None)
-        mdd = drawdown.max()
-        if not pd.notna(mdd):
-            mdd = 0
-        return mdd
-
+        return self.getMetrics()["maxDrawdown"]
 
     def getWinProbability(self):
         """
@@ -64,34 +302,4 @@ class Metrics:
         Returns:
             winRate (float): The win probability as a decimal (e.g., 0.60 for 60%).
         """
-        closed = 0
-        wins = 0
-        positions = pd.DataFrame(columns=["Shares", "Avg Price"])
-        for trade in self.portfolio.getTrades():
-            symbol = trade.symbol
-            if trade.side == "BUY":
-                if symbol not in positions.index:
-                    positions.loc[symbol] = [trade.shares, trade.sharePrice]
-                    continue
-                # Calculate average buy price
-                shares = positions.loc[symbol, "Shares"]
-                avgPrice = positions.loc[symbol, "Avg Price"]
-                positionValue = shares * avgPrice
-                tradeValue = trade.shares * trade.sharePrice
-                
-                totalShares = shares + trade.shares
-                avgPrice = (positionValue + tradeValue) / (shares + totalShares)
-                positions.loc[symbol] = [totalShares, avgPrice]
-
-            elif trade.side == "SELL":
-                if symbol not in positions.index:
-                    continue # Shouldn't happen, but just in case
-                buyPrice = positions.loc[symbol, "Avg Price"]
-                positions.loc[symbol, "Shares"] -= trade.shares
-                # If positive trade, win
-                if trade.sharePrice > buyPrice:
-                    wins += 1
-                closed += 1
-        if closed == 0:
-            return 0
-        return wins / closed
+        return self.getMetrics()["winProbability"]
@@ -1,27 +1,38 @@
-from typing import Dict, List
+from typing import Dict, List, Optional, Tuple
 
+import numpy as np
 from pandas import DataFrame
 import pandas as pd
 
-from core.trade import Trade
+from core.blotter import Blotter
+from core.ledger import Ledger
 from core.tradeRequest import TradeRequest
+from core.universe import Universe
 
 
+# Bars with fewer trade requests are filled one request at a time
+BATCH_FILL_MIN_REQUESTS = 128
+
 class Portfolio:
-    def __init__(self, cash: float):
+    def __init__(self, cash: float, universe: Universe, ledger: Optional[Ledger] = None):
         """
         Initializes the portfolio with a starting amount of cash.
 
         Parameters:
             cash (float): The initial amount of cash to start the portfolio with.
+            universe (Universe): Symbols, dates and prices of the backtest.
+            ledger (Ledger): Records the value history, one sized to the universe by default.
         """
         self._initialCash = cash
         self._cash = cash
-        self._holdings = {} # {symbol: shares}
-        self._trades = []
-        multiIndex = pd.MultiIndex.from_tuples([], names=["Date", "Symbol"])
-        self._history = pd.DataFrame(index=multiIndex, columns=["Value"])
-        self._cashHistory = pd.DataFrame(columns=["Value"])
+        self._universe = universe
+        self._shares = np.zeros(len(universe.symbols), dtype=np.int64) # shares per symbol id
+        self._isHeld = np.zeros(len(universe.symbols), dtype=bool) # bought at some point
+        self._heldIds = [] # symbol ids in the order they were first bought
+        self._heldSymbols = [] # symbols in the same order
+        self._holdings = None # {symbol: shares}, built on request
+        self._trades = Blotter(universe.symbols)
+        self._ledger = ledger if ledger is not None else Ledger(len(universe.dates), len(universe.symbols))
 
     def getInitialCash(self) -> float:
         """
@@ -49,15 +60,20 @@ class Portfolio:
             holdings (Dict[str, int]): A dictionary mapping each symbol to the
             number of shares held.
         """
+        if self._holdings is None:
+            self._holdings = {
+                symbol: int(self._shares[symbolId])
+                for symbolId, symbol in zip(self._heldIds, self._heldSymbols)
+            }
         return self._holdings
     
-    def getTrades(self) -> List[Trade]:
+    def getTrades(self) -> Blotter:
         """
         Retrieves the history of all executed trades.
 
         Returns:
-            trades (List[Trade]): A list of all Trade objects that have been
-            executed by the portfolio.
+            trades (Blotter): All trades executed by the portfolio, indexable and
+            iterable as Trade rows or readable as arrays.
         """
         return self._trades
     
@@ -69,7 +85,7 @@ class Portfolio:
             history (DataFrame): A pandas DataFrame with a (Date, Symbol) MultiIndex
             that tracks the value of each holding over time.
         """
-        return self._history
+        return self._ledger.getHistory()
     
     def getCashHistory(self) -> DataFrame:
         """
@@ -79,7 +95,48 @@ class Portfolio:
             cashHistory (DataFrame): A pandas DataFrame indexed by Date that tracks
             the cash value over time.
         """
-        return self._cashHistory
+        return self._ledger.getCashHistory()
+
+    def getEquityCurve(self) -> Tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Retrieves the total value of the portfolio over time as arrays.
+
+        Returns:
+            equityCurve (Tuple[ndarray, ndarray, ndarray]): Date of every bar, cash plus
+            the value of every holding per bar, and whether anything was held per bar.
+        """
+        return self._ledger.getEquityCurve()
+
+    def _getBar(self, marketData: DataFrame) -> Tuple[int, pd.Timestamp]:
+        """
+        Finds the current bar of the market data in the universe.
+
+        Parameters:
+            marketData (DataFrame): Market data up to the current date, indexed by
+            (Date, Symbol).
+
+        Returns:
+            bar (Tuple[int, Timestamp]): Id and date of the latest date in the market data.
+        """
+        # Read the date level directly instead of building the index tuple
+        index = marketData.index
+        date = index.levels[0][index.codes[0][-1]]
+        return self._universe.getDateId(date), date
+
+    def _addShares(self, symbolId: int, shares: int):
+        """
+        Changes the shares held of a symbol, holding it from then on.
+
+        Parameters:
+            symbolId (int): Id of the symbol in the universe.
+            shares (int): Shares bought, negative when sold.
+        """
+        if not self._isHeld[symbolId]:
+            self._isHeld[symbolId] = True
+            self._heldIds.append(symbolId)
+            self._heldSymbols.append(self._universe.symbols[symbolId])
+        self._shares[symbolId] += shares
+        self._holdings = None
 
     def _updateValue(self, marketData: DataFrame):
         """
@@ -89,18 +146,21 @@ class Portfolio:
             marketData (DataFrame): A DataFrame containing market prices for the
             current date, indexed by (Date, Symbol).
         """
-        date = marketData.index.get_level_values("Date")[-1]
-        self._cashHistory.loc[date, "Value"] = self._cash
-        # Increment through each holding and update by current market price
-        for symbol, shares in self._holdings.items():
-            self._history.loc[(date, symbol), "Value"] = shares * marketData.loc[(date, symbol), "Close"]
-
-            
+        dateId, date = self._getBar(marketData)
+        bar = self._ledger.addBar(date)
+        self._ledger.recordCash(bar, self._cash)
+        # Value every holding by its current market price at once
+        if self._heldIds:
+            shares = self._shares[self._heldIds]
+            values = shares * self._universe.closes[dateId, self._heldIds]
+            self._ledger.recordValues(bar, self._heldSymbols, values)
+            self._ledger.recordInvested(bar, bool(shares.any()))
 
     def _executeTrades(self, marketData: DataFrame, tradeReqeusts: List[TradeRequest]):
         """
         Executes a list of trade requests based on current market data. It validates 
         trades against available shares or cash and updates the portfolio's state accordingly.
+        Requests for a symbol without market data on the current date are skipped.
 
         Parameters:
             marketData (DataFrame): A DataFrame with current market prices, used to 
@@ -108,76 +168,243 @@ class Portfolio:
             tradeRequests (List[TradeRequest]): A list of buy or sell requests to be 
             executed.
         """
-        date = marketData.index.get_level_values("Date")[-1]
+        dateId, date = self._getBar(marketData)
+        getSymbolId = self._universe.getSymbolId
+        if len(tradeReqeusts) >= BATCH_FILL_MIN_REQUESTS:
+            count = len(tradeReqeusts)
+            self._fillRequests(
+                dateId,
+                date,
+                np.fromiter((getSymbolId(request.symbol) for request in tradeReqeusts), np.int64, count),
+                np.fromiter((request.side == "BUY" for request in tradeReqeusts), bool, count),
+                np.fromiter((request.shares for request in tradeReqeusts), np.int64, count)
+            )
+            return
+
+        closes = self._universe.closes[dateId]
         buyRequests = []
         for request in tradeReqeusts:
             if request.side == "BUY": # Execute SELL orders first to free up cash
                 buyRequests.append(request)
                 continue
-            symbol = request.symbol
-            sharePrice = marketData.loc[(date, symbol), "Close"]
-            # Can only sell symbols that are being hold
-            if symbol not in self._holdings:
+            symbolId = getSymbolId(request.symbol)
+            # Can only sell symbols that are being hold and have a price
+            if symbolId < 0 or not self._isHeld[symbolId]:
+                continue
+            sharePrice = closes[symbolId]
+            if np.isnan(sharePrice):
                 continue
             # Can't sell if requested shares is greater than shares held
-            elif request.shares > self._holdings[symbol]:
+            elif request.shares > self._shares[symbolId]:
                 continue
             else:
-                self._holdings[symbol] -= request.shares
-            trade = Trade(
-                symbol,
-                request.shares,
-                request.side,
-                sharePrice,
-                date
-            )
-            self._trades.append(trade)
+                self._addShares(symbolId, -request.shares)
+            self._trades.append(symbolId, False, request.shares, sharePrice, date)
             value = request.shares * sharePrice
             self._cash += value
 
         # Execute BUY orders
         for request in buyRequests:
-            symbol = request.symbol
-            sharePrice = marketData.loc[(date, symbol), "Close"]
+            symbolId = getSymbolId(request.symbol)
+            if symbolId < 0:
+                continue
+            sharePrice = closes[symbolId]
+            if np.isnan(sharePrice):
+                continue
             value = request.shares * sharePrice
             # Can't buy if request value is greater than current cash
             if value > self._cash:
                 continue
             # Buy
-            elif symbol not in self._holdings:
-                self._holdings[symbol] = request.shares
-            else:
-                self._holdings[symbol] += request.shares
-            trade = Trade(
-                symbol,
-                request.shares,
-                request.side,
-                sharePrice,
-                date
-            )
-            self._trades.append(trade)
+            self._addShares(symbolId, request.shares)
+            self._trades.append(symbolId, True, request.shares, sharePrice, date)
             self._cash -= value
-                    
+
+    def _fillRequests(self, dateId: int, date: pd.Timestamp, symbolIds: np.ndarray, isBuy: np.ndarray, shares: np.ndarray):
+        """
+        Executes the trade requests of a bar given as arrays, with the same result as
+        executing them one at a time: SELL requests first in the given order, each
+        only if the shares are held, then BUY requests in the given order, each only
+        if the cash left covers it.
+
+        Parameters:
+            dateId (int): Id of the date in the universe.
+            date (Timestamp): Date of the bar.
+            symbolIds (ndarray): Id of the symbol of every request, -1 if unknown.
+            isBuy (ndarray): Whether every request is a BUY, otherwise a SELL.
+            shares (ndarray): Shares of every request.
+        """
+        known = symbolIds >= 0
+        prices = np.where(known, self._universe.closes[dateId, symbolIds], np.nan)
+        # Requests for a symbol without a price on this date are skipped
+        priced = ~np.isnan(prices)
+
+        # Execute SELL orders first to free up cash
+        sells = np.flatnonzero(~isBuy & priced & self._isHeld[symbolIds])
+        sellIds = symbolIds[sells]
+        sellShares = shares[sells]
+        # Every sell fits if the shares sold of each symbol up to it are held
+        order = np.argsort(sellIds, kind="stable")
+        sortedIds = sellIds[order]
+        sortedShares = sellShares[order]
+        cumulative = np.cumsum(sortedShares)
+        groupStarts = np.flatnonzero(np.diff(sortedIds, prepend=-1))
+        groupSizes = np.diff(np.append(groupStarts, len(order)))
+        soldBefore = np.repeat(cumulative[groupStarts] - sortedShares[groupStarts], groupSizes)
+        accepted = np.empty(len(sells), dtype=bool)
+        accepted[order] = cumulative - soldBefore <= self._shares[sortedIds]
+        # A refused sell leaves its shares for the later sells of the symbol, check those one by one
+        if not accepted.all():
+            refusedIds = np.unique(sellIds[~accepted])
+            held = dict(zip(refusedIds.tolist(), self._shares[refusedIds].tolist()))
+            rows = np.flatnonzero(np.isin(sellIds, refusedIds))
+            remaining = []
+            for symbolId, sold in zip(sellIds[rows].tolist(), sellShares[rows].tolist()):
+                remaining.append(sold <= held[symbolId])
+                if remaining[-1]:
+                    held[symbolId] -= sold
+            accepted[rows] = remaining
+        sells = sells[accepted]
+        if len(sells) > 0:
+            np.subtract.at(self._shares, symbolIds[sells], shares[sells])
+            # Accumulate in order so the cash matches adding one trade at a time
+            self._cash = np.add.accumulate(np.concatenate(([self._cash], shares[sells] * prices[sells])))[-1]
+
+        # Execute BUY orders
+        buys = np.flatnonzero(isBuy & priced)
+        values = shares[buys] * prices[buys]
+        cashBefore = np.subtract.accumulate(np.concatenate(([self._cash], values)))
+        accepted = ~(values > cashBefore[:-1])
+        if not accepted.all():
+            # A refused buy leaves its cash for the later buys, check those one by one
+            first = int(np.argmin(accepted))
+            cash = cashBefore[first].item()
+            remaining = []
+            for value in values[first:].tolist():
+                remaining.append(not value > cash)
+                if remaining[-1]:
+                    cash -= value
+            accepted[first:] = remaining
+            cashAfter = np.float64(cash)
+        else:
+            cashAfter = cashBefore[-1]
+        buys = buys[accepted]
+        if len(buys) > 0:
+            self._cash = cashAfter
+            buyIds = symbolIds[buys]
+            np.add.at(self._shares, buyIds, shares[buys])
+            # Newly held symbols in the order they were first bought
+            newIds = buyIds[~self._isHeld[buyIds]]
+            if len(newIds) > 0:
+                newIds, firstRows = np.unique(newIds, return_index=True)
+                for symbolId in newIds[np.argsort(firstRows)].tolist():
+                    self._isHeld[symbolId] = True
+                    self._heldIds.append(symbolId)
+                    self._heldSymbols.append(self._universe.symbols[symbolId])
+
+        filled = np.concatenate((sells, buys))
+        if len(filled) > 0:
+            self._trades.extend(symbolIds[filled], isBuy[filled], shares[filled], prices[filled], date)
+            self._holdings = None
+
+    def _executeOrders(self, orders: DataFrame):
+        """
+        Executes every order of a backtest at once and records the value history
+        the per-bar _updateValue and _executeTrades calls would have produced.
+
+        Orders of a date are executed like a list of trade requests, SELL orders
+        first then BUY orders, each in the given order.
+
+        Parameters:
+            orders (DataFrame): Orders indexed by (Date, Symbol) with the columns Side,
+            Shares and Orders, as returned by Strategy.generateSignals.
+        """
+        dates = self._universe.dates
+        symbols = self._universe.symbols
+        prices = self._universe.closes
+
+        dateIds = dates.get_indexer(orders.index.get_level_values("Date"))
+        symbolIds = symbols.get_indexer(orders.index.get_level_values("Symbol"))
+        isBuy = (orders["Side"] == "BUY").to_numpy()
+        sharesPerOrder = orders["Shares"].to_numpy()
+        orderCounts = orders["Orders"].to_numpy()
+        # Sort by date then SELL before BUY, keeping the given order otherwise
+        executionOrder = np.lexsort((isBuy, dateIds))
+
+        holdings = np.zeros(len(symbols), dtype=np.int64)
+        heldSince = np.full(len(symbols), len(dates), dtype=np.int64) # first date held
+        heldOrder = [] # symbol ids in the order they were first bought
+        holdingChanges = np.zeros((len(dates) + 1, len(symbols)), dtype=np.int64)
+        cashAfter = np.full(len(dates), np.nan)
+        for row in executionOrder:
+            dateId = dateIds[row]
+            symbolId = symbolIds[row]
+            if dateId < 0 or symbolId < 0:
+                continue
+            sharePrice = prices[dateId, symbolId]
+            # No market data for the symbol on this date
+            if np.isnan(sharePrice):
+                continue
+            shares = sharesPerOrder[row].item()
+            date = dates[dateId]
+            for _ in range(orderCounts[row]):
+                if isBuy[row]:
+                    value = shares * sharePrice
+                    # Can't buy if request value is greater than current cash
+                    if value > self._cash:
+                        break
+                    if heldSince[symbolId] == len(dates):
+                        heldSince[symbolId] = dateId
+                        heldOrder.append(symbolId)
+                    holdings[symbolId] += shares
+                    holdingChanges[dateId + 1, symbolId] += shares
+                    self._cash -= value
+                else:
+                    # Can only sell symbols that are being hold and not more than held
+                    if heldSince[symbolId] == len(dates) or shares > holdings[symbolId]:
+                        break
+                    holdings[symbolId] -= shares
+                    holdingChanges[dateId + 1, symbolId] -= shares
+                    value = shares * sharePrice
+                    self._cash += value
+                self._trades.append(symbolId, isBuy[row], shares, sharePrice, date)
+                cashAfter[dateId] = self._cash
+
+        # Cash before each date's trades is the cash after the latest earlier trade
+        cashBefore = pd.Series(cashAfter).shift(1).ffill().fillna(self._initialCash).to_numpy()
+
+        # A holding is valued from the date after it was first bought, in buying order
+        heldOrder = np.array(heldOrder, dtype=np.int64)
+        holdingsBefore = np.cumsum(holdingChanges, axis=0)[:len(dates)][:, heldOrder]
+        isHeld = np.arange(len(dates))[:, None] > heldSince[heldOrder][None, :]
+        values = holdingsBefore * prices[:, heldOrder]
+        invested = (holdingsBefore != 0).any(axis=1)
+        self._ledger.recordAll(dates, cashBefore, list(symbols[heldOrder]), values, isHeld, invested)
+
+        self._shares = holdings
+        self._isHeld[heldOrder] = True
+        self._heldIds = heldOrder.tolist()
+        self._heldSymbols = list(symbols[heldOrder])
+        self._holdings = None
+
     def _liquidate(self, marketData: DataFrame):
         """
-        Sells all current holdings in the portfolio.
+        Sells all current holdings in the portfolio. A symbol without market data on
+        the last date is sold at its latest close.
 
         Parameters:
             marketData (DataFrame): A DataFrame with current market prices,
             used to determine the sale price.
         """
-        for symbol, shares in self._holdings.items():
+        # Nothing was bought when the market data is empty
+        if not self._heldIds:
+            return
+        dateId, date = self._getBar(marketData)
+        for symbolId in self._heldIds:
+            shares = int(self._shares[symbolId])
             if shares == 0:
                 continue
-            date = marketData.index.get_level_values("Date")[-1]
-            sharePrice = marketData.loc[(date, symbol), "Close"]
-            trade = Trade(
-                symbol,
-                shares,
-                "SELL",
-                sharePrice,
-                date
-            )
-            self._trades.append(trade)
+            sharePrice = self._universe.getLatestClose(dateId, symbolId)
+            self._trades.append(symbolId, False, shares, sharePrice, date)
             value = shares * sharePrice
             self._cash += value
@@ -0,0 +1,344 @@
+from contextlib import contextmanager, nullcontext
+from contextvars import ContextVar
+import cProfile
+import json
+import logging
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+try:
+    import resource
+except ImportError: # not available on Windows
+    resource = None
+
+
+logger = logging.getLogger("backtester.profile")
+
+class StageStats:
+    __slots__ = ("seconds", "calls", "rows", "peakMemory")
+
+    def __init__(self):
+        """
+        Initializes the totals of one stage.
+        """
+        self.seconds = 0.0
+        self.calls = 0
+        self.rows = 0
+        self.peakMemory = 0
+
+class Profiler:
+    def __init__(self, detailed: bool = False, traceMemory: bool = False, profileCalls: bool = False, topCalls: int = 25):
+        """
+        Initializes a profiler recording the wall time, calls, rows and memory of the
+        stages of one backtest. Coarse stages are always recorded, they cost a few
+        microseconds per backtest.
+
+        Parameters:
+            detailed (bool): Also time every call of the per bar stages, such as
+            Strategy.next and Portfolio._executeTrades.
+            traceMemory (bool): Record the peak memory allocated during each coarse
+            stage with tracemalloc, which slows down allocations.
+            profileCalls (bool): Run cProfile over the backtest and report the
+            functions with the most cumulative time.
+            topCalls (int): Number of functions reported by profileCalls.
+        """
+        self.detailed = detailed or profileCalls
+        self.traceMemory = traceMemory
+        self.profileCalls = profileCalls
+        self.topCalls = topCalls
+        self._stages: Dict[str, StageStats] = {}
+        self._openStages: List[StageStats] = []
+        self._seconds = 0.0
+        self._calls = None
+
+    def _getStage(self, name: str) -> StageStats:
+        stats = self._stages.get(name)
+        if stats is None:
+            stats = self._stages[name] = StageStats()
+        return stats
+
+    @contextmanager
+    def activate(self) -> Iterator["Profiler"]:
+        """
+        Makes the profiler the one stages of the current thread are recorded into,
+        timing everything run inside. The totals are added to the process-wide stage
+        counters and logged when it ends.
+
+        Returns:
+            profiler (Iterator[Profiler]): The profiler, active inside the with block.
+        """
+        token = activeProfiler.set(self)
+        if self.traceMemory:
+            _startTracing()
+        callProfile = None
+        if self.profileCalls:
+            callProfile = cProfile.Profile()
+            try:
+                callProfile.enable()
+            except ValueError: # another profiler is already running on this thread
+                callProfile = None
+        start = time.perf_counter()
+        try:
+            yield self
+        finally:
+            self._seconds += time.perf_counter() - start
+            if callProfile is not None:
+                callProfile.disable()
+                self._calls = _getTopCalls(callProfile, self.topCalls)
+            if self.traceMemory:
+                _stopTracing()
+            activeProfiler.reset(token)
+            stageCounters.add(self)
+            logger.info(json.dumps({"event": "backtestProfile", **self.getReport()}))
+
+    @contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Times one run of a stage. Stages may be nested.
+
+        Parameters:
+            name (str): Name of the stage.
+        """
+        stats = self._getStage(name)
+        tracing = self.traceMemory and tracemalloc.is_tracing()
+        if tracing:
+            # Keep the peak reached so far by the enclosing stages before resetting it
+            peak = tracemalloc.get_traced_memory()[1]
+            for openStage in self._openStages:
+                openStage.peakMemory = max(openStage.peakMemory, peak)
+            tracemalloc.reset_peak()
+        self._openStages.append(stats)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            stats.seconds += time.perf_counter() - start
+            stats.calls += 1
+            self._openStages.pop()
+            if tracing:
+                stats.peakMemory = max(stats.peakMemory, tracemalloc.get_traced_memory()[1])
+
+    def addRows(self, name: str, rows: int):
+        """
+        Counts rows processed by a stage.
+
+        Parameters:
+            name (str): Name of the stage.
+            rows (int): Number of rows to add.
+        """
+        self._getStage(name).rows += rows
+
+    def wrap(self, name: str, function: Callable) -> Callable:
+        """
+        Times every call of a function as a stage when the profiler is detailed.
+
+        Parameters:
+            name (str): Name of the stage.
+            function (Callable): The function to time.
+
+        Returns:
+            function (Callable): The timed function, or the function itself when the
+            profiler isn't detailed.
+        """
+        if not self.detailed:
+            return function
+        stats = self._getStage(name)
+        clock = time.perf_counter
+
+        def timed(*args, **kwargs):
+            start = clock()
+            try:
+                return function(*args, **kwargs)
+            finally:
+                stats.seconds += clock() - start
+                stats.calls += 1
+        return timed
+
+    def getStages(self) -> Dict[str, StageStats]:
+        """
+        Retrieves the totals of every recorded stage.
+
+        Returns:
+            stages (Dict[str, StageStats]): Totals by stage name.
+        """
+        return self._stages
+
+    def getReport(self) -> Dict[str, Any]:
+        """
+        Builds a JSON serializable report of the profiled backtest.
+
+        Returns:
+            report (Dict[str, Any]): "totalSeconds", "stages" with the seconds, calls
+            and rows of every stage (and peakMemoryBytes when memory is traced),
+            "peakRssBytes" of the process and "calls" with the top functions when
+            calls are profiled.
+        """
+        stages = {}
+        for name, stats in self._stages.items():
+            stages[name] = {"seconds": stats.seconds, "calls": stats.calls, "rows": stats.rows}
+            if self.traceMemory:
+                stages[name]["peakMemoryBytes"] = stats.peakMemory
+        report = {"totalSeconds": self._seconds, "stages": stages, "peakRssBytes": getPeakRss()}
+        if self._calls is not None:
+            report["calls"] = self._calls
+        return report
+
+class StageCounters:
+    def __init__(self):
+        """
+        Initializes the process-wide totals of every profiled backtest.
+        """
+        self._backtests = 0
+        self._stages: Dict[str, StageStats] = {}
+        self._lock = threading.Lock()
+
+    def add(self, profiler: Profiler):
+        """
+        Adds the stages of a finished backtest to the totals.
+
+        Parameters:
+            profiler (Profiler): The profiler of the backtest.
+        """
+        with self._lock:
+            self._backtests += 1
+            for name, stats in profiler.getStages().items():
+                total = self._stages.get(name)
+                if total is None:
+                    total = self._stages[name] = StageStats()
+                total.seconds += stats.seconds
+                total.calls += stats.calls
+                total.rows += stats.rows
+
+    def toPrometheus(self) -> str:
+        """
+        Formats the totals in the Prometheus text exposition format.
+
+        Returns:
+            text (str): The counters, one sample per line.
+        """
+        with self._lock:
+            lines = [
+                "# HELP backtester_backtests_total Backtests run.",
+                "# TYPE backtester_backtests_total counter",
+                f"backtester_backtests_total {self._backtests}"
+            ]
+            for field, help in (
+                    ("seconds", "Wall time spent in each backtest stage."),
+                    ("calls", "Runs of each backtest stage."),
+                    ("rows", "Rows processed by each backtest stage.")
+                ):
+                lines.append(f"# HELP backtester_stage_{field}_total {help}")
+                lines.append(f"# TYPE backtester_stage_{field}_total counter")
+                for name, stats in self._stages.items():
+                    lines.append(f'backtester_stage_{field}_total{{stage="{name}"}} {getattr(stats, field)}')
+        peakRss = getPeakRss()
+        if peakRss is not None:
+            lines.append("# HELP backtester_peak_rss_bytes Peak resident memory of the process.")
+            lines.append("# TYPE backtester_peak_rss_bytes gauge")
+            lines.append(f"backtester_peak_rss_bytes {peakRss}")
+        return "\n".join(lines) + "\n"
+
+# Profiler the stages of the current thread or job are recorded into
+activeProfiler: ContextVar[Optional[Profiler]] = ContextVar("activeProfiler", default=None)
+# Totals of every backtest in the process
+stageCounters = StageCounters()
+
+_tracingLock = threading.Lock()
+_tracingUsers = 0
+
+def _startTracing():
+    """
+    Starts tracemalloc for one more profiler, it is shared by the whole process.
+    """
+    global _tracingUsers
+    with _tracingLock:
+        if _tracingUsers == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracingUsers += 1
+
+def _stopTracing():
+    """
+    Stops tracemalloc once no profiler uses it anymore.
+    """
+    global _tracingUsers
+    with _tracingLock:
+        _tracingUsers -= 1
+        if _tracingUsers == 0 and tracemalloc.is_tracing():
+            tracemalloc.stop()
+
+def _getTopCalls(callProfile: cProfile.Profile, count: int) -> List[Dict[str, Any]]:
+    """
+    Summarizes the functions with the most cumulative time of a cProfile run.
+
+    Parameters:
+        callProfile (Profile): The finished cProfile run.
+        count (int): Number of functions to report.
+
+    Returns:
+        calls (List[Dict[str, Any]]): The function, its number of calls, time spent in
+        it alone and time including its callees, most cumulative time first.
+    """
+    stats = pstats.Stats(callProfile).stats
+    calls = []
+    for (fileName, line, function), (_, callCount, totalTime, cumulativeTime, _) in stats.items():
+        calls.append({
+            "function": f"{fileName}:{line}({function})",
+            "calls": callCount,
+            "totalSeconds": totalTime,
+            "cumulativeSeconds": cumulativeTime
+        })
+    calls.sort(key=lambda call: call["cumulativeSeconds"], reverse=True)
+    return calls[:count]
+
+def getPeakRss() -> Optional[int]:
+    """
+    Retrieves the peak resident memory of the process.
+
+    Returns:
+        peakRss (int): Peak resident memory in bytes, None where it isn't available.
+    """
+    if resource is None:
+        return None
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+def profileStage(name: str) -> ContextManager:
+    """
+    Times a stage into the active profiler, does nothing when none is active.
+
+    Parameters:
+        name (str): Name of the stage.
+
+    Returns:
+        context (ContextManager): Context manager timing the with block.
+    """
+    profiler = activeProfiler.get()
+    return profiler.stage(name) if profiler is not None else nullcontext()
+
+def profileRows(name: str, rows: int):
+    """
+    Counts rows processed by a stage of the active profiler, if any.
+
+    Parameters:
+        name (str): Name of the stage.
+        rows (int): Number of rows to add.
+    """
+    profiler = activeProfiler.get()
+    if profiler is not None:
+        profiler.addRows(name, rows)
+
+def profileCalls(name: str, function: Callable) -> Callable:
+    """
+    Times every call of a function into the active profiler when it is detailed.
+
+    Parameters:
+        name (str): Name of the stage.
+        function (Callable): The function to time.
+
+    Returns:
+        function (Callable): The timed function, or the function itself.
+    """
+    profiler = activeProfiler.get()
+    return profiler.wrap(name, function) if profiler is not None else function
@@ -0,0 +1,270 @@
+from collections import OrderedDict
+import hashlib
+import inspect
+import json
+import os
+import threading
+from typing import Any, Dict, Optional, Type
+import zipfile
+
+import numpy as np
+
+from core.blotter import Blotter
+from core.metrics import METRICS
+from core.strategies.base import Strategy
+from database.backends import getDataPath
+
+
+DEFAULT_MAX_BYTES = 1024 * 1024 * 1024
+# Bumped whenever the engine changes the results of an unchanged request, so older results aren't reused
+RESULT_FORMAT_VERSION = 3
+
+def getStrategyVersion(strategyClass: Type[Strategy]) -> str:
+    """
+    Fingerprints the code of a strategy, the source files of the strategy class and
+    of every class it inherits from.
+
+    Parameters:
+        strategyClass (Type[Strategy]): The strategy class.
+
+    Returns:
+        version (str): Hash of the source files, changing whenever one is edited.
+    """
+    digest = hashlib.blake2b(digest_size=16)
+    paths = []
+    for parentClass in strategyClass.__mro__:
+        try:
+            path = inspect.getsourcefile(parentClass)
+        except TypeError: # built in classes have no source
+            continue
+        if path is not None and path not in paths:
+            paths.append(path)
+    for path in paths:
+        with open(path, "rb") as file:
+            digest.update(file.read())
+    return digest.hexdigest()
+
+def getFingerprint(request: Dict[str, Any], strategyClass: Type[Strategy], dataVersions: Dict[str, int]) -> str:
+    """
+    Builds the key of a backtest's results. Identical requests on unchanged data and
+    strategy code share a key.
+
+    Parameters:
+        request (Dict[str, Any]): JSON serializable parameters of the backtest.
+        strategyClass (Type[Strategy]): The strategy class run by the backtest.
+        dataVersions (Dict[str, int]): Version of the market data of every symbol over
+        the date range of the backtest.
+
+    Returns:
+        key (str): Hex digest identifying the results.
+    """
+    payload = json.dumps(
+        {
+            "request": request,
+            "strategy": getStrategyVersion(strategyClass),
+            "data": dataVersions,
+            "database": os.environ.get("BACKTESTER_DB", "sqlite"),
+            "format": RESULT_FORMAT_VERSION
+        },
+        sort_keys=True,
+        default=str
+    )
+    return hashlib.blake2b(payload.encode(), digest_size=20).hexdigest()
+
+class ResultCache:
+    def __init__(self, rootPath: Optional[str] = None, maxBytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initializes a least recently used cache of backtest results on disk, one .npz
+        file per result holding the metrics and the trade arrays.
+
+        Parameters:
+            rootPath (str): The directory holding the results, "results" in the
+            market data directory by default.
+            maxBytes (int): Disk budget of the cached results in bytes.
+        """
+        self._rootPath = rootPath
+        self._maxBytes = maxBytes
+        self._entries: "OrderedDict[str, int]" = OrderedDict() # {key: file size}
+        self._bytes = 0
+        self._loaded = False
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def get(self, key: str) -> Optional[Dict[str, Any]]:
+        """
+        Retrieves cached results.
+
+        Parameters:
+            key (str): Key of the results, from getFingerprint.
+
+        Returns:
+            results (Dict[str, Any]): Every metric in METRICS and the trades as a
+            Blotter under "trades", None on a miss.
+        """
+        with self._lock:
+            self._load()
+        path = self._getPath(key)
+        try:
+            with np.load(path, allow_pickle=False) as file:
+                results = json.loads(file["metrics"].item())
+                results["trades"] = Blotter.fromArrays(
+                    file["symbols"].tolist(),
+                    file["symbol"],
+                    file["buy"],
+                    file["shares"],
+                    file["price"],
+                    file["time"]
+                )
+            # Keeps the order of use across restarts
+            os.utime(path)
+        except (OSError, ValueError, KeyError, zipfile.BadZipFile):
+            # Not cached, evicted by another process or unreadable
+            with self._lock:
+                self._misses += 1
+                self._remove(key)
+            return None
+        with self._lock:
+            self._hits += 1
+            if key not in self._entries:
+                # Written by another process
+                self._entries[key] = os.path.getsize(path)
+                self._bytes += self._entries[key]
+            self._entries.move_to_end(key)
+        return results
+
+    def put(self, key: str, results: Dict[str, Any]):
+        """
+        Stores results as the most recently used and evicts to the budget.
+
+        Parameters:
+            key (str): Key of the results, from getFingerprint.
+            results (Dict[str, Any]): Every metric in METRICS and the trades as a
+            Blotter under "trades".
+        """
+        with self._lock:
+            self._load()
+        trades = results["trades"]
+        arrays = trades.getArrays()
+        path = self._getPath(key)
+        temporaryPath = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(temporaryPath, "wb") as file:
+            np.savez(
+                file,
+                metrics=np.array(json.dumps({metric: results[metric] for metric in METRICS})),
+                symbols=np.array(trades.getSymbols(), dtype=str),
+                symbol=arrays["symbol"],
+                buy=arrays["buy"],
+                shares=arrays["shares"],
+                price=arrays["price"],
+                time=arrays["time"].view(np.int64)
+            )
+        os.replace(temporaryPath, path)
+        size = os.path.getsize(path)
+        with self._lock:
+            self._remove(key, deleteFile=False)
+            self._entries[key] = size
+            self._bytes += size
+            self._evict()
+
+    def invalidate(self):
+        """
+        Deletes every cached result.
+        """
+        with self._lock:
+            self._load()
+            for key in list(self._entries):
+                self._remove(key)
+
+    def setMaxBytes(self, maxBytes: int):
+        """
+        Changes the disk budget, evicting results that no longer fit.
+
+        Parameters:
+            maxBytes (int): Disk budget of the cached results in bytes.
+        """
+        with self._lock:
+            self._maxBytes = maxBytes
+            self._load()
+            self._evict()
+
+    def getStats(self) -> Dict[str, int]:
+        """
+        Retrieves the cache counters.
+
+        Returns:
+            stats (Dict[str, int]): Hits, misses, evictions, number of cached results,
+            cached bytes and the byte budget.
+        """
+        with self._lock:
+            self._load()
+            return {
+                "hits": self._hits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "results": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self._maxBytes
+            }
+
+    def _getPath(self, key: str) -> str:
+        """
+        A private method to build the file path of a result.
+
+        Parameters:
+            key (str): Key of the result.
+
+        Returns:
+            path (str): Path of the result's .npz file.
+        """
+        return os.path.join(self._rootPath, f"{key}.npz")
+
+    def _load(self):
+        """
+        Indexes the results already on disk, oldest use first, on first use. Must hold the lock.
+        """
+        if self._loaded:
+            return
+        if self._rootPath is None:
+            self._rootPath = os.path.join(getDataPath(), "results")
+        os.makedirs(self._rootPath, exist_ok=True)
+        files = []
+        for entry in os.scandir(self._rootPath):
+            if entry.name.endswith(".npz"):
+                stat = entry.stat()
+                files.append((stat.st_mtime, entry.name[:-len(".npz")], stat.st_size))
+        for _, key, size in sorted(files):
+            self._entries[key] = size
+            self._bytes += size
+        self._loaded = True
+        self._evict()
+
+    def _remove(self, key: str, deleteFile: bool = True):
+        """
+        Drops a result from the index and deletes its file. Must hold the lock.
+
+        Parameters:
+            key (str): Key of the result.
+            deleteFile (bool): Also delete the result's file.
+        """
+        size = self._entries.pop(key, None)
+        if size is not None:
+            self._bytes -= size
+        if deleteFile:
+            try:
+                os.remove(self._getPath(key))
+            except FileNotFoundError:
+                pass
+
+    def _evict(self):
+        """
+        Deletes least recently used results until the budget is met. Must hold the lock.
+        """
+        while self._bytes > self._maxBytes and self._entries:
+            key = next(iter(self._entries))
+            self._remove(key)
+            self._evictions += 1
+
+# Cache shared by every backtest in the process
+resultCache = ResultCache()
@@ -0,0 +1,245 @@
+from typing import Dict, Literal, Optional
+
+import numpy as np
+
+from core.metrics import NANOSECONDS_PER_DAY, TRADING_DAYS_PER_YEAR, getProfitPerSell, getTradeArrays
+from core.portfolio import Portfolio
+
+
+Method = Literal["block", "shuffle"]
+# Metrics resampled by each method
+RESAMPLED_METRICS = {
+    "block": [
+        "profitLoss",
+        "annualizedReturn",
+        "maxDrawdown",
+        "winProbability",
+        "sharpeRatio",
+        "sortinoRatio",
+        "cagr",
+        "volatility"
+    ],
+    "shuffle": ["maxDrawdown"]
+}
+DEFAULT_RESAMPLES = 10000
+# Bytes of the resampled paths held at once, larger runs are resampled in chunks
+DEFAULT_MAX_BYTES = 256 * 1024 * 1024
+# float64 arrays of a chunk's shape alive at once, with numpy's temporaries
+ARRAYS_PER_CHUNK = 4
+
+def getChunkSize(length: int, resamples: int, maxBytes: int) -> int:
+    """
+    Calculates how many resampled paths fit in the memory cap at once.
+
+    Parameters:
+        length (int): Number of bars or trades of a path.
+        resamples (int): Total number of resamples.
+        maxBytes (int): Bytes the paths of a chunk may use.
+
+    Returns:
+        chunkSize (int): Resamples per chunk, at least one.
+    """
+    return int(min(resamples, max(1, maxBytes // (ARRAYS_PER_CHUNK * 8 * max(length, 1)))))
+
+def bootstrapReturns(
+        dates: np.ndarray,
+        equity: np.ndarray,
+        initialCash: float,
+        winProbability: float,
+        sells: int,
+        resamples: int = DEFAULT_RESAMPLES,
+        blockSize: Optional[int] = None,
+        seed: Optional[int] = None,
+        maxBytes: int = DEFAULT_MAX_BYTES
+    ) -> Dict[str, np.ndarray]:
+    """
+    Resamples the per bar returns of an equity curve with a circular block bootstrap
+    and calculates the metrics of every resampled curve, chunk by chunk in batched
+    NumPy operations. Blocks of consecutive bars keep the short term dependence of
+    the returns. The metrics follow computeMetrics, the number of winning sells is
+    drawn from the binomial distribution that resampling the sells gives. The
+    resamples only depend on the seed, not on how they are chunked.
+
+    Parameters:
+        dates (ndarray): Date of every bar as datetime64[ns].
+        equity (ndarray): Cash plus the value of every holding per bar, positive.
+        initialCash (float): Cash the portfolio started with.
+        winProbability (float): Win probability of the backtest.
+        sells (int): Number of sells of the backtest.
+        resamples (int): Number of resampled curves.
+        blockSize (int): Bars per block, the cube root of the number of returns when None.
+        seed (int): Seed for the random generator.
+        maxBytes (int): Bytes the resampled curves of a chunk may use.
+
+    Returns:
+        samples (Dict[str, ndarray]): Value of every metric in RESAMPLED_METRICS["block"]
+        for every resample.
+    """
+    if len(equity) < 3:
+        raise ValueError("Bootstrapping needs at least 3 bars")
+    if np.any(equity <= 0):
+        raise ValueError("Bootstrapping needs an equity curve that stays positive")
+    returns = equity[1:] / equity[:-1] - 1
+    length = len(returns)
+    if blockSize is None:
+        blockSize = max(1, round(length ** (1 / 3)))
+    if not 1 <= blockSize <= length:
+        raise ValueError(f"Block size must be between 1 and {length}")
+    rng = np.random.default_rng(seed)
+    blocks = -(-length // blockSize)
+    offsets = np.arange(blockSize)
+    durationYears = int((dates[-1] - dates[0]).astype(np.int64) // NANOSECONDS_PER_DAY) / 365.25
+    tradingYears = length / TRADING_DAYS_PER_YEAR
+    annualizer = np.sqrt(TRADING_DAYS_PER_YEAR)
+    samples = {metric: np.zeros(resamples) for metric in RESAMPLED_METRICS["block"]}
+    if sells > 0:
+        samples["winProbability"] = rng.binomial(sells, winProbability, size=resamples) / sells
+
+    chunkSize = getChunkSize(length, resamples, maxBytes)
+    for start in range(0, resamples, chunkSize):
+        end = min(start + chunkSize, resamples)
+        starts = rng.integers(0, length, size=(end - start, blocks))
+        indices = (starts[:, :, None] + offsets).reshape(end - start, -1)[:, :length]
+        indices %= length
+        paths = returns[indices]
+        del indices
+
+        meanReturn = paths.mean(axis=1)
+        deviation = paths.std(axis=1, ddof=1)
+        downsideDeviation = np.sqrt(np.mean(np.minimum(paths, 0.0) ** 2, axis=1))
+        samples["volatility"][start:end] = deviation * annualizer
+        np.divide(meanReturn * annualizer, deviation, out=samples["sharpeRatio"][start:end], where=deviation > 0)
+        np.divide(meanReturn * annualizer, downsideDeviation, out=samples["sortinoRatio"][start:end], where=downsideDeviation > 0)
+
+        # Growth of the first bar's equity, the running peak includes the first bar
+        paths += 1
+        np.cumprod(paths, axis=1, out=paths)
+        peaks = np.maximum.accumulate(paths, axis=1)
+        np.maximum(peaks, 1.0, out=peaks)
+        np.divide(paths, peaks, out=peaks)
+        samples["maxDrawdown"][start:end] = 1 - peaks.min(axis=1)
+        final = equity[0] * paths[:, -1]
+        del paths, peaks
+
+        samples["profitLoss"][start:end] = final - initialCash
+        if initialCash > 0:
+            growth = final / initialCash
+            samples["cagr"][start:end] = growth ** (1 / tradingYears) - 1
+            if durationYears > 0:
+                samples["annualizedReturn"][start:end] = growth ** (1 / durationYears) - 1
+    return samples
+
+def shuffleTrades(
+        profits: np.ndarray,
+        initialCash: float,
+        resamples: int = DEFAULT_RESAMPLES,
+        seed: Optional[int] = None,
+        maxBytes: int = DEFAULT_MAX_BYTES
+    ) -> Dict[str, np.ndarray]:
+    """
+    Shuffles the order of the closed trades and calculates the maximum drawdown of
+    the cash after every trade, chunk by chunk in batched NumPy operations. The
+    final profit and the win probability don't depend on the order, the drawdown
+    shows how much of the backtest's drawdown came from the order trades closed in.
+
+    Parameters:
+        profits (ndarray): Profit of every sell, as returned by getProfitPerSell.
+        initialCash (float): Cash the portfolio started with, positive.
+        resamples (int): Number of shuffles.
+        seed (int): Seed for the random generator.
+        maxBytes (int): Bytes the shuffled trades of a chunk may use.
+
+    Returns:
+        samples (Dict[str, ndarray]): Value of every metric in RESAMPLED_METRICS["shuffle"]
+        for every shuffle.
+    """
+    if len(profits) < 2:
+        raise ValueError("Shuffling needs at least 2 closed trades")
+    if initialCash <= 0:
+        raise ValueError("Shuffling needs positive starting cash")
+    rng = np.random.default_rng(seed)
+    samples = {"maxDrawdown": np.zeros(resamples)}
+
+    chunkSize = getChunkSize(len(profits), resamples, maxBytes)
+    for start in range(0, resamples, chunkSize):
+        end = min(start + chunkSize, resamples)
+        paths = rng.permuted(np.broadcast_to(profits, (end - start, len(profits))), axis=1)
+        np.cumsum(paths, axis=1, out=paths)
+        paths += initialCash
+        peaks = np.maximum.accumulate(paths, axis=1)
+        np.maximum(peaks, initialCash, out=peaks)
+        np.divide(paths, peaks, out=peaks)
+        samples["maxDrawdown"][start:end] = 1 - np.minimum(peaks.min(axis=1), 1.0)
+        del paths, peaks
+    return samples
+
+def getConfidenceIntervals(samples: Dict[str, np.ndarray], confidence: float = 0.95) -> Dict[str, Dict[str, float]]:
+    """
+    Summarizes the resampled values of every metric.
+
+    Parameters:
+        samples (Dict[str, ndarray]): Resampled values by metric.
+        confidence (float): Share of the resamples between the bounds, e.g. 0.95.
+
+    Returns:
+        intervals (Dict[str, Dict[str, float]]): Lower bound, median, upper bound and
+        mean of every metric.
+    """
+    if not 0 < confidence < 1:
+        raise ValueError("Confidence must be between 0 and 1")
+    tail = (1 - confidence) / 2 * 100
+    intervals = {}
+    for metric, values in samples.items():
+        lower, median, upper = np.percentile(values, [tail, 50, 100 - tail])
+        intervals[metric] = {"lower": float(lower), "median": float(median), "upper": float(upper), "mean": float(np.mean(values))}
+    return intervals
+
+def analyzeRobustness(
+        portfolio: Portfolio,
+        metrics: Dict[str, float],
+        method: Method = "block",
+        resamples: int = DEFAULT_RESAMPLES,
+        confidence: float = 0.95,
+        blockSize: Optional[int] = None,
+        seed: Optional[int] = None,
+        maxBytes: int = DEFAULT_MAX_BYTES
+    ) -> Dict[str, Dict[str, float]]:
+    """
+    Calculates confidence intervals of the metrics of a finished backtest.
+
+    Parameters:
+        portfolio (Portfolio): The portfolio object after the backtest is complete.
+        metrics (Dict[str, float]): Metrics of the backtest, from Metrics.getMetrics.
+        method (Method): "block" bootstraps the per bar returns, "shuffle" shuffles the
+        order of the closed trades.
+        resamples (int): Number of resamples.
+        confidence (float): Share of the resamples between the bounds, e.g. 0.95.
+        blockSize (int): Bars per block of the block bootstrap.
+        seed (int): Seed for the random generator.
+        maxBytes (int): Bytes the resamples of a chunk may use.
+
+    Returns:
+        intervals (Dict[str, Dict[str, float]]): Lower bound, median, upper bound and
+        mean of every metric in RESAMPLED_METRICS[method].
+    """
+    if resamples < 1:
+        raise ValueError("Resamples must be at least 1")
+    trades = getTradeArrays(portfolio.getTrades())
+    if method == "block":
+        dates, equity, _ = portfolio.getEquityCurve()
+        samples = bootstrapReturns(
+            dates,
+            equity,
+            portfolio.getInitialCash(),
+            metrics["winProbability"],
+            int(np.count_nonzero(~trades["buy"])),
+            resamples,
+            blockSize,
+            seed,
+            maxBytes
+        )
+    elif method == "shuffle":
+        samples = shuffleTrades(getProfitPerSell(trades), portfolio.getInitialCash(), resamples, seed, maxBytes)
+    else:
+        raise ValueError(f"Unknown method: {method}")
+    return getConfidenceIntervals(samples, confidence)
@@ -1,12 +1,19 @@
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, Dict, List, Optional
 from pandas import DataFrame
 
+from core.indicators import Indicator, IndicatorSet
 from core.portfolio import Portfolio
 from core.tradeRequest import TradeRequest
 
 
 class Strategy(ABC):
+    # Number of most recent bars the strategy needs to see in next(),
+    # None hands it the full history up to the current bar
+    lookback: Optional[int] = None
+    # Values of the indicators from getIndicators(), set by the engine before onStart()
+    indicators: Optional[IndicatorSet] = None
+
     def __init__(self) -> None:
         """
         Initializes the strategy.
@@ -20,14 +27,46 @@ class Strategy(ABC):
 
         Parameters:
             marketData (DataFrame): A DataFrame containing market data up to the
-            current time step, with a (Date, Symbol) MultiIndex.
-            portfolio (Portfolio): The current portfolio object (not used in this strategy).
+            current time step, with a (Date, Symbol) MultiIndex. Limited to the
+            last lookback bars when lookback is set.
+            portfolio (Portfolio): The current portfolio object.
 
         Returns:
             trades (List[TradeRequest]): A list of buy or sell orders to be executed.
         """
         pass
 
+    def generateSignals(self, data: DataFrame) -> Optional[DataFrame]:
+        """
+        Optionally generates every order of the backtest at once from the complete
+        market data, used by the "vectorized" engine mode instead of next().
+
+        Parameters:
+            data (DataFrame): The complete market data, with a sorted (Date, Symbol)
+            MultiIndex.
+
+        Returns:
+            orders (DataFrame): A DataFrame with a (Date, Symbol) MultiIndex sorted by
+            date, one row per order with the columns Side (BUY or SELL), Shares (per
+            order) and Orders (number of identical orders). Each order is executed like
+            a TradeRequest returned by next() on that date. None if the strategy has no
+            vectorized form.
+        """
+        return None
+
+    def getIndicators(self) -> List[Indicator]:
+        """
+        Optionally declares the indicators the strategy reads. The engine advances them
+        by one bar before every call to next(), so self.indicators.get(indicator, symbol)
+        returns the value on the current bar. In generateSignals() the values of every
+        bar come from self.indicators.compute(indicator, data). Indicators with equal
+        parameters are computed once per symbol and shared.
+
+        Returns:
+            indicators (List[Indicator]): The indicators to compute.
+        """
+        return []
+
     @abstractmethod
     def onStart(self):
         """
@@ -1,12 +1,17 @@
+from bisect import bisect_right
 from typing import Dict, List
 
+import numpy as np
 from pandas import DataFrame
+import pandas as pd
 from core.portfolio import Portfolio
 from core.strategies.base import Strategy
 from core.tradeRequest import TradeRequest
 
 
 class ConstantPriceThresholdStrategy(Strategy):
+    lookback = 2
+
     def __init__(self, threshold: float, daysToClose: int, quantity: int):
         """
         Initializes the Constant Price Threshold strategy.
@@ -21,6 +26,7 @@ class ConstantPriceThresholdStrategy(Strategy):
         self.daysToClose = daysToClose
         self.quantity = quantity
         self.positions = {}
+        self.barCounts = {} # {symbol: bars seen}
 
     def next(self, marketData: DataFrame, portfolio: Portfolio) -> List[TradeRequest]:
         """
@@ -29,34 +35,89 @@ class ConstantPriceThresholdStrategy(Strategy):
         Parameters:
             marketData (DataFrame): A DataFrame containing market data up to the
             current time step, with a (Date, Symbol) MultiIndex.
-            portfolio (Portfolio): The current portfolio object (not used in this strategy).
+            portfolio (Portfolio): The current portfolio object, used to cap sells at the shares held.
 
         Returns:
             trades (List[TradeRequest]): A list of buy or sell orders to be executed.
         """
         trades = []
-        for symbol in marketData.index.get_level_values("Symbol").unique():
-            symbolData = marketData.xs(symbol, level="Symbol")
+        index = marketData.index
+        # Codes of the index levels, equal codes are equal dates or symbols
+        dateCodes = index.codes[index.names.index("Date")]
+        symbolLevel = index.names.index("Symbol")
+        symbolCodes = index.codes[symbolLevel]
+        closes = marketData["Close"].to_numpy(dtype=np.float64)
+        # Rows of each symbol in date order
+        codes, firstRows, rowCounts = np.unique(symbolCodes, return_index=True, return_counts=True)
+        rows = np.argsort(symbolCodes, kind="stable")
+        ends = np.cumsum(rowCounts)
+        isLatest = (dateCodes[rows[ends - 1]] == dateCodes[-1]).tolist()
+        latestPrices = closes[rows[ends - 1]].tolist()
+        previousPrices = closes[rows[np.maximum(ends - 2, 0)]].tolist()
+        rowCounts = rowCounts.tolist()
+        symbols = index.levels[symbolLevel][codes].tolist()
+        # Symbols in order of first appearance
+        for symbolId in np.argsort(firstRows).tolist():
+            symbol = symbols[symbolId]
+            # Count bars here since marketData only holds the last lookback bars
+            if isLatest[symbolId]:
+                self.barCounts[symbol] = self.barCounts.get(symbol, 0) + 1
+            barCount = self.barCounts.get(symbol, 0)
             # Continue, if its the first day
-            if len(symbolData) < 2:
+            if rowCounts[symbolId] < 2:
                 continue
-            latestPrice = symbolData.iloc[-1]["Close"]
-            previousPrice = symbolData.iloc[-2]["Close"]
+            latestPrice = latestPrices[symbolId]
+            previousPrice = previousPrices[symbolId]
             # Price must strike from below the threshold
             if latestPrice >= self.threshold and previousPrice <= latestPrice and previousPrice <= self.threshold:
                 trades.append(TradeRequest(symbol, self.quantity, "BUY"))
                 if symbol not in self.positions:
-                    self.positions[symbol] = [len(symbolData)]
+                    self.positions[symbol] = [barCount]
                 else:
-                    self.positions[symbol].append(len(symbolData))
+                    self.positions[symbol].append(barCount)
 
             # Sell positions after daysToClose
             if symbol in self.positions:
-                for time in self.positions[symbol]:
-                    if len(symbolData) - time >= self.daysToClose:
-                         trades.append(TradeRequest(symbol, self.quantity, "SELL"))
+                # Positions are appended in bar order, so the due ones are a prefix
+                due = bisect_right(self.positions[symbol], barCount - self.daysToClose)
+                # Sells past the shares held would be rejected by the portfolio
+                if self.quantity > 0:
+                    due = min(due, portfolio.getHoldings().get(symbol, 0) // self.quantity)
+                for _ in range(due):
+                    trades.append(TradeRequest(symbol, self.quantity, "SELL"))
         return trades
 
+    def generateSignals(self, data: DataFrame) -> DataFrame:
+        """
+        Generates every order of the backtest at once, matching the requests of next().
+
+        Parameters:
+            data (DataFrame): The complete market data, with a sorted (Date, Symbol)
+            MultiIndex.
+
+        Returns:
+            orders (DataFrame): One row per order with the columns Side, Shares and Orders,
+            indexed by (Date, Symbol).
+        """
+        bySymbol = data["Close"].groupby(level="Symbol")
+        latestPrice = data["Close"]
+        previousPrice = bySymbol.shift(1)
+        # Price must strike from below the threshold, NaN on the first day compares False
+        buy = (latestPrice >= self.threshold) & (previousPrice <= latestPrice) & (previousPrice <= self.threshold)
+
+        # Positions bought at least daysToClose bars ago are due to be sold
+        buyCount = buy.astype("int64").groupby(level="Symbol").cumsum()
+        if self.daysToClose > 0:
+            due = buyCount.groupby(level="Symbol").shift(self.daysToClose).fillna(0).astype("int64")
+        else:
+            due = buyCount
+
+        # next() appends the BUY before the SELLs of a symbol
+        buys = pd.DataFrame({"Side": "BUY", "Shares": self.quantity, "Orders": 1, "Row": 0}, index=data.index[buy.values])
+        sells = pd.DataFrame({"Side": "SELL", "Shares": self.quantity, "Orders": due[due > 0].values, "Row": 1}, index=data.index[(due > 0).values])
+        orders = pd.concat([buys, sells]).set_index("Row", append=True).sort_index()
+        return orders.droplevel("Row")
+
     def onStart(self):
         """
         A callback method executed once at the start of a backtest.
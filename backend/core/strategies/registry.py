@@ -0,0 +1,244 @@
+import ast
+from importlib import import_module
+from importlib.metadata import entry_points
+import inspect
+import logging
+import os
+import re
+import threading
+from typing import Any, Callable, Dict, List, Optional, Type
+
+from core.strategies.base import Strategy
+
+
+logger = logging.getLogger("backtester.strategies")
+
+# Entry point group other packages register their Strategy subclasses under
+ENTRY_POINT_GROUP = "backtester.strategies"
+# Modules of core/strategies that hold no strategies to discover
+SKIPPED_MODULES = {"base", "registry"}
+# Parameter types named in the schema, others by their annotation
+TYPE_NAMES = {float: "number", int: "integer", str: "string", bool: "boolean", list: "array", dict: "object"}
+
+class StrategyRegistry:
+    def __init__(self, package: str = "core.strategies", group: str = ENTRY_POINT_GROUP):
+        """
+        Initializes a registry of the strategies in a package and in the entry points of
+        installed packages. Nothing is scanned or imported until a strategy is first
+        looked up, and a strategy's module is only imported when it is used.
+
+        Parameters:
+            package (str): Package whose modules are scanned for Strategy subclasses.
+            group (str): Entry point group, each entry point loads a Strategy subclass.
+        """
+        self._package = package
+        self._group = group
+        self._loaders: Optional[Dict[str, Callable[[], Any]]] = None # {name: loads the class}
+        self._classes: Dict[str, Type[Strategy]] = {}
+        self._lock = threading.RLock()
+
+    def getNames(self) -> List[str]:
+        """
+        Retrieves the names of every strategy without importing them.
+
+        Returns:
+            names (List[str]): Strategy names, sorted.
+        """
+        return sorted(set(self._getLoaders()) | set(self._classes))
+
+    def __contains__(self, name: str) -> bool:
+        """
+        Checks whether a strategy exists without importing it.
+
+        Parameters:
+            name (str): Name of the strategy.
+
+        Returns:
+            exists (bool): Whether the strategy is registered or discovered.
+        """
+        return name in self._classes or name in self._getLoaders()
+
+    def get(self, name: str) -> Type[Strategy]:
+        """
+        Retrieves a strategy class by name, importing its module on first use.
+
+        Parameters:
+            name (str): Name of the strategy, its class name for discovered strategies.
+
+        Returns:
+            strategyClass (Type[Strategy]): The strategy class.
+        """
+        strategyClass = self._classes.get(name)
+        if strategyClass is not None:
+            return strategyClass
+        loader = self._getLoaders().get(name)
+        if loader is None:
+            raise ValueError(f"Unknown strategy: {name}")
+        with self._lock:
+            strategyClass = self._classes.get(name)
+            if strategyClass is None:
+                strategyClass = loader()
+                if not (inspect.isclass(strategyClass) and issubclass(strategyClass, Strategy)):
+                    raise ValueError(f"{name} isn't a Strategy subclass")
+                self._classes[name] = strategyClass
+        return strategyClass
+
+    def register(self, strategyClass: Type[Strategy], name: Optional[str] = None):
+        """
+        Registers a strategy class directly, replacing one with the same name.
+
+        Parameters:
+            strategyClass (Type[Strategy]): The strategy class.
+            name (str): Name of the strategy, its class name by default.
+        """
+        if not (inspect.isclass(strategyClass) and issubclass(strategyClass, Strategy)):
+            raise ValueError(f"{strategyClass!r} isn't a Strategy subclass")
+        with self._lock:
+            self._classes[name or strategyClass.__name__] = strategyClass
+
+    def getSchema(self, name: str) -> Dict[str, Any]:
+        """
+        Describes a strategy and the parameters of its constructor, the descriptions
+        read from the Parameters section of its docstring.
+
+        Parameters:
+            name (str): Name of the strategy.
+
+        Returns:
+            schema (Dict[str, Any]): The name, description, lookback, whether it has a
+            vectorized form, and the name, type, default, whether it is required and the
+            description of each parameter.
+        """
+        strategyClass = self.get(name)
+        init = strategyClass.__init__
+        descriptions = StrategyRegistry._parseParameters(init.__doc__ or "")
+        parameters = []
+        for parameter in list(inspect.signature(init).parameters.values())[1:]:
+            if parameter.kind in (parameter.VAR_POSITIONAL, parameter.VAR_KEYWORD):
+                continue
+            annotation = parameter.annotation
+            required = parameter.default is parameter.empty
+            parameters.append({
+                "name": parameter.name,
+                "type": None if annotation is parameter.empty else TYPE_NAMES.get(annotation, getattr(annotation, "__name__", str(annotation))),
+                "default": None if required else parameter.default,
+                "required": required,
+                "description": descriptions.get(parameter.name)
+            })
+        # Fall back on the first line of the constructor's docstring, not one inherited from Strategy
+        docstring = strategyClass.__doc__ or (init.__doc__ if "__init__" in vars(strategyClass) else None)
+        return {
+            "name": name,
+            "description": inspect.cleandoc(docstring).split("\n")[0] if docstring else None,
+            "lookback": strategyClass.lookback,
+            "vectorized": strategyClass.generateSignals is not Strategy.generateSignals,
+            "parameters": parameters
+        }
+
+    def getSchemas(self) -> List[Dict[str, Any]]:
+        """
+        Describes every strategy, importing them. Strategies that fail to import are
+        logged and left out.
+
+        Returns:
+            schemas (List[Dict[str, Any]]): Schema of each strategy, see getSchema, sorted by name.
+        """
+        schemas = []
+        for name in self.getNames():
+            try:
+                schemas.append(self.getSchema(name))
+            except Exception:
+                logger.exception("Failed to load strategy %s", name)
+        return schemas
+
+    def _getLoaders(self) -> Dict[str, Callable[[], Any]]:
+        """
+        A private method to find every strategy once, the classes of the package by
+        reading its source and the entry points from the package metadata.
+
+        Returns:
+            loaders (Dict[str, Callable[[], Any]]): Function loading the class by name.
+        """
+        if self._loaders is not None:
+            return self._loaders
+        with self._lock:
+            if self._loaders is None:
+                loaders = {}
+                for entryPoint in entry_points(group=self._group):
+                    loaders[entryPoint.name] = entryPoint.load
+                # Strategies of the package take precedence over entry points of the same name
+                for name, module in StrategyRegistry._findClasses(self._package).items():
+                    loaders[name] = lambda name=name, module=module: getattr(import_module(module), name)
+                self._loaders = loaders
+        return self._loaders
+
+    def _findClasses(package: str) -> Dict[str, str]:
+        """
+        A private method to find the Strategy subclasses defined in the modules of a
+        package by parsing their source instead of importing them.
+
+        Parameters:
+            package (str): Name of the package.
+
+        Returns:
+            classes (Dict[str, str]): Module of each class by class name.
+        """
+        bases = {} # {class name: (module, base class names)}
+        # Importing the package only runs its __init__, a namespace package has none
+        for directory in import_module(package).__path__:
+            for fileName in sorted(os.listdir(directory)):
+                moduleName, extension = os.path.splitext(fileName)
+                if extension != ".py" or moduleName in SKIPPED_MODULES:
+                    continue
+                with open(os.path.join(directory, fileName), encoding="utf-8") as file:
+                    tree = ast.parse(file.read(), fileName)
+                for node in tree.body:
+                    if isinstance(node, ast.ClassDef):
+                        names = [base.id if isinstance(base, ast.Name) else base.attr for base in node.bases if isinstance(base, (ast.Name, ast.Attribute))]
+                        bases[node.name] = (f"{package}.{moduleName}", names)
+
+        # Subclasses of subclasses too, in any module of the package
+        strategies = {Strategy.__name__}
+        found = True
+        while found:
+            found = False
+            for name, (_, names) in bases.items():
+                if name not in strategies and strategies.intersection(names):
+                    strategies.add(name)
+                    found = True
+        return {name: module for name, (module, _) in bases.items() if name in strategies}
+
+    def _parseParameters(docstring: str) -> Dict[str, str]:
+        """
+        A private method to read the parameter descriptions of a docstring written as
+        "name (Type): description" lines under "Parameters:".
+
+        Parameters:
+            docstring (str): The docstring.
+
+        Returns:
+            descriptions (Dict[str, str]): Description by parameter name.
+        """
+        descriptions = {}
+        name = None
+        inParameters = False
+        for line in inspect.cleandoc(docstring).split("\n"):
+            stripped = line.strip()
+            if stripped == "Parameters:":
+                inParameters = True
+                continue
+            if not inParameters:
+                continue
+            if not stripped or not line.startswith(" "):
+                break
+            match = re.match(r"(\w+) \([^)]*\): (.*)", stripped)
+            if match:
+                name = match.group(1)
+                descriptions[name] = match.group(2)
+            elif name is not None:
+                # Description continued on the next line
+                descriptions[name] += " " + stripped
+        return descriptions
+
+# Registry shared by the whole process
+strategyRegistry = StrategyRegistry()
@@ -0,0 +1,395 @@
+from concurrent.futures import FIRST_COMPLETED, ProcessPoolExecutor, as_completed, wait
+from datetime import datetime
+import itertools
+import math
+import multiprocessing
+import os
+from typing import Any, Dict, Iterator, List, Optional, Tuple, Type, Union
+
+from pandas import DataFrame
+import pandas as pd
+
+from core.engine import Engine, Mode
+from core.metrics import METRICS
+from core.strategies.base import Strategy
+
+
+# Metrics where a smaller value ranks higher
+LOWER_IS_BETTER = {"maxDrawdown", "volatility"}
+# Combinations of one sweep at most
+MAX_COMBINATIONS = 10000
+
+# Read-only state of a sweep worker process, set once by _initWorker
+_workerData = None
+_workerConfig = None
+# Workers start from a fresh server process instead of forking the API server and its threads
+_processContext = multiprocessing.get_context("forkserver" if "forkserver" in multiprocessing.get_all_start_methods() else "spawn")
+
+def _initWorker(completeData: DataFrame, config: Dict[str, Any]):
+    """
+    Stores the market data and backtest settings in a worker process, so they
+    are sent once per worker instead of once per combination.
+
+    Parameters:
+        completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+        config (Dict[str, Any]): Strategy class, starting cash and engine mode.
+    """
+    global _workerData, _workerConfig
+    _workerData = completeData
+    _workerConfig = config
+
+def _runCombination(strategyParams: Dict[str, Any], rows: Optional[Tuple[int, int]] = None) -> Dict[str, Any]:
+    """
+    Runs one backtest of the sweep on the worker's market data.
+
+    Parameters:
+        strategyParams (Dict[str, Any]): Parameters of the strategy for this run.
+        rows (Tuple[int, int]): First and last row, exclusive, of the market data to
+        backtest on, None for all of it.
+
+    Returns:
+        result (Dict[str, Any]): The parameters, the metrics and the number of trades.
+    """
+    results = Engine.runOnData(
+        _workerData if rows is None else _workerData.iloc[rows[0]:rows[1]],
+        _workerConfig["strategyClass"],
+        strategyParams,
+        _workerConfig["startingCash"],
+        _workerConfig["mode"]
+    )
+    result = {"params": strategyParams, "trades": len(results["portfolio"].getTrades())}
+    for metric in METRICS:
+        result[metric] = float(results[metric])
+    return result
+
+def _getWorkerCount(workers: Optional[int], tasks: int) -> int:
+    """
+    Chooses the number of worker processes, never more than the CPUs or the backtests.
+
+    Parameters:
+        workers (int): Requested number of worker processes, None for the number of CPUs.
+        tasks (int): Number of backtests to run.
+
+    Returns:
+        workers (int): Number of worker processes to start, 1 runs in this process.
+    """
+    if workers is not None and workers < 1:
+        raise ValueError("Workers must be at least 1")
+    cpus = os.cpu_count() or 1
+    return max(min(workers or cpus, cpus, tasks), 1)
+
+class Sweep:
+    def expandRange(values: Union[List[Any], Dict[str, float]]) -> List[Any]:
+        """
+        Expands a parameter range into the list of values to try.
+
+        Parameters:
+            values (Union[List[Any], Dict[str, float]]): Either the values themselves or
+            a dictionary with start, stop and step, where stop is inclusive.
+
+        Returns:
+            values (List[Any]): The values to try.
+        """
+        if not isinstance(values, dict):
+            return list(values)
+        start = values["start"]
+        stop = values["stop"]
+        step = values.get("step", 1)
+        if step <= 0:
+            raise ValueError("Range step must be positive")
+        count = math.floor((stop - start) / step + 1e-9) + 1
+        if count > MAX_COMBINATIONS:
+            raise ValueError(f"Range has {count} values, at most {MAX_COMBINATIONS} combinations are allowed")
+        return [start + i * step for i in range(max(count, 0))]
+
+    def expandGrid(paramRanges: Dict[str, Union[List[Any], Dict[str, float]]]) -> List[Dict[str, Any]]:
+        """
+        Expands parameter ranges into every combination of strategy parameters.
+
+        Parameters:
+            paramRanges (Dict[str, Union[List[Any], Dict[str, float]]]): Range per
+            strategy parameter, see expandRange.
+
+        Returns:
+            combinations (List[Dict[str, Any]]): One dictionary of strategy parameters
+            per combination, at most MAX_COMBINATIONS.
+        """
+        names = list(paramRanges)
+        values = [Sweep.expandRange(paramRanges[name]) for name in names]
+        count = math.prod(len(options) for options in values)
+        if count > MAX_COMBINATIONS:
+            raise ValueError(f"Parameter ranges have {count} combinations, at most {MAX_COMBINATIONS} are allowed")
+        return [dict(zip(names, combination)) for combination in itertools.product(*values)]
+
+    def runSweep(
+            completeData: DataFrame,
+            strategyClass: Type[Strategy],
+            combinations: List[Dict[str, Any]],
+            startingCash: float,
+            mode: Mode = "linear",
+            workers: Optional[int] = None
+        ) -> Iterator[Dict[str, Any]]:
+        """
+        Runs a backtest for every combination of strategy parameters on a process pool,
+        yielding each result as soon as it finishes. The workers are started from a
+        forkserver (spawn where there is none), and the market data is pickled into
+        every worker once when it starts, so each holds its own copy of it.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            strategyClass (Strategy): Strategy class to use in the backtests.
+            combinations (List[Dict[str, Any]]): Strategy parameters of each backtest.
+            startingCash (float): Initial cash of each backtest.
+            mode (Mode): Engine mode of each backtest.
+            workers (int): Number of worker processes, defaults to and is capped at the
+            number of CPUs. A single worker runs the backtests in this process.
+
+        Returns:
+            results (Iterator[Dict[str, Any]]): The parameters, metrics and number of
+            trades of each backtest, in order of completion.
+        """
+        config = {"strategyClass": strategyClass, "startingCash": startingCash, "mode": mode}
+        workers = _getWorkerCount(workers, len(combinations))
+        if workers == 1:
+            _initWorker(completeData, config)
+            for strategyParams in combinations:
+                yield _runCombination(strategyParams)
+            return
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=_processContext,
+                initializer=_initWorker,
+                initargs=(completeData, config)
+            ) as executor:
+            futures = [executor.submit(_runCombination, strategyParams) for strategyParams in combinations]
+            for future in as_completed(futures):
+                yield future.result()
+
+    def rankResults(results: List[Dict[str, Any]], rankBy: str = "profitLoss") -> List[Dict[str, Any]]:
+        """
+        Ranks sweep results from best to worst by a metric.
+
+        Parameters:
+            results (List[Dict[str, Any]]): Results returned by runSweep.
+            rankBy (str): Metric to rank by, maxDrawdown and volatility rank lowest
+            first and the other metrics highest first.
+
+        Returns:
+            ranked (List[Dict[str, Any]]): The results sorted best first.
+        """
+        if rankBy not in METRICS:
+            raise ValueError(f"Unknown metric: {rankBy}")
+        return sorted(results, key=lambda result: result[rankBy], reverse=rankBy not in LOWER_IS_BETTER)
+
+    def sweep(
+            symbols: List[str],
+            startDate: datetime,
+            endDate: datetime,
+            strategyClass: Type[Strategy],
+            paramRanges: Dict[str, Union[List[Any], Dict[str, float]]],
+            startingCash: float,
+            rankBy: str = "profitLoss",
+            mode: Mode = "linear",
+            workers: Optional[int] = None
+        ) -> List[Dict[str, Any]]:
+        """
+        Loads the market data once and runs a backtest for every combination of the
+        parameter ranges, returning the results once every backtest is done.
+
+        Parameters:
+            symbols (List[str]): List of symbols to backtest on.
+            startDate (datetime): Start date for the data range, inclusive.
+            endDate (datetime): End date for the data range, inclusive.
+            strategyClass (Strategy): Strategy class to use in the backtests.
+            paramRanges (Dict[str, Union[List[Any], Dict[str, float]]]): Range per
+            strategy parameter, see expandRange.
+            startingCash (float): Initial cash of each backtest.
+            rankBy (str): Metric to rank the results by.
+            mode (Mode): Engine mode of each backtest.
+            workers (int): Number of worker processes, defaults to the number of CPUs.
+
+        Returns:
+            ranked (List[Dict[str, Any]]): The parameters, metrics and number of trades
+            of each backtest, best first.
+        """
+        if rankBy not in METRICS:
+            raise ValueError(f"Unknown metric: {rankBy}")
+        completeData = Engine.loadData(symbols, startDate, endDate)
+        combinations = Sweep.expandGrid(paramRanges)
+        results = list(Sweep.runSweep(completeData, strategyClass, combinations, startingCash, mode, workers))
+        return Sweep.rankResults(results, rankBy)
+
+    def splitWindows(
+            dates: pd.DatetimeIndex,
+            trainBars: int,
+            testBars: int,
+            stepBars: Optional[int] = None,
+            anchored: bool = False
+        ) -> List[Dict[str, pd.Timestamp]]:
+        """
+        Splits trading dates into walk-forward windows, each a train period followed
+        by the test period right after it.
+
+        Parameters:
+            dates (DatetimeIndex): Sorted unique trading dates.
+            trainBars (int): Number of bars of each train period.
+            testBars (int): Number of bars of each test period.
+            stepBars (int): Number of bars between the starts of two windows, defaults
+            to testBars so the test periods follow each other without overlap.
+            anchored (bool): Start every train period on the first date, growing with
+            each window, instead of rolling it forward.
+
+        Returns:
+            windows (List[Dict[str, Timestamp]]): The trainStart, trainEnd, testStart
+            and testEnd dates of each window, inclusive, in chronological order.
+        """
+        stepBars = stepBars or testBars
+        if trainBars <= 0 or testBars <= 0 or stepBars <= 0:
+            raise ValueError("Walk-forward periods must be at least one bar")
+        if trainBars + testBars > len(dates):
+            raise ValueError(f"Walk-forward needs {trainBars + testBars} bars, the data has {len(dates)}")
+        windows = []
+        for trainStart in range(0, len(dates) - trainBars - testBars + 1, stepBars):
+            testStart = trainStart + trainBars
+            windows.append({
+                "trainStart": dates[0 if anchored else trainStart],
+                "trainEnd": dates[testStart - 1],
+                "testStart": dates[testStart],
+                "testEnd": dates[testStart + testBars - 1]
+            })
+        return windows
+
+    def runWalkForward(
+            completeData: DataFrame,
+            strategyClass: Type[Strategy],
+            combinations: List[Dict[str, Any]],
+            windows: List[Dict[str, pd.Timestamp]],
+            startingCash: float,
+            rankBy: str = "profitLoss",
+            mode: Mode = "linear",
+            workers: Optional[int] = None
+        ) -> List[Dict[str, Any]]:
+        """
+        Optimizes the strategy parameters on the train period of every window and
+        backtests the best parameters on its test period. The backtests of every
+        window share one process pool, started like runSweep's with the market data
+        pickled into every worker, and a window's test starts as soon as its train
+        backtests are done. The results are returned once every window is done.
+
+        Parameters:
+            completeData (DataFrame): Market data with a sorted (Date, Symbol) MultiIndex.
+            strategyClass (Strategy): Strategy class to use in the backtests.
+            combinations (List[Dict[str, Any]]): Strategy parameters tried on each train period.
+            windows (List[Dict[str, Timestamp]]): Walk-forward windows, see splitWindows.
+            startingCash (float): Initial cash of each backtest.
+            rankBy (str): Metric the best parameters are chosen by, ties go to the
+            earliest combination.
+            mode (Mode): Engine mode of each backtest.
+            workers (int): Number of worker processes, defaults to and is capped at the
+            number of CPUs. A single worker runs the backtests in this process.
+
+        Returns:
+            results (List[Dict[str, Any]]): For each window its dates, "train" with the
+            result of the best parameters on the train period and "test" with their
+            result on the test period, in the order of windows.
+        """
+        if rankBy not in METRICS:
+            raise ValueError(f"Unknown metric: {rankBy}")
+        if not combinations:
+            raise ValueError("Walk-forward needs at least one combination")
+        # Rows of each period, the data is sorted by date first
+        dateValues = completeData.index.get_level_values("Date")
+
+        def getRows(start: pd.Timestamp, end: pd.Timestamp) -> Tuple[int, int]:
+            return int(dateValues.searchsorted(start, "left")), int(dateValues.searchsorted(end, "right"))
+
+        trainRows = [getRows(window["trainStart"], window["trainEnd"]) for window in windows]
+        testRows = [getRows(window["testStart"], window["testEnd"]) for window in windows]
+        results = [dict(window) for window in windows]
+
+        def chooseBest(trainResults: List[Dict[str, Any]]) -> Dict[str, Any]:
+            # Ranking is stable, keep the combinations in order so ties don't depend on timing
+            return Sweep.rankResults(trainResults, rankBy)[0]
+
+        config = {"strategyClass": strategyClass, "startingCash": startingCash, "mode": mode}
+        workers = _getWorkerCount(workers, len(windows) * len(combinations))
+        if workers == 1:
+            _initWorker(completeData, config)
+            for window, result in enumerate(results):
+                best = chooseBest([_runCombination(strategyParams, trainRows[window]) for strategyParams in combinations])
+                result["train"] = best
+                result["test"] = _runCombination(best["params"], testRows[window])
+            return results
+
+        with ProcessPoolExecutor(
+                max_workers=workers,
+                mp_context=_processContext,
+                initializer=_initWorker,
+                initargs=(completeData, config)
+            ) as executor:
+            tasks = {} # {future: (window, combination index, is test)}
+            trainResults = [[None] * len(combinations) for _ in windows]
+            remaining = [len(combinations)] * len(windows)
+            for window in range(len(windows)):
+                for index, strategyParams in enumerate(combinations):
+                    tasks[executor.submit(_runCombination, strategyParams, trainRows[window])] = (window, index, False)
+            while tasks:
+                done, _ = wait(tasks, return_when=FIRST_COMPLETED)
+                for future in done:
+                    window, index, isTest = tasks.pop(future)
+                    if isTest:
+                        results[window]["test"] = future.result()
+                        continue
+                    trainResults[window][index] = future.result()
+                    remaining[window] -= 1
+                    if remaining[window] == 0:
+                        best = chooseBest(trainResults[window])
+                        results[window]["train"] = best
+                        tasks[executor.submit(_runCombination, best["params"], testRows[window])] = (window, None, True)
+        return results
+
+    def walkForward(
+            symbols: List[str],
+            startDate: datetime,
+            endDate: datetime,
+            strategyClass: Type[Strategy],
+            paramRanges: Dict[str, Union[List[Any], Dict[str, float]]],
+            startingCash: float,
+            trainBars: int,
+            testBars: int,
+            stepBars: Optional[int] = None,
+            anchored: bool = False,
+            rankBy: str = "profitLoss",
+            mode: Mode = "linear",
+            workers: Optional[int] = None
+        ) -> List[Dict[str, Any]]:
+        """
+        Loads the market data once and runs a walk-forward optimization over it,
+        see splitWindows and runWalkForward.
+
+        Parameters:
+            symbols (List[str]): List of symbols to backtest on.
+            startDate (datetime): Start date for the data range, inclusive.
+            endDate (datetime): End date for the data range, inclusive.
+            strategyClass (Strategy): Strategy class to use in the backtests.
+            paramRanges (Dict[str, Union[List[Any], Dict[str, float]]]): Range per
+            strategy parameter, see expandRange.
+            startingCash (float): Initial cash of each backtest.
+            trainBars (int): Number of bars of each train period.
+            testBars (int): Number of bars of each test period.
+            stepBars (int): Number of bars between the starts of two windows.
+            anchored (bool): Start every train period on the first date.
+            rankBy (str): Metric the best parameters are chosen by.
+            mode (Mode): Engine mode of each backtest.
+            workers (int): Number of worker processes, defaults to the number of CPUs.
+
+        Returns:
+            results (List[Dict[str, Any]]): The dates, best train result and test
+            result of each window, in chronological order.
+        """
+        completeData = Engine.loadData(symbols, startDate, endDate)
+        dates = completeData.index.get_level_values("Date").unique()
+        windows = Sweep.splitWindows(dates, trainBars, testBars, stepBars, anchored)
+        combinations = Sweep.expandGrid(paramRanges)
+        return Sweep.runWalkForward(completeData, strategyClass, combinations, windows, startingCash, rankBy, mode, workers)
@@ -4,9 +4,12 @@ from core.tradeRequest import Side
 
 
 class Trade:
+    __slots__ = ("symbol", "shares", "side", "sharePrice", "timestamp")
+
     def __init__(self, symbol: str, shares: int, side: Side, sharePrice: float, timestamp: datetime):
         """
-        Initializes a Trade object, representing a completed transaction.
+        Initializes a Trade object, representing a completed transaction. Executed
+        trades are kept in a Blotter, which hands them out as Trade rows.
 
         Parameters:
             symbol (str): The asset symbol that was traded.
@@ -20,4 +23,3 @@ class Trade:
         self.side = side
         self.sharePrice = sharePrice
         self.timestamp = timestamp
-    
\ No newline at end of file
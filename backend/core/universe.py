@@ -0,0 +1,107 @@
+from datetime import datetime
+from typing import List, Optional
+
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+
+
+class Universe:
+    __slots__ = ("symbols", "dates", "closes", "_symbolIds", "_dateIds", "_previousCloses")
+
+    def __init__(self, completeData: DataFrame, symbols: Optional[List[str]] = None):
+        """
+        Assigns dense integer ids to the symbols and dates of a backtest once, so prices
+        are read from an array instead of looked up through the MultiIndex.
+
+        Parameters:
+            completeData (DataFrame): Market data with a (Date, Symbol) MultiIndex.
+            symbols (List[str]): Symbols of the backtest, the symbols in the market data
+            when None. Fixed so their ids stay the same as the universe advances.
+        """
+        if symbols is None:
+            symbols = pd.factorize(completeData.index.get_level_values("Symbol"), sort=True)[1]
+        self.symbols = pd.Index(sorted(set(symbols)), dtype=object, name="Symbol")
+        self._symbolIds = {symbol: symbolId for symbolId, symbol in enumerate(self.symbols)}
+        # Latest close of every symbol before the current dates, NaN if none
+        self._previousCloses = np.full(len(self.symbols), np.nan)
+        self._setData(completeData)
+
+    def advance(self, completeData: DataFrame):
+        """
+        Moves the universe on to the next chunk of market data, keeping the latest
+        close of every symbol so far for getLatestClose.
+
+        Parameters:
+            completeData (DataFrame): Market data after the current dates, with a
+            (Date, Symbol) MultiIndex.
+        """
+        known = ~np.isnan(self.closes)
+        latestRows = np.where(known, np.arange(len(self.dates))[:, None], -1).max(axis=0, initial=-1)
+        updated = np.flatnonzero(latestRows >= 0)
+        self._previousCloses[updated] = self.closes[latestRows[updated], updated]
+        self._setData(completeData)
+
+    def _setData(self, completeData: DataFrame):
+        """
+        A private method to index the dates and closes of market data.
+
+        Parameters:
+            completeData (DataFrame): Market data with a (Date, Symbol) MultiIndex.
+        """
+        dateIds, dates = pd.factorize(completeData.index.get_level_values("Date"), sort=True)
+        symbolIds = self.symbols.get_indexer(completeData.index.get_level_values("Symbol"))
+        self.dates = pd.DatetimeIndex(dates, name="Date")
+        # Close per date id and symbol id, NaN where a symbol has no data on a date
+        self.closes = np.full((len(self.dates), len(self.symbols)), np.nan)
+        # Rows of symbols outside the universe are left out
+        known = symbolIds >= 0
+        self.closes[dateIds[known], symbolIds[known]] = completeData["Close"].to_numpy(dtype=np.float64)[known]
+        self._dateIds = {date: dateId for dateId, date in enumerate(self.dates)}
+
+    def getSymbolId(self, symbol: str) -> int:
+        """
+        Retrieves the id of a symbol.
+
+        Parameters:
+            symbol (str): The asset symbol.
+
+        Returns:
+            symbolId (int): Column of the symbol in closes, -1 if it isn't in the universe.
+        """
+        return self._symbolIds.get(symbol, -1)
+
+    def getDateId(self, date: datetime) -> int:
+        """
+        Retrieves the id of a date.
+
+        Parameters:
+            date (datetime): Date of a bar.
+
+        Returns:
+            dateId (int): Row of the date in closes, -1 if it isn't in the calendar.
+        """
+        return self._dateIds.get(pd.Timestamp(date), -1)
+
+    def getLatestClose(self, dateId: int, symbolId: int) -> float:
+        """
+        Retrieves the most recent close of a symbol up to and including a date.
+
+        Parameters:
+            dateId (int): Row of the date in closes.
+            symbolId (int): Column of the symbol in closes.
+
+        Returns:
+            close (float): The latest close, NaN if the symbol has none yet.
+        """
+        known = np.flatnonzero(~np.isnan(self.closes[:dateId + 1, symbolId]))
+        return self.closes[known[-1], symbolId] if len(known) > 0 else self._previousCloses[symbolId]
+
+    def getCloseFrame(self) -> DataFrame:
+        """
+        Builds the close prices as a DataFrame.
+
+        Returns:
+            closes (DataFrame): Close prices indexed by Date with one column per symbol.
+        """
+        return pd.DataFrame(self.closes, index=self.dates, columns=self.symbols)
@@ -0,0 +1,38 @@
+import os
+from typing import Optional
+
+from database.base import DBInterface
+from database.columnarDB import ColumnarDB
+from database.sqLiteDB import SQLiteDB
+
+
+def getDataPath() -> str:
+    """
+    Retrieves the directory holding the market data, creating it if needed.
+
+    Returns:
+        dataPath (str): Absolute path of the data directory, the BACKTESTER_DATA
+        environment variable or "../data" when it isn't set.
+    """
+    dataPath = os.path.abspath(os.environ.get("BACKTESTER_DATA", os.path.join("..", "data")))
+    os.makedirs(dataPath, exist_ok=True)
+    return dataPath
+
+def openDatabase(backend: Optional[str] = None) -> DBInterface:
+    """
+    Opens the market data store.
+
+    Parameters:
+        backend (str): "sqlite" for the symbol_data SQLite table or "columnar" for the
+        memory-mapped column store. Defaults to the BACKTESTER_DB environment variable,
+        or "sqlite" when it isn't set.
+
+    Returns:
+        database (DBInterface): The opened database.
+    """
+    backend = backend or os.environ.get("BACKTESTER_DB", "sqlite")
+    if backend == "sqlite":
+        return SQLiteDB(os.path.join(getDataPath(), "symbol_data.db"))
+    if backend == "columnar":
+        return ColumnarDB(os.path.join(getDataPath(), "columnar"))
+    raise ValueError(f"Unknown database backend: {backend}")
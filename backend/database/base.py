@@ -1,9 +1,36 @@
 from abc import ABC, abstractmethod
 from datetime import datetime
+from typing import Dict, Iterator, List, Literal, Tuple
 
 from pandas import DataFrame
+import pandas as pd
 
 
+# Bar intervals of the stored market data, "1d" is the daily data
+Interval = Literal["1m", "2m", "5m", "15m", "30m", "60m", "90m", "1h", "1d"]
+# Bars of each interval in a regular trading session of 6.5 hours, a partial last bar included
+BARS_PER_DAY = {"1m": 390, "2m": 195, "5m": 78, "15m": 26, "30m": 13, "60m": 7, "90m": 5, "1h": 7, "1d": 1}
+# Rows per chunk streamed by iterBars
+DEFAULT_CHUNK_ROWS = 100000
+
+def getEndTime(endDate: datetime, interval: Interval) -> pd.Timestamp:
+    """
+    Finds the last time of a range of bars ending on a date.
+
+    Parameters:
+        endDate (datetime): The end date of the range, inclusive, or the end time
+        when it isn't at midnight.
+        interval (Interval): Interval of the bars.
+
+    Returns:
+        endTime (Timestamp): The date for "1d", otherwise the last nanosecond of the
+        date when it is at midnight.
+    """
+    endTime = pd.Timestamp(endDate)
+    if interval == "1d" or endTime != endTime.normalize():
+        return endTime
+    return endTime + pd.Timedelta(days=1) - pd.Timedelta(1, "ns")
+
 class DBInterface(ABC):
     def __init__(self):
         """
@@ -11,6 +38,16 @@ class DBInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def getSymbols(self) -> List[str]:
+        """
+        Retrieves every symbol with stored market data.
+
+        Returns:
+            symbols (List[str]): The stored symbols, sorted.
+        """
+        pass
+
     @abstractmethod
     def getData(self, symbol: str, date: datetime) -> DataFrame:
         """
@@ -42,6 +79,22 @@ class DBInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def getDataRangeMany(self, symbols: List[str], startDate: datetime, endDate: datetime) -> DataFrame:
+        """
+        Retrieves market data for many symbols over a specified date range at once.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the data for the
+            symbols within the date range, with a sorted (Date, Symbol) MultiIndex.
+        """
+        pass
+
     @abstractmethod
     def setData(self, symbol: str, data: DataFrame) -> None:
         """
@@ -54,6 +107,130 @@ class DBInterface(ABC):
         """
         pass
 
+    @abstractmethod
+    def setDataMany(self, dataBySymbol: Dict[str, DataFrame]) -> None:
+        """
+        Inserts or replaces market data for many symbols in one write.
+
+        Parameters:
+            dataBySymbol (Dict[str, DataFrame]): Pandas DataFrames containing OHLCV data
+            keyed by their asset symbol. They must have a datetime index.
+        """
+        pass
+
+    @abstractmethod
+    def setBarsMany(self, interval: Interval, dataBySymbol: Dict[str, DataFrame]) -> None:
+        """
+        Inserts or replaces bars of an interval for many symbols, keyed by the
+        timestamp each bar starts at. Daily bars are stored like setDataMany.
+
+        Parameters:
+            interval (Interval): Interval of the bars.
+            dataBySymbol (Dict[str, DataFrame]): Pandas DataFrames containing OHLCV data
+            keyed by their asset symbol. They must have a datetime index.
+        """
+        pass
+
+    @abstractmethod
+    def getBarsRangeMany(self, symbols: List[str], interval: Interval, startTime: datetime, endTime: datetime) -> DataFrame:
+        """
+        Retrieves bars of an interval for many symbols over a time range at once.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the bars of the symbols
+            within the time range, with a sorted (Date, Symbol) MultiIndex holding the
+            timestamp of every bar.
+        """
+        pass
+
+    @abstractmethod
+    def iterBars(
+            self,
+            symbols: List[str],
+            interval: Interval,
+            startTime: datetime,
+            endTime: datetime,
+            chunkRows: int = DEFAULT_CHUNK_ROWS
+        ) -> Iterator[DataFrame]:
+        """
+        Streams bars of an interval for many symbols over a time range in time order,
+        reading about chunkRows rows from storage at a time.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+            chunkRows (int): Rows to read per chunk.
+
+        Returns:
+            chunks (Iterator[DataFrame]): Consecutive chunks like getBarsRangeMany
+            returns, each holding every symbol's bar of the timestamps it covers.
+        """
+        pass
+
+    @abstractmethod
+    def getDataVersions(self, symbols: List[str], startDate: datetime, endDate: datetime) -> Dict[str, int]:
+        """
+        Retrieves the version of the market data of many symbols over a date range.
+        The version increases with every write of rows within the range.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            versions (Dict[str, int]): Version keyed by asset symbol, 0 if the range
+            was never written.
+        """
+        pass
+
+    @abstractmethod
+    def getGeneration(self) -> int:
+        """
+        Retrieves the generation of the stored market data, which changes with every
+        write of daily data by any process. Cheaper than getDataVersions, it tells
+        whether anything was written since it was last read.
+
+        Returns:
+            generation (int): The generation, 0 if nothing was ever written.
+        """
+        pass
+
+    @abstractmethod
+    def getCoverage(self, symbol: str) -> List[Tuple[datetime, datetime]]:
+        """
+        Retrieves the date ranges of a symbol already checked for missing data.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+
+        Returns:
+            coverage (List[Tuple[datetime, datetime]]): Disjoint inclusive (start, end)
+            date ranges sorted by start date.
+        """
+        pass
+
+    @abstractmethod
+    def addCoverage(self, symbol: str, startDate: datetime, endDate: datetime) -> None:
+        """
+        Records a date range of a symbol as checked for missing data, merging it with
+        the ranges it overlaps or touches.
+
+        Parameters:
+            symbol (str): The asset symbol that was checked.
+            startDate (datetime): The start date of the checked range, inclusive.
+            endDate (datetime): The end date of the checked range, inclusive.
+        """
+        pass
+
     @abstractmethod
     def close(self) -> None:
         """
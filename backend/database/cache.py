@@ -0,0 +1,290 @@
+from collections import OrderedDict
+from datetime import datetime, timedelta
+import threading
+from typing import Callable, Dict, List, Optional
+
+from pandas import DataFrame
+import pandas as pd
+
+
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+class CacheEntry:
+    def __init__(self, data: DataFrame, start: pd.Timestamp, end: pd.Timestamp):
+        """
+        Initializes a CacheEntry object, holding the market data of one symbol
+        over a contiguous covered date range.
+
+        Parameters:
+            data (DataFrame): Market data of the symbol indexed by "Date", sorted.
+            start (Timestamp): First date covered, inclusive.
+            end (Timestamp): Last date covered, inclusive.
+        """
+        self.data = data
+        self.start = start
+        self.end = end
+        self.size = int(data.memory_usage(index=True, deep=True).sum())
+
+class MarketDataCache:
+    def __init__(self, maxBytes: int = DEFAULT_MAX_BYTES):
+        """
+        Initializes an empty least recently used cache of market data per symbol.
+
+        Parameters:
+            maxBytes (int): Memory budget of the cached data in bytes.
+        """
+        self._maxBytes = maxBytes
+        self._entries: "OrderedDict[str, CacheEntry]" = OrderedDict()
+        self._versions: Dict[str, int] = {} # last data version seen of each symbol
+        self._generations: Dict[str, int] = {} # database generation of each symbol's last sync
+        self._bytes = 0
+        self._lock = threading.Lock()
+        self._hits = 0
+        self._partialHits = 0
+        self._misses = 0
+        self._evictions = 0
+
+    def getDataRange(
+            self,
+            symbol: str,
+            startDate: datetime,
+            endDate: datetime,
+            loader: Callable[[str, datetime, datetime], DataFrame]
+        ) -> DataFrame:
+        """
+        Retrieves market data for a single symbol over a date range, only loading
+        the dates the cache doesn't cover. Days that haven't closed yet are never
+        covered, they are loaded again by every request.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+            loader (Callable[[str, datetime, datetime], DataFrame]): Loads the market
+            data of a symbol over an inclusive date range on a cache miss.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the data for the symbol
+            within the date range, sorted chronologically and indexed by "Date".
+            It is shared with the cache and must not be modified.
+        """
+        start = pd.Timestamp(startDate).normalize()
+        end = pd.Timestamp(endDate).normalize()
+        closedEnd = self._getClosedEnd(end)
+        day = timedelta(days=1)
+        if closedEnd < start:
+            # Nothing in the range has closed, so nothing of it is validated to cache
+            with self._lock:
+                self._misses += 1
+            return self._merge([loader(symbol, start, end)])
+
+        with self._lock:
+            entry = self._entries.get(symbol)
+            if entry is not None:
+                self._entries.move_to_end(symbol)
+
+        # Reuse the cached range when it overlaps or touches the requested one
+        if entry is not None and entry.start <= end + day and start <= entry.end + day:
+            if entry.start <= start and end <= entry.end:
+                with self._lock:
+                    self._hits += 1
+                return entry.data.loc[start:end]
+            parts = []
+            if start < entry.start:
+                parts.append(loader(symbol, start, entry.start - day))
+            parts.append(entry.data)
+            if entry.end < end:
+                parts.append(loader(symbol, entry.end + day, end))
+            data = self._merge(parts)
+            entry = CacheEntry(data.loc[:closedEnd], min(start, entry.start), max(closedEnd, entry.end))
+            with self._lock:
+                self._partialHits += 1
+        else:
+            data = self._merge([loader(symbol, start, end)])
+            entry = CacheEntry(data.loc[:closedEnd], start, closedEnd)
+            with self._lock:
+                self._misses += 1
+
+        self._put(symbol, entry)
+        return data.loc[start:end]
+
+    def getDataRangeMany(
+            self,
+            symbols: List[str],
+            startDate: datetime,
+            endDate: datetime,
+            loader: Callable[[str, datetime, datetime], DataFrame],
+            loaderMany: Callable[[List[str], datetime, datetime], Dict[str, DataFrame]]
+        ) -> List[DataFrame]:
+        """
+        Retrieves market data for many symbols over a date range. Symbols the cache
+        knows nothing about are loaded together in one call.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+            loader (Callable[[str, datetime, datetime], DataFrame]): Loads the market
+            data of a symbol over an inclusive date range, used to fill partial hits.
+            loaderMany (Callable[[List[str], datetime, datetime], Dict[str, DataFrame]]):
+            Loads the market data of many symbols over an inclusive date range.
+
+        Returns:
+            data (List[DataFrame]): Market data of each symbol in the order of symbols,
+            indexed by "Date". They are shared with the cache and must not be modified.
+        """
+        start = pd.Timestamp(startDate).normalize()
+        end = pd.Timestamp(endDate).normalize()
+        closedEnd = self._getClosedEnd(end)
+        day = timedelta(days=1)
+        with self._lock:
+            missing = [
+                symbol for symbol in symbols
+                if closedEnd < start
+                or symbol not in self._entries
+                or not (self._entries[symbol].start <= end + day and start <= self._entries[symbol].end + day)
+            ]
+
+        results = {}
+        if missing:
+            for symbol, data in loaderMany(missing, start, end).items():
+                data = self._merge([data])
+                with self._lock:
+                    self._misses += 1
+                if start <= closedEnd:
+                    self._put(symbol, CacheEntry(data.loc[:closedEnd], start, closedEnd))
+                results[symbol] = data.loc[start:end]
+        for symbol in symbols:
+            if symbol not in results:
+                results[symbol] = self.getDataRange(symbol, start, end, loader)
+        return [results[symbol] for symbol in symbols]
+
+    def invalidate(self, symbol: Optional[str] = None):
+        """
+        Drops the cached data of a symbol, or of every symbol.
+
+        Parameters:
+            symbol (str): The asset symbol to drop, None drops everything.
+        """
+        with self._lock:
+            if symbol is None:
+                self._entries.clear()
+                self._bytes = 0
+            elif symbol in self._entries:
+                self._bytes -= self._entries.pop(symbol).size
+
+    def syncVersions(self, symbols: List[str], generation: int, getVersions: Callable[[List[str]], Dict[str, int]]):
+        """
+        Drops the cached data of symbols whose stored data version changed since the
+        last sync, so data written by another process or connection isn't served stale.
+        Symbols never synced before are dropped too. The versions are only read for
+        symbols last synced at another generation of the database, so nothing but the
+        generation is queried while nothing was written.
+
+        Parameters:
+            symbols (List[str]): The asset symbols about to be read.
+            generation (int): Generation of the database, as returned by
+            DBInterface.getGeneration before the versions are read.
+            getVersions (Callable[[List[str]], Dict[str, int]]): Retrieves the data version
+            of symbols over the requested date range, see DBInterface.getDataVersions.
+        """
+        with self._lock:
+            stale = [symbol for symbol in dict.fromkeys(symbols) if self._generations.get(symbol) != generation]
+        if not stale:
+            return
+        versions = getVersions(stale)
+        with self._lock:
+            for symbol, version in versions.items():
+                self._generations[symbol] = generation
+                if self._versions.get(symbol) != version:
+                    self._versions[symbol] = version
+                    if symbol in self._entries:
+                        self._bytes -= self._entries.pop(symbol).size
+
+    def setMaxBytes(self, maxBytes: int):
+        """
+        Changes the memory budget, evicting entries that no longer fit.
+
+        Parameters:
+            maxBytes (int): Memory budget of the cached data in bytes.
+        """
+        with self._lock:
+            self._maxBytes = maxBytes
+            self._evict()
+
+    def getStats(self) -> Dict[str, int]:
+        """
+        Retrieves the cache counters.
+
+        Returns:
+            stats (Dict[str, int]): Hits, partial hits, misses, evictions, number of
+            cached symbols, cached bytes and the byte budget.
+        """
+        with self._lock:
+            return {
+                "hits": self._hits,
+                "partialHits": self._partialHits,
+                "misses": self._misses,
+                "evictions": self._evictions,
+                "symbols": len(self._entries),
+                "bytes": self._bytes,
+                "maxBytes": self._maxBytes
+            }
+
+    def _getClosedEnd(self, end: pd.Timestamp) -> pd.Timestamp:
+        """
+        A private method to find the last day of a range that has closed. Later days
+        aren't validated yet, so they are loaded on every request instead of cached.
+
+        Parameters:
+            end (Timestamp): Last date of the requested range.
+
+        Returns:
+            closedEnd (Timestamp): The earlier of end and yesterday.
+        """
+        return min(end, pd.Timestamp.now().normalize() - timedelta(days=1))
+
+    def _merge(self, parts) -> DataFrame:
+        """
+        Combines market data of one symbol into a single sorted frame without duplicate dates.
+
+        Parameters:
+            parts (List[DataFrame]): Market data indexed by "Date".
+
+        Returns:
+            data (DataFrame): The combined market data.
+        """
+        data = pd.concat(parts) if len(parts) > 1 else parts[0]
+        data = data[~data.index.duplicated(keep="last")]
+        return data.sort_index()
+
+    def _put(self, symbol: str, entry: CacheEntry):
+        """
+        Stores an entry as the most recently used and evicts to the budget.
+
+        Parameters:
+            symbol (str): The asset symbol of the entry.
+            entry (CacheEntry): The entry to store.
+        """
+        with self._lock:
+            previous = self._entries.pop(symbol, None)
+            if previous is not None:
+                self._bytes -= previous.size
+            # Data larger than the whole budget isn't cached
+            if entry.size > self._maxBytes:
+                return
+            self._entries[symbol] = entry
+            self._bytes += entry.size
+            self._evict()
+
+    def _evict(self):
+        """
+        Removes least recently used entries until the budget is met, must hold the lock.
+        """
+        while self._bytes > self._maxBytes and self._entries:
+            _, entry = self._entries.popitem(last=False)
+            self._bytes -= entry.size
+            self._evictions += 1
+
+# Cache shared by every backtest in the process
+marketDataCache = MarketDataCache()
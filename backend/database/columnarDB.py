@@ -0,0 +1,523 @@
+from datetime import datetime
+import os
+import re
+import threading
+from typing import Dict, Iterator, List, Tuple
+
+import numpy as np
+from pandas import DataFrame
+import pandas as pd
+
+from database.base import DEFAULT_CHUNK_ROWS, DBInterface, Interval
+from database.coverage import mergeRanges
+
+
+# Column name on disk and in the returned DataFrame
+COLUMNS = {
+    "open": "Open",
+    "high": "High",
+    "low": "Low",
+    "close": "Close",
+    "adjusted_close": "Adj Close",
+    "volume": "Volume"
+}
+# Symbols used as directory names, anything else could reach outside the store
+SYMBOL_PATTERN = re.compile(r"[A-Za-z0-9^][A-Za-z0-9.^=_-]{0,31}")
+# File growing by a byte with every write of the store, no symbol starts with "_"
+GENERATION_FILE = "_generation"
+
+# Lock of each symbol directory, shared by every ColumnarDB of the process
+_symbolLocks: Dict[str, threading.RLock] = {}
+_symbolLocksLock = threading.Lock()
+
+class ColumnarDB(DBInterface):
+    def __init__(self, rootPath: str, interval: Interval = "1d"):
+        """
+        Initializes a columnar store keeping each symbol's OHLCV data as contiguous
+        typed NumPy arrays on disk, one memory-mapped .npy file per column. Dates are
+        int64 nanoseconds since the epoch in ascending order. Bars of other intervals
+        are kept in a store of their own under "bars/<interval>".
+
+        Parameters:
+            rootPath (str): The directory holding one subdirectory per symbol.
+            interval (Interval): Interval of the stored bars, dates are normalized to
+            midnight for "1d".
+        """
+        self.rootPath = rootPath
+        self.interval = interval
+        os.makedirs(rootPath, exist_ok=True)
+        self._maps = {} # {symbol: {column: memmap}}
+        self._stores = {} # {interval: ColumnarDB}
+
+    def getSymbols(self) -> List[str]:
+        """
+        Retrieves every symbol with stored market data.
+
+        Returns:
+            symbols (List[str]): The stored symbols, sorted.
+        """
+        return sorted(
+            name for name in os.listdir(self.rootPath)
+            if os.path.isfile(os.path.join(self.rootPath, name, "date.npy"))
+        )
+
+    def getArrays(self, symbol: str, startDate: datetime, endDate: datetime) -> Dict[str, np.ndarray]:
+        """
+        Retrieves zero-copy views of a symbol's columns over a date range.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            arrays (Dict[str, ndarray]): Read-only memory-mapped slices keyed by the
+            on-disk column names and "date", empty if the symbol isn't stored.
+        """
+        columns = self._open(symbol)
+        if columns is None:
+            return {name: np.empty(0, dtype=np.int64 if name in ("date", "volume") else np.float64) for name in ["date", *COLUMNS]}
+        start = self._toTime(startDate)
+        end = self._toTime(endDate)
+        dates = columns["date"]
+        first = np.searchsorted(dates, start, side="left")
+        last = np.searchsorted(dates, end, side="right")
+        return {name: column[first:last] for name, column in columns.items()}
+
+    def getData(self, symbol: str, date: datetime) -> DataFrame:
+        """
+        Retrieves market data for a single symbol on a specific date.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+            date (datetime): The specific date for which to retrieve data.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the data for
+            the specified symbol and date, indexed by "Date".
+        """
+        return self.getDataRange(symbol, date, date)
+
+    def getDataRange(self, symbol: str, startDate: datetime, endDate: datetime) -> DataFrame:
+        """
+        Retrieves market data for a single symbol over a specified date range.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the data for the
+            symbol within the date range, sorted chronologically
+            and indexed by "Date".
+        """
+        arrays = self.getArrays(symbol, startDate, endDate)
+        index = pd.DatetimeIndex(arrays["date"].astype("datetime64[ns]"), name="Date")
+        data = {"Symbol": np.full(len(index), symbol, dtype=object)}
+        for name, column in COLUMNS.items():
+            data[column] = np.asarray(arrays[name])
+        return pd.DataFrame(data, index=index)
+
+    def getDataRangeMany(self, symbols: List[str], startDate: datetime, endDate: datetime) -> DataFrame:
+        """
+        Retrieves market data for many symbols over a specified date range at once.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the data for the
+            symbols within the date range, with a sorted (Date, Symbol) MultiIndex.
+        """
+        return self._toFrame(symbols, [self.getArrays(symbol, startDate, endDate) for symbol in symbols])
+
+    def _toFrame(self, symbols: List[str], listOfArrays: List[Dict[str, np.ndarray]]) -> DataFrame:
+        """
+        A private method to merge the columns of many symbols into market data.
+
+        Parameters:
+            symbols (List[str]): The asset symbols.
+            listOfArrays (List[Dict[str, ndarray]]): Columns of every symbol as returned
+            by getArrays, in the order of symbols.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame with a sorted (Date, Symbol) MultiIndex.
+        """
+        dates = np.concatenate([arrays["date"] for arrays in listOfArrays]) if symbols else np.empty(0, dtype=np.int64)
+        symbolIds = np.repeat(np.arange(len(symbols)), [len(arrays["date"]) for arrays in listOfArrays])
+        # Symbols are stored one after another, order them by (Date, Symbol)
+        symbolOrder = np.argsort(np.argsort(symbols, kind="stable"))
+        order = np.lexsort((symbolOrder[symbolIds], dates))
+        index = pd.MultiIndex.from_arrays(
+            [
+                pd.DatetimeIndex(dates[order].astype("datetime64[ns]")),
+                pd.Index(symbols, dtype=object)[symbolIds[order]]
+            ],
+            names=["Date", "Symbol"]
+        )
+        data = {}
+        for name, column in COLUMNS.items():
+            if symbols:
+                data[column] = np.concatenate([arrays[name] for arrays in listOfArrays])[order]
+            else:
+                data[column] = np.empty(0)
+        return pd.DataFrame(data, index=index)
+
+    def setData(self, symbol: str, data: DataFrame):
+        """
+        Inserts or replaces market data for a symbol from a pandas DataFrame.
+
+        Parameters:
+            symbol (str): The asset symbol for which data is being inserted.
+            data (DataFrame): A pandas DataFrame containing OHLCV data. It must
+            have a datetime index.
+        """
+        data = data.copy()
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        if self.interval == "1d":
+            data.index = data.index.normalize()
+        if "Adj Close" not in data.columns:
+            data["Adj Close"] = data["Close"]
+        data = data[list(COLUMNS.values())]
+        writtenDates = data.index
+        symbolPath = self._getSymbolPath(symbol)
+
+        # Writers of the symbol are serialized and readers map it once all files are replaced
+        with self._getLock(symbol):
+            # Rows of the new data replace stored rows on the same date, mapped again
+            # since another ColumnarDB may have written them after this one mapped them
+            self._maps.pop(symbol, None)
+            columns = self._open(symbol)
+            if columns is not None and len(columns["date"]) > 0:
+                existing = pd.DataFrame(
+                    {column: np.asarray(columns[name]) for name, column in COLUMNS.items()},
+                    index=pd.DatetimeIndex(np.asarray(columns["date"]).astype("datetime64[ns]"))
+                )
+                data = pd.concat([existing[~existing.index.isin(data.index)], data])
+            data = data[~data.index.duplicated(keep="last")].sort_index()
+
+            arrays = {"date": data.index.values.astype("datetime64[ns]").astype(np.int64)}
+            for name, column in COLUMNS.items():
+                values = data[column].to_numpy()
+                if name == "volume" and not np.isnan(values.astype(np.float64)).any():
+                    arrays[name] = values.astype(np.int64)
+                else:
+                    arrays[name] = values.astype(np.float64)
+
+            # Drop the maps before replacing the files they point to
+            self._maps.pop(symbol, None)
+            os.makedirs(symbolPath, exist_ok=True)
+            # Dates are written last so a symbol only shows up once all columns exist
+            for name in [*COLUMNS, "date"]:
+                path = os.path.join(symbolPath, f"{name}.npy")
+                temporaryPath = path + ".tmp"
+                with open(temporaryPath, "wb") as file:
+                    np.save(file, np.ascontiguousarray(arrays[name]))
+                os.replace(temporaryPath, path)
+            # Recorded once the data is in place, so a version is never seen before its data
+            if len(writtenDates) > 0:
+                self._addWrite(symbol, writtenDates.min(), writtenDates.max())
+
+    def setDataMany(self, dataBySymbol: Dict[str, DataFrame]):
+        """
+        Inserts or replaces market data for many symbols. Every symbol is stored in
+        its own files, so they are written one after another.
+
+        Parameters:
+            dataBySymbol (Dict[str, DataFrame]): Pandas DataFrames containing OHLCV data
+            keyed by their asset symbol. They must have a datetime index.
+        """
+        for symbol, data in dataBySymbol.items():
+            self.setData(symbol, data)
+
+    def setBarsMany(self, interval: Interval, dataBySymbol: Dict[str, DataFrame]):
+        """
+        Inserts or replaces bars of an interval for many symbols in the store of the
+        interval, keyed by the timestamp each bar starts at.
+
+        Parameters:
+            interval (Interval): Interval of the bars.
+            dataBySymbol (Dict[str, DataFrame]): Pandas DataFrames containing OHLCV data
+            keyed by their asset symbol. They must have a datetime index.
+        """
+        self._getStore(interval).setDataMany(dataBySymbol)
+
+    def getBarsRangeMany(self, symbols: List[str], interval: Interval, startTime: datetime, endTime: datetime) -> DataFrame:
+        """
+        Retrieves bars of an interval for many symbols over a time range at once.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the bars of the symbols
+            within the time range, with a sorted (Date, Symbol) MultiIndex holding the
+            timestamp of every bar.
+        """
+        return self._getStore(interval).getDataRangeMany(symbols, startTime, endTime)
+
+    def iterBars(
+            self,
+            symbols: List[str],
+            interval: Interval,
+            startTime: datetime,
+            endTime: datetime,
+            chunkRows: int = DEFAULT_CHUNK_ROWS
+        ) -> Iterator[DataFrame]:
+        """
+        Streams bars of an interval for many symbols over a time range in time order.
+        Each chunk ends at the earliest timestamp a symbol reaches with its share of
+        chunkRows, so only the pages of the chunk's rows are read from the memory maps.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+            chunkRows (int): Rows to read per chunk at most.
+
+        Returns:
+            chunks (Iterator[DataFrame]): Consecutive chunks like getBarsRangeMany
+            returns, each holding every symbol's bar of the timestamps it covers.
+        """
+        store = self._getStore(interval)
+        listOfArrays = [store.getArrays(symbol, startTime, endTime) for symbol in symbols]
+        lengths = [len(arrays["date"]) for arrays in listOfArrays]
+        positions = [0] * len(symbols)
+        rowsPerSymbol = max(1, chunkRows // max(len(symbols), 1))
+        while any(position < length for position, length in zip(positions, lengths)):
+            # Symbols whose remaining rows fit don't hold the cut back
+            cut = min(
+                (
+                    arrays["date"][position + rowsPerSymbol - 1]
+                    for arrays, position, length in zip(listOfArrays, positions, lengths)
+                    if position + rowsPerSymbol < length
+                ),
+                default=max(arrays["date"][length - 1] for arrays, position, length in zip(listOfArrays, positions, lengths) if position < length)
+            )
+            ends = [
+                position + int(np.searchsorted(arrays["date"][position:length], cut, side="right"))
+                for arrays, position, length in zip(listOfArrays, positions, lengths)
+            ]
+            yield store._toFrame(symbols, [
+                {name: column[position:end] for name, column in arrays.items()}
+                for arrays, position, end in zip(listOfArrays, positions, ends)
+            ])
+            positions = ends
+
+    def getDataVersions(self, symbols: List[str], startDate: datetime, endDate: datetime) -> Dict[str, int]:
+        """
+        Retrieves the version of the market data of many symbols over a date range,
+        the number of the latest write of the symbol overlapping it.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            versions (Dict[str, int]): Version keyed by asset symbol, 0 if the range
+            was never written.
+        """
+        start = self._toTime(startDate)
+        end = self._toTime(endDate)
+        versions = {}
+        for symbol in symbols:
+            writes = self._getWrites(symbol)
+            overlapping = writes[(writes[:, 1] >= start) & (writes[:, 0] <= end), 2]
+            versions[symbol] = int(overlapping.max()) if len(overlapping) > 0 else 0
+        return versions
+
+    def getGeneration(self) -> int:
+        """
+        Retrieves the generation of the stored market data, the size of a file every
+        write of any symbol appends a byte to, so it needs no lock across processes.
+
+        Returns:
+            generation (int): The generation, 0 if nothing was ever written.
+        """
+        try:
+            return os.stat(os.path.join(self.rootPath, GENERATION_FILE)).st_size
+        except FileNotFoundError:
+            return 0
+
+    def getCoverage(self, symbol: str) -> List[Tuple[datetime, datetime]]:
+        """
+        Retrieves the date ranges of a symbol already checked for missing data.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+
+        Returns:
+            coverage (List[Tuple[datetime, datetime]]): Disjoint inclusive (start, end)
+            date ranges sorted by start date.
+        """
+        path = os.path.join(self._getSymbolPath(symbol), "coverage.npy")
+        if not os.path.isfile(path):
+            return []
+        return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in np.load(path)]
+
+    def addCoverage(self, symbol: str, startDate: datetime, endDate: datetime):
+        """
+        Records a date range of a symbol as checked for missing data, merging it with
+        the ranges it overlaps or touches. Ranges are stored as an (n, 2) array of
+        int64 nanoseconds since the epoch.
+
+        Parameters:
+            symbol (str): The asset symbol that was checked.
+            startDate (datetime): The start date of the checked range, inclusive.
+            endDate (datetime): The end date of the checked range, inclusive.
+        """
+        symbolPath = self._getSymbolPath(symbol)
+        # Read and replaced under the lock, so concurrent checks of a symbol all stay recorded
+        with self._getLock(symbol):
+            coverage = mergeRanges([*self.getCoverage(symbol), (startDate, endDate)])
+            os.makedirs(symbolPath, exist_ok=True)
+            path = os.path.join(symbolPath, "coverage.npy")
+            temporaryPath = path + ".tmp"
+            with open(temporaryPath, "wb") as file:
+                np.save(file, np.array([[start.value, end.value] for start, end in coverage], dtype=np.int64))
+            os.replace(temporaryPath, path)
+
+    def _getWrites(self, symbol: str) -> np.ndarray:
+        """
+        A private method to retrieve the writes of a symbol's data.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+
+        Returns:
+            writes (ndarray): An (n, 3) int64 array of the first and last date written
+            in nanoseconds since the epoch and the version of every write.
+        """
+        path = os.path.join(self._getSymbolPath(symbol), "writes.npy")
+        if not os.path.isfile(path):
+            return np.empty((0, 3), dtype=np.int64)
+        return np.load(path)
+
+    def _addWrite(self, symbol: str, startDate: datetime, endDate: datetime):
+        """
+        A private method to record a write of a symbol's data, numbered one after
+        the latest write of the symbol, must hold the lock of the symbol.
+
+        Parameters:
+            symbol (str): The asset symbol written.
+            startDate (datetime): The first date written.
+            endDate (datetime): The last date written.
+        """
+        writes = self._getWrites(symbol)
+        version = int(writes[:, 2].max()) + 1 if len(writes) > 0 else 1
+        writes = np.vstack([writes, [[pd.Timestamp(startDate).value, pd.Timestamp(endDate).value, version]]])
+        symbolPath = self._getSymbolPath(symbol)
+        os.makedirs(symbolPath, exist_ok=True)
+        path = os.path.join(symbolPath, "writes.npy")
+        temporaryPath = path + ".tmp"
+        with open(temporaryPath, "wb") as file:
+            np.save(file, writes.astype(np.int64))
+        os.replace(temporaryPath, path)
+        # Appends are atomic, concurrent writers each add their byte
+        with open(os.path.join(self.rootPath, GENERATION_FILE), "ab") as file:
+            file.write(b"\n")
+
+    def close(self):
+        """
+        Releases the memory maps.
+        """
+        self._maps.clear()
+        for store in self._stores.values():
+            store.close()
+
+    def _getStore(self, interval: Interval) -> "ColumnarDB":
+        """
+        A private method to open the store of the bars of an interval.
+
+        Parameters:
+            interval (Interval): Interval of the bars.
+
+        Returns:
+            store (ColumnarDB): This store for its own interval, otherwise the store
+            under "bars/<interval>".
+        """
+        if interval == self.interval:
+            return self
+        store = self._stores.get(interval)
+        if store is None:
+            store = self._stores[interval] = ColumnarDB(os.path.join(self.rootPath, "bars", interval), interval)
+        return store
+
+    def _toTime(self, time: datetime) -> int:
+        """
+        A private method to convert a bound of a range into the stored time.
+
+        Parameters:
+            time (datetime): A date or time.
+
+        Returns:
+            time (int): Nanoseconds since the epoch, of the date at midnight for "1d".
+        """
+        time = pd.Timestamp(time)
+        return (time.normalize() if self.interval == "1d" else time).value
+
+    def _open(self, symbol: str):
+        """
+        A private method to memory map every column of a symbol.
+
+        Parameters:
+            symbol (str): The asset symbol to open.
+
+        Returns:
+            columns (Dict[str, memmap]): The mapped columns keyed by on-disk name,
+            None if the symbol isn't stored.
+        """
+        columns = self._maps.get(symbol)
+        if columns is None:
+            symbolPath = self._getSymbolPath(symbol)
+            # Mapped under the lock so every column is of the same write
+            with self._getLock(symbol):
+                if not os.path.isfile(os.path.join(symbolPath, "date.npy")):
+                    return None
+                columns = {}
+                for name in ["date", *COLUMNS]:
+                    columns[name] = np.load(os.path.join(symbolPath, f"{name}.npy"), mmap_mode="r")
+            self._maps[symbol] = columns
+        return columns
+
+    def _getSymbolPath(self, symbol: str) -> str:
+        """
+        A private method to find the directory of a symbol, rejecting symbols that
+        aren't safe to use as a directory name.
+
+        Parameters:
+            symbol (str): The asset symbol.
+
+        Returns:
+            symbolPath (str): Directory of the symbol's files.
+        """
+        if not isinstance(symbol, str) or not SYMBOL_PATTERN.fullmatch(symbol):
+            raise ValueError(f"Invalid symbol: {symbol!r}")
+        return os.path.join(self.rootPath, symbol)
+
+    def _getLock(self, symbol: str) -> threading.RLock:
+        """
+        A private method to retrieve the lock serializing the writes of a symbol's
+        files across every ColumnarDB of the process.
+
+        Parameters:
+            symbol (str): The asset symbol.
+
+        Returns:
+            lock (RLock): The lock of the symbol's directory.
+        """
+        key = os.path.abspath(self._getSymbolPath(symbol))
+        with _symbolLocksLock:
+            lock = _symbolLocks.get(key)
+            if lock is None:
+                lock = _symbolLocks[key] = threading.RLock()
+        return lock
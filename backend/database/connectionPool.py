@@ -0,0 +1,236 @@
+import atexit
+from concurrent.futures import Future
+from contextlib import contextmanager
+import os
+import queue
+import sqlite3
+import threading
+from typing import Any, Callable, Dict, Iterator, List, Optional
+
+
+# Applied to every connection, WAL lets readers run while the writer commits
+PRAGMAS = {
+    "synchronous": "NORMAL", # with WAL only checkpoints wait for the disk
+    "cache_size": -64 * 1024, # KiB of page cache per connection
+    "mmap_size": 256 * 1024 * 1024, # bytes of the file read through memory mapping
+    "temp_store": "MEMORY",
+    "busy_timeout": 10000 # milliseconds waited for a lock held by another process
+}
+MAX_READERS = 8
+# Prepared statements kept per connection
+CACHED_STATEMENTS = 256
+# Queued writes committed in one transaction at most
+WRITE_BATCH_SIZE = 64
+
+class ConnectionPool:
+    def __init__(self, path: str, setup: Optional[Callable[[sqlite3.Connection], None]] = None, maxReaders: int = MAX_READERS):
+        """
+        Initializes a pool of connections to one SQLite database in WAL mode. Read
+        connections are reused across requests and threads, and every write goes
+        through a single writer thread, committing the writes queued meanwhile in
+        one transaction.
+
+        Parameters:
+            path (str): The file path of the SQLite database.
+            setup (Callable[[Connection], None]): Creates the schema, run once when
+            the pool is created.
+            maxReaders (int): Maximum number of read connections open at once.
+        """
+        self.path = path
+        self._maxReaders = maxReaders
+        self._idle: List[sqlite3.Connection] = []
+        self._readers = 0
+        self._condition = threading.Condition()
+        self._writes: "queue.Queue[Optional[tuple]]" = queue.Queue()
+        self._writer: Optional[threading.Thread] = None
+        self._closed = False
+
+        connection = self._connect()
+        try:
+            # Persistent in the database file
+            connection.execute("PRAGMA journal_mode=WAL")
+            if setup is not None:
+                with connection:
+                    setup(connection)
+        finally:
+            connection.close()
+
+    def _connect(self) -> sqlite3.Connection:
+        """
+        A private method to open a connection with the pool's pragmas.
+
+        Returns:
+            connection (Connection): The new connection, usable from any thread.
+        """
+        connection = sqlite3.connect(self.path, check_same_thread=False, cached_statements=CACHED_STATEMENTS)
+        for name, value in PRAGMAS.items():
+            connection.execute(f"PRAGMA {name}={value}")
+        return connection
+
+    @contextmanager
+    def read(self) -> Iterator[sqlite3.Connection]:
+        """
+        Borrows a read connection, waiting for one when every connection is in use.
+
+        Returns:
+            connection (Iterator[Connection]): The connection, returned to the pool
+            after the with block.
+        """
+        with self._condition:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Connection pool of {self.path} is closed")
+            while not self._idle and self._readers >= self._maxReaders:
+                self._condition.wait()
+            if self._idle:
+                connection = self._idle.pop()
+            else:
+                self._readers += 1
+                connection = None
+        if connection is None:
+            try:
+                connection = self._connect()
+            except BaseException:
+                with self._condition:
+                    self._readers -= 1
+                    self._condition.notify()
+                raise
+        try:
+            yield connection
+        finally:
+            # Don't hand out a connection in the middle of a transaction
+            if connection.in_transaction:
+                connection.rollback()
+            with self._condition:
+                if self._closed:
+                    connection.close()
+                    self._readers -= 1
+                else:
+                    self._idle.append(connection)
+                self._condition.notify()
+
+    def write(self, function: Callable[[sqlite3.Connection], Any]) -> Any:
+        """
+        Runs a write on the writer thread and waits for it to be committed. Writes
+        queued together are committed in one transaction, a write that fails is
+        retried alone so it doesn't undo the others.
+
+        Parameters:
+            function (Callable[[Connection], Any]): Executes the statements of the
+            write on the writer's connection, without committing.
+
+        Returns:
+            result (Any): The return value of function.
+        """
+        future = Future()
+        with self._condition:
+            if self._closed:
+                raise sqlite3.ProgrammingError(f"Connection pool of {self.path} is closed")
+            if self._writer is None:
+                self._writer = threading.Thread(target=self._runWriter, name="sqlite-writer", daemon=True)
+                self._writer.start()
+            self._writes.put((function, future))
+        return future.result()
+
+    def _runWriter(self):
+        """
+        A private method running the writer thread until the pool is closed.
+        """
+        connection = self._connect()
+        try:
+            running = True
+            while running:
+                batch = [self._writes.get()]
+                while len(batch) < WRITE_BATCH_SIZE:
+                    try:
+                        batch.append(self._writes.get_nowait())
+                    except queue.Empty:
+                        break
+                if None in batch:
+                    running = False
+                    batch = [write for write in batch if write is not None]
+                if not batch:
+                    continue
+                try:
+                    with connection:
+                        results = [function(connection) for function, _ in batch]
+                except Exception:
+                    for function, future in batch:
+                        try:
+                            with connection:
+                                future.set_result(function(connection))
+                        except Exception as error:
+                            future.set_exception(error)
+                else:
+                    for (_, future), result in zip(batch, results):
+                        future.set_result(result)
+        finally:
+            connection.close()
+
+    def close(self):
+        """
+        Commits the queued writes and closes every connection. Connections still
+        borrowed are closed when returned.
+        """
+        with self._condition:
+            if self._closed:
+                return
+            self._closed = True
+            writer = self._writer
+            if writer is not None:
+                self._writes.put(None)
+            idle = self._idle
+            self._readers -= len(idle)
+            self._idle = []
+            self._condition.notify_all()
+        if writer is not None:
+            writer.join()
+        for connection in idle:
+            connection.close()
+
+_pools: Dict[str, ConnectionPool] = {}
+_poolsLock = threading.Lock()
+
+def getPool(path: str, setup: Optional[Callable[[sqlite3.Connection], None]] = None) -> ConnectionPool:
+    """
+    Retrieves the process-wide connection pool of a database file, creating it and
+    its schema on first use.
+
+    Parameters:
+        path (str): The file path of the SQLite database.
+        setup (Callable[[Connection], None]): Creates the schema when the pool is created.
+
+    Returns:
+        pool (ConnectionPool): The pool of the database file.
+    """
+    key = os.path.abspath(path)
+    with _poolsLock:
+        pool = _pools.get(key)
+        if pool is None:
+            pool = _pools[key] = ConnectionPool(key, setup)
+        return pool
+
+def closePool(path: str):
+    """
+    Closes the connection pool of a database file, if open. Needed before the file
+    is replaced or deleted.
+
+    Parameters:
+        path (str): The file path of the SQLite database.
+    """
+    with _poolsLock:
+        pool = _pools.pop(os.path.abspath(path), None)
+    if pool is not None:
+        pool.close()
+
+def closePools():
+    """
+    Closes every connection pool of the process.
+    """
+    with _poolsLock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.close()
+
+# Commit queued writes and checkpoint the WAL on exit
+atexit.register(closePools)
@@ -0,0 +1,25 @@
+from datetime import timedelta
+from typing import List, Tuple
+
+import pandas as pd
+
+
+def mergeRanges(ranges: List[Tuple[pd.Timestamp, pd.Timestamp]]) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+    """
+    Combines inclusive date ranges that overlap or touch into the fewest ranges.
+
+    Parameters:
+        ranges (List[Tuple[Timestamp, Timestamp]]): Inclusive (start, end) date ranges
+        in any order.
+
+    Returns:
+        merged (List[Tuple[Timestamp, Timestamp]]): Disjoint inclusive date ranges
+        sorted by start date.
+    """
+    merged = []
+    for start, end in sorted((pd.Timestamp(start).normalize(), pd.Timestamp(end).normalize()) for start, end in ranges):
+        if merged and start <= merged[-1][1] + timedelta(days=1):
+            merged[-1] = (merged[-1][0], max(merged[-1][1], end))
+        else:
+            merged.append((start, end))
+    return merged
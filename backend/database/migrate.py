@@ -0,0 +1,49 @@
+import argparse
+import os
+
+import pandas as pd
+
+from database.backends import getDataPath
+from database.base import DBInterface
+from database.columnarDB import ColumnarDB
+from database.sqLiteDB import SQLiteDB
+
+
+def migrate(source: DBInterface, target: DBInterface) -> int:
+    """
+    Copies the market data and checked date ranges of every symbol from one database to another.
+
+    Parameters:
+        source (DBInterface): Database to copy from.
+        target (DBInterface): Database to copy into, existing rows on the same dates are replaced.
+
+    Returns:
+        symbols (int): Number of symbols copied.
+    """
+    symbols = source.getSymbols()
+    for symbol in symbols:
+        data = source.getDataRange(symbol, pd.Timestamp("1900-01-01"), pd.Timestamp("2200-01-01"))
+        if not data.empty:
+            target.setData(symbol, data.drop(columns="Symbol"))
+        for start, end in source.getCoverage(symbol):
+            target.addCoverage(symbol, start, end)
+    return len(symbols)
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Copy the symbol_data SQLite table into the columnar store.")
+
+    parser.add_argument("--source", type=str, default=os.path.join(getDataPath(), "symbol_data.db"))
+    parser.add_argument("--target", type=str, default=os.path.join(getDataPath(), "columnar"))
+
+    args = parser.parse_args()
+
+    if not os.path.isfile(args.source):
+        print(f"Error: {args.source} does not exist.")
+        exit(1)
+
+    source = SQLiteDB(args.source)
+    target = ColumnarDB(args.target)
+    count = migrate(source, target)
+    source.close()
+    target.close()
+    print(f"Migrated {count} symbols to {args.target}")
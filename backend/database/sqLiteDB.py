@@ -1,27 +1,61 @@
 from datetime import datetime
 import sqlite3
+from typing import Dict, Iterator, List, Tuple
 
+import numpy as np
 from pandas import DataFrame
 import pandas as pd
 
+from database.base import DEFAULT_CHUNK_ROWS, Interval
+from database.connectionPool import getPool
+from database.coverage import mergeRanges
+
+
+# SQLite limits the number of parameters of a single query
+MAX_SYMBOLS_PER_QUERY = 512
+
+def padSymbols(symbols: List[str]) -> List[str]:
+    """
+    Pads a list of symbols to the next power of two by repeating the last one, so
+    queries with an IN list share a few prepared statements.
+
+    Parameters:
+        symbols (List[str]): The symbols of one query.
+
+    Returns:
+        symbols (List[str]): The padded symbols.
+    """
+    if not symbols:
+        return symbols
+    size = 1 << (len(symbols) - 1).bit_length()
+    return symbols + [symbols[-1]] * (size - len(symbols))
 
 class SQLiteDB():
     def __init__(self, dbPath: str):
         """
-        Initializes the database connection and creates the necessary table.
+        Initializes the database on the process-wide connection pool of its file,
+        creating the necessary tables the first time the file is opened.
 
         Parameters:
             dbPath (str): The file path for the SQLite database.
         """
-        self.con = sqlite3.connect(dbPath)
-        self._createTable()
+        self._pool = getPool(dbPath, self._createTable)
 
-    def _createTable(self):
+    def _createTable(self, connection: sqlite3.Connection):
         """
-        A private method to create the 'symbol_data' table if it doesn't exist.
-        
-        This table stores the historical OHLCV (Open, High, Low, Close, Volume)
-        data for each symbol.
+        A private method to create the 'symbol_data', 'symbol_bars', 'symbol_coverage' and
+        'symbol_writes' tables if they don't exist.
+
+        The 'symbol_data' table stores the historical OHLCV (Open, High, Low, Close, Volume)
+        data for each symbol. The 'symbol_bars' table stores intraday OHLCV bars keyed by
+        interval and the timestamp each bar starts at in nanoseconds since the epoch, in
+        time order so bars of many symbols are read in one index scan. The
+        'symbol_coverage' table stores the date ranges of each symbol already checked for
+        missing data. The 'symbol_writes' table stores the date range of every write of a
+        symbol's data, numbered in the order they were made.
+
+        Parameters:
+            connection (Connection): Connection of the pool being created.
         """
         query = """
         CREATE TABLE IF NOT EXISTS symbol_data (
@@ -36,8 +70,52 @@ class SQLiteDB():
             PRIMARY KEY (symbol, date)
         );
         """
-        with self.con:
-            self.con.execute(query)
+        barsQuery = """
+        CREATE TABLE IF NOT EXISTS symbol_bars (
+            interval TEXT NOT NULL, 
+            timestamp INTEGER NOT NULL, 
+            symbol TEXT NOT NULL, 
+            open REAL, 
+            high REAL, 
+            low REAL, 
+            close REAL, 
+            adjusted_close REAL, 
+            volume INTEGER, 
+            PRIMARY KEY (interval, timestamp, symbol)
+        ) WITHOUT ROWID;
+        """
+        coverageQuery = """
+        CREATE TABLE IF NOT EXISTS symbol_coverage (
+            symbol TEXT NOT NULL, 
+            start_date TEXT NOT NULL, 
+            end_date TEXT NOT NULL, 
+            PRIMARY KEY (symbol, start_date)
+        );
+        """
+        writesQuery = """
+        CREATE TABLE IF NOT EXISTS symbol_writes (
+            version INTEGER PRIMARY KEY AUTOINCREMENT, 
+            symbol TEXT NOT NULL, 
+            start_date TEXT NOT NULL, 
+            end_date TEXT NOT NULL
+        );
+        """
+        connection.execute(query)
+        connection.execute(barsQuery)
+        connection.execute(coverageQuery)
+        connection.execute(writesQuery)
+        connection.execute("CREATE INDEX IF NOT EXISTS symbol_writes_symbol ON symbol_writes (symbol, end_date)")
+
+    def getSymbols(self) -> List[str]:
+        """
+        Retrieves every symbol with stored market data.
+
+        Returns:
+            symbols (List[str]): The stored symbols, sorted.
+        """
+        query = "SELECT DISTINCT symbol FROM symbol_data ORDER BY symbol"
+        with self._pool.read() as connection:
+            return [row[0] for row in connection.execute(query)]
 
     def getData(self, symbol: str, date: datetime) -> DataFrame:
         """
@@ -53,7 +131,8 @@ class SQLiteDB():
         """
         dateString = date.strftime("%Y-%m-%d")
         query = "SELECT * FROM symbol_data WHERE symbol = ? AND date = ?"
-        data = pd.read_sql_query(query, self.con, params=(symbol, dateString))
+        with self._pool.read() as connection:
+            data = pd.read_sql_query(query, connection, params=(symbol, dateString))
         data.rename(
             columns={
                 "date": "Date",
@@ -94,7 +173,8 @@ class SQLiteDB():
         WHERE symbol = ? AND date BETWEEN ? AND ? 
         ORDER BY date ASC
         """
-        data = pd.read_sql_query(query, self.con, params=(symbol, startDateString, endDateString))
+        with self._pool.read() as connection:
+            data = pd.read_sql_query(query, connection, params=(symbol, startDateString, endDateString))
         data.rename(
             columns={
                 "date": "Date",
@@ -114,6 +194,56 @@ class SQLiteDB():
             data.index = data.index.tz_localize(None)
         return data
 
+    def getDataRangeMany(self, symbols: List[str], startDate: datetime, endDate: datetime) -> DataFrame:
+        """
+        Retrieves market data for many symbols over a specified date range, with one
+        indexed query per chunk of symbols.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the data for the
+            symbols within the date range, with a sorted (Date, Symbol) MultiIndex.
+        """
+        startDateString = startDate.strftime("%Y-%m-%d")
+        endDateString = endDate.strftime("%Y-%m-%d")
+        listOfData = []
+        with self._pool.read() as connection:
+            for chunkStart in range(0, max(len(symbols), 1), MAX_SYMBOLS_PER_QUERY):
+                chunk = padSymbols(symbols[chunkStart:chunkStart + MAX_SYMBOLS_PER_QUERY])
+                placeholders = ", ".join("?" * len(chunk))
+                query = f"""
+                SELECT * FROM symbol_data 
+                WHERE symbol IN ({placeholders}) AND date BETWEEN ? AND ? 
+                ORDER BY date ASC, symbol ASC
+                """
+                listOfData.append(pd.read_sql_query(query, connection, params=(*chunk, startDateString, endDateString)))
+        data = pd.concat(listOfData) if len(listOfData) > 1 else listOfData[0]
+        data.rename(
+            columns={
+                "date": "Date",
+                "symbol": "Symbol",
+                "open" : "Open",
+                "high": "High",
+                "low": "Low",
+                "close": "Close",
+                "adjusted_close": "Adj Close",
+                "volume": "Volume"
+            },
+            inplace=True
+        )
+        data["Date"] = pd.to_datetime(data["Date"])
+        if data["Date"].dt.tz is not None:
+            data["Date"] = data["Date"].dt.tz_localize(None)
+        data = data.set_index(["Date", "Symbol"])
+        # Each chunk is sorted on its own
+        if len(listOfData) > 1:
+            data = data.sort_index()
+        return data
+
     def setData(self, symbol: str, data: DataFrame):
         """
         Inserts or replaces market data for a symbol from a pandas DataFrame.
@@ -123,9 +253,54 @@ class SQLiteDB():
             data (DataFrame): A pandas DataFrame containing OHLCV data. It must
             have a datetime index.
         """
+        self.setDataMany({symbol: data})
+
+    def setDataMany(self, dataBySymbol: Dict[str, DataFrame]):
+        """
+        Inserts or replaces market data for many symbols in a single transaction,
+        committed by the writer of the connection pool.
+
+        Parameters:
+            dataBySymbol (Dict[str, DataFrame]): Pandas DataFrames containing OHLCV data
+            keyed by their asset symbol. They must have a datetime index.
+        """
+        records = []
+        writes = []
+        for symbol, data in dataBySymbol.items():
+            symbolRecords = self._toRecords(symbol, data)
+            if symbolRecords:
+                dates = [record[1] for record in symbolRecords]
+                writes.append((symbol, min(dates), max(dates)))
+            records.extend(symbolRecords)
+        query = """
+        INSERT OR REPLACE INTO symbol_data (symbol, date, open, high, low, close, adjusted_close, volume) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        """
+
+        def write(connection: sqlite3.Connection):
+            connection.executemany(query, records)
+            connection.executemany("INSERT INTO symbol_writes (symbol, start_date, end_date) VALUES (?, ?, ?)", writes)
+
+        self._pool.write(write)
+
+    def _toRecords(self, symbol: str, data: DataFrame, timestamps: bool = False) -> List[tuple]:
+        """
+        A private method to convert market data of a symbol into rows of the 'symbol_data' table.
+
+        Parameters:
+            symbol (str): The asset symbol of the data.
+            data (DataFrame): A pandas DataFrame containing OHLCV data. It must
+            have a datetime index.
+            timestamps (bool): Keep the time of every row as nanoseconds since the
+            epoch, for the 'symbol_bars' table, instead of a YYYY-MM-DD date.
+
+        Returns:
+            records (List[tuple]): Rows in the column order of the table.
+        """
         data = data.copy()
         if data.index.tz is not None:
             data.index = data.index.tz_localize(None)
+        data.index.name = "Date"
         data.reset_index(inplace=True)
         data["Symbol"] = symbol
         if "Adj Close" not in data.columns:
@@ -143,7 +318,10 @@ class SQLiteDB():
             },
             inplace=True
         )
-        data["date"] = data["date"].dt.strftime("%Y-%m-%d")
+        if timestamps:
+            data["date"] = data["date"].to_numpy(dtype="datetime64[ns]").astype(np.int64)
+        else:
+            data["date"] = data["date"].dt.strftime("%Y-%m-%d")
 
         columns = [
             "symbol",
@@ -155,19 +333,240 @@ class SQLiteDB():
             "adjusted_close",
             "volume"
         ]
-        records = data[columns].to_records(index=False).tolist()
+        return data[columns].to_records(index=False).tolist()
+
+    def setBarsMany(self, interval: Interval, dataBySymbol: Dict[str, DataFrame]):
+        """
+        Inserts or replaces bars of an interval for many symbols in a single transaction,
+        keyed by the timestamp each bar starts at. Daily bars are stored like setDataMany.
+
+        Parameters:
+            interval (Interval): Interval of the bars.
+            dataBySymbol (Dict[str, DataFrame]): Pandas DataFrames containing OHLCV data
+            keyed by their asset symbol. They must have a datetime index.
+        """
+        if interval == "1d":
+            self.setDataMany(dataBySymbol)
+            return
+        records = []
+        for symbol, data in dataBySymbol.items():
+            symbolRecords = self._toRecords(symbol, data, timestamps=True)
+            records.extend((interval, *record) for record in symbolRecords)
         query = """
-        INSERT OR REPLACE INTO symbol_data (symbol, date, open, high, low, close, adjusted_close, volume) 
-        VALUES (?, ?, ?, ?, ?, ?, ?, ?)
+        INSERT OR REPLACE INTO symbol_bars (interval, symbol, timestamp, open, high, low, close, adjusted_close, volume) 
+        VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)
+        """
+        self._pool.write(lambda connection: connection.executemany(query, records))
+
+    def getBarsRangeMany(self, symbols: List[str], interval: Interval, startTime: datetime, endTime: datetime) -> DataFrame:
+        """
+        Retrieves bars of an interval for many symbols over a time range at once.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing the bars of the symbols
+            within the time range, with a sorted (Date, Symbol) MultiIndex holding the
+            timestamp of every bar.
+        """
+        if interval == "1d":
+            return self.getDataRangeMany(symbols, startTime, endTime)
+        query, params = self._getBarsQuery(symbols, interval, startTime, endTime)
+        with self._pool.read() as connection:
+            rows = connection.execute(query, params).fetchall()
+        return self._toBars(rows, interval, symbols)
+
+    def iterBars(
+            self,
+            symbols: List[str],
+            interval: Interval,
+            startTime: datetime,
+            endTime: datetime,
+            chunkRows: int = DEFAULT_CHUNK_ROWS
+        ) -> Iterator[DataFrame]:
+        """
+        Streams bars of an interval for many symbols over a time range in time order,
+        fetching chunkRows rows of one query at a time. The read connection is held
+        until the stream is exhausted or closed, so every chunk comes from the same
+        snapshot of the database.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+            chunkRows (int): Rows to fetch per chunk.
+
+        Returns:
+            chunks (Iterator[DataFrame]): Consecutive chunks like getBarsRangeMany
+            returns, each holding every symbol's bar of the timestamps it covers.
+        """
+        query, params = self._getBarsQuery(symbols, interval, startTime, endTime)
+        with self._pool.read() as connection:
+            cursor = connection.execute(query, params)
+            pending = []
+            while True:
+                fetched = cursor.fetchmany(chunkRows)
+                if not fetched:
+                    break
+                rows = pending + fetched
+                # Rows of the last timestamp may continue in the next fetch, unless this was the last
+                cut = len(rows)
+                while len(fetched) == chunkRows and cut > 0 and rows[cut - 1][0] == rows[-1][0]:
+                    cut -= 1
+                pending = rows[cut:]
+                if cut > 0:
+                    chunk = self._toBars(rows[:cut], interval, symbols)
+                    if len(chunk) > 0:
+                        yield chunk
+            if pending:
+                chunk = self._toBars(pending, interval, symbols)
+                if len(chunk) > 0:
+                    yield chunk
+
+    def _getBarsQuery(self, symbols: List[str], interval: Interval, startTime: datetime, endTime: datetime) -> Tuple[str, tuple]:
+        """
+        A private method to build the query of bars of many symbols in time order.
+        Daily bars are read from 'symbol_data', other intervals from 'symbol_bars'.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query, filtered afterwards by
+            _toBars when there are too many for one query.
+            interval (Interval): Interval of the bars.
+            startTime (datetime): The start of the time range, inclusive.
+            endTime (datetime): The end of the time range, inclusive.
+
+        Returns:
+            query (Tuple[str, tuple]): The query and its parameters.
+        """
+        if interval == "1d":
+            table = "symbol_data"
+            timeColumn = "date"
+            params = ()
+            timeRange = (startTime.strftime("%Y-%m-%d"), endTime.strftime("%Y-%m-%d"))
+        else:
+            table = "symbol_bars"
+            timeColumn = "timestamp"
+            params = (interval,)
+            timeRange = (pd.Timestamp(startTime).value, pd.Timestamp(endTime).value)
+        filters = ["interval = ?"] if interval != "1d" else []
+        if len(symbols) <= MAX_SYMBOLS_PER_QUERY:
+            chunk = padSymbols(symbols)
+            filters.append(f"symbol IN ({', '.join('?' * len(chunk))})")
+            params += tuple(chunk)
+        filters.append(f"{timeColumn} BETWEEN ? AND ?")
+        query = f"""
+        SELECT {timeColumn}, symbol, open, high, low, close, adjusted_close, volume FROM {table} 
+        WHERE {" AND ".join(filters)} 
+        ORDER BY {timeColumn} ASC, symbol ASC
+        """
+        return query, params + timeRange
+
+    def _toBars(self, rows: List[tuple], interval: Interval, symbols: List[str]) -> DataFrame:
+        """
+        A private method to convert rows of a bars query into market data.
+
+        Parameters:
+            rows (List[tuple]): Rows of the query built by _getBarsQuery, in time order.
+            interval (Interval): Interval of the bars.
+            symbols (List[str]): The asset symbols queried, other symbols are dropped.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame with a sorted (Date, Symbol) MultiIndex.
+        """
+        data = pd.DataFrame.from_records(rows, columns=["Date", "Symbol", "Open", "High", "Low", "Close", "Adj Close", "Volume"])
+        if len(symbols) > MAX_SYMBOLS_PER_QUERY:
+            data = data[data["Symbol"].isin(symbols)]
+        if interval == "1d":
+            data["Date"] = pd.to_datetime(data["Date"])
+        else:
+            data["Date"] = data["Date"].to_numpy(dtype=np.int64).astype("datetime64[ns]")
+        return data.set_index(["Date", "Symbol"])
+
+    def getDataVersions(self, symbols: List[str], startDate: datetime, endDate: datetime) -> Dict[str, int]:
+        """
+        Retrieves the version of the market data of many symbols over a date range,
+        the number of the latest write overlapping it.
+
+        Parameters:
+            symbols (List[str]): The asset symbols to query.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+
+        Returns:
+            versions (Dict[str, int]): Version keyed by asset symbol, 0 if the range
+            was never written.
+        """
+        startDateString = startDate.strftime("%Y-%m-%d")
+        endDateString = endDate.strftime("%Y-%m-%d")
+        versions = dict.fromkeys(symbols, 0)
+        with self._pool.read() as connection:
+            for chunkStart in range(0, len(symbols), MAX_SYMBOLS_PER_QUERY):
+                chunk = padSymbols(symbols[chunkStart:chunkStart + MAX_SYMBOLS_PER_QUERY])
+                placeholders = ", ".join("?" * len(chunk))
+                query = f"""
+                SELECT symbol, MAX(version) FROM symbol_writes 
+                WHERE symbol IN ({placeholders}) AND end_date >= ? AND start_date <= ? 
+                GROUP BY symbol
+                """
+                for symbol, version in connection.execute(query, (*chunk, startDateString, endDateString)):
+                    versions[symbol] = version
+        return versions
+
+    def getGeneration(self) -> int:
+        """
+        Retrieves the generation of the stored market data, the number of the latest
+        write of any symbol.
+
+        Returns:
+            generation (int): The generation, 0 if nothing was ever written.
+        """
+        with self._pool.read() as connection:
+            version, = connection.execute("SELECT MAX(version) FROM symbol_writes").fetchone()
+        return version or 0
+
+    def getCoverage(self, symbol: str) -> List[Tuple[datetime, datetime]]:
+        """
+        Retrieves the date ranges of a symbol already checked for missing data.
+
+        Parameters:
+            symbol (str): The asset symbol to query.
+
+        Returns:
+            coverage (List[Tuple[datetime, datetime]]): Disjoint inclusive (start, end)
+            date ranges sorted by start date.
+        """
+        query = "SELECT start_date, end_date FROM symbol_coverage WHERE symbol = ? ORDER BY start_date ASC"
+        with self._pool.read() as connection:
+            return [(pd.Timestamp(start), pd.Timestamp(end)) for start, end in connection.execute(query, (symbol,))]
+
+    def addCoverage(self, symbol: str, startDate: datetime, endDate: datetime):
+        """
+        Records a date range of a symbol as checked for missing data, merging it with
+        the ranges it overlaps or touches.
+
+        Parameters:
+            symbol (str): The asset symbol that was checked.
+            startDate (datetime): The start date of the checked range, inclusive.
+            endDate (datetime): The end date of the checked range, inclusive.
         """
-        with self.con:
-            self.con.executemany(query, records)
-            self.con.commit()
+        def write(connection: sqlite3.Connection):
+            # Read and replaced in the same transaction, so concurrent checks of a symbol all stay recorded
+            query = "SELECT start_date, end_date FROM symbol_coverage WHERE symbol = ?"
+            coverage = mergeRanges([*connection.execute(query, (symbol,)), (startDate, endDate)])
+            records = [(symbol, start.strftime("%Y-%m-%d"), end.strftime("%Y-%m-%d")) for start, end in coverage]
+            connection.execute("DELETE FROM symbol_coverage WHERE symbol = ?", (symbol,))
+            connection.executemany("INSERT INTO symbol_coverage (symbol, start_date, end_date) VALUES (?, ?, ?)", records)
 
+        self._pool.write(write)
 
     def close(self):
         """
-        Closes the connection to the SQLite database.
+        Releases the database. The pooled connections stay open for the next
+        SQLiteDB of the same file, see closePool to close them.
         """
-        if self.con:
-            self.con.close()
\ No newline at end of file
+        pass
\ No newline at end of file
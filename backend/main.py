@@ -1,12 +1,26 @@
 from datetime import datetime
-from typing import Any, Dict, List
-from fastapi import FastAPI
+import json
+from typing import Any, Callable, Dict, Iterator, List, Optional, Type, Union
+from fastapi import FastAPI, HTTPException, Query
 from fastapi.middleware.cors import CORSMiddleware
-from pydantic import BaseModel
+from fastapi.responses import PlainTextResponse, StreamingResponse
+import numpy as np
+import pandas as pd
+from pydantic import BaseModel, Field
 
 from core.tradeRequest import Side
-from core.engine import Engine
-from core.strategies.constantPriceThreshold import ConstantPriceThresholdStrategy
+from core.engine import Engine, Mode, StrategyConfig
+from core.jobs import JobQueue, JobStatus
+from core.metrics import METRICS
+from core.profiler import Profiler, stageCounters
+from core.resultCache import getFingerprint, resultCache
+from core.robustness import DEFAULT_RESAMPLES, Method as RobustnessMethod, analyzeRobustness
+from core.sweep import Sweep
+from core.blotter import Blotter
+from core.strategies.base import Strategy
+from core.strategies.registry import strategyRegistry
+from database.base import Interval
+from database.cache import marketDataCache
 
 class BacktestRequest(BaseModel):
     symbols: List[str]
@@ -15,6 +29,8 @@ class BacktestRequest(BaseModel):
     startingCash: float
     strategy: str
     strategyParams: Dict[str, Any]
+    mode: Mode = "linear"
+    interval: Interval = "1d"
 
 class TradeInfo(BaseModel):
     side: Side
@@ -28,11 +44,145 @@ class BacktestResponse(BaseModel):
     annualizedReturn: float
     maxDrawdown: float
     winProbability: float
+    sharpeRatio: float
+    sortinoRatio: float
+    cagr: float
+    volatility: float
+    exposure: float
+    turnover: float
+    averageHoldingPeriod: float
+    totalTrades: int
     trades: List[TradeInfo]
+    profile: Optional[Dict[str, Any]] = None
 
-strategies = {
-    "ConstantPriceThresholdStrategy": ConstantPriceThresholdStrategy
-}
+class JobInfo(BaseModel):
+    jobId: str
+    status: JobStatus
+    progress: float
+    error: Optional[str] = None
+    result: Optional[BacktestResponse] = None
+
+class SweepRequest(BaseModel):
+    symbols: List[str]
+    startDate: datetime
+    endDate: datetime
+    startingCash: float
+    strategy: str
+    paramRanges: Dict[str, Union[List[Any], Dict[str, float]]]
+    rankBy: str = "profitLoss"
+    mode: Mode = "linear"
+    workers: Optional[int] = Field(None, ge=1)
+
+class SweepResult(BaseModel):
+    params: Dict[str, Any]
+    profitLoss: float
+    annualizedReturn: float
+    maxDrawdown: float
+    winProbability: float
+    sharpeRatio: float
+    sortinoRatio: float
+    cagr: float
+    volatility: float
+    exposure: float
+    turnover: float
+    averageHoldingPeriod: float
+    trades: int
+
+class SweepResponse(BaseModel):
+    results: List[SweepResult]
+
+class BatchStrategy(BaseModel):
+    strategy: str
+    strategyParams: Dict[str, Any]
+
+class BatchRequest(BaseModel):
+    symbols: List[str]
+    startDate: datetime
+    endDate: datetime
+    startingCash: float
+    strategies: List[BatchStrategy]
+    mode: Mode = "linear"
+
+class BatchResult(SweepResult):
+    strategy: str
+
+class BatchResponse(BaseModel):
+    results: List[BatchResult]
+
+class WalkForwardRequest(BaseModel):
+    symbols: List[str]
+    startDate: datetime
+    endDate: datetime
+    startingCash: float
+    strategy: str
+    paramRanges: Dict[str, Union[List[Any], Dict[str, float]]]
+    trainBars: int
+    testBars: int
+    stepBars: Optional[int] = None
+    anchored: bool = False
+    rankBy: str = "profitLoss"
+    mode: Mode = "linear"
+    workers: Optional[int] = Field(None, ge=1)
+
+class WalkForwardWindow(BaseModel):
+    trainStart: datetime
+    trainEnd: datetime
+    testStart: datetime
+    testEnd: datetime
+    train: SweepResult
+    test: SweepResult
+
+class WalkForwardResponse(BaseModel):
+    windows: List[WalkForwardWindow]
+    testProfitLoss: float
+
+class RobustnessRequest(BaseModel):
+    symbols: List[str]
+    startDate: datetime
+    endDate: datetime
+    startingCash: float
+    strategy: str
+    strategyParams: Dict[str, Any]
+    mode: Mode = "linear"
+    method: RobustnessMethod = "block"
+    resamples: int = DEFAULT_RESAMPLES
+    confidence: float = 0.95
+    blockSize: Optional[int] = None
+    seed: Optional[int] = None
+
+class ConfidenceInterval(BaseModel):
+    lower: float
+    median: float
+    upper: float
+    mean: float
+
+class RobustnessResponse(BaseModel):
+    metrics: Dict[str, float]
+    intervals: Dict[str, ConfidenceInterval]
+
+class StrategyParameter(BaseModel):
+    name: str
+    type: Optional[str] = None
+    default: Optional[Any] = None
+    required: bool
+    description: Optional[str] = None
+
+class StrategyInfo(BaseModel):
+    name: str
+    description: Optional[str] = None
+    lookback: Optional[int] = None
+    vectorized: bool
+    parameters: List[StrategyParameter]
+
+class StrategiesResponse(BaseModel):
+    strategies: List[StrategyInfo]
+
+jobQueue = JobQueue()
+
+# Trades serialized per chunk of a streamed response
+TRADE_BATCH_SIZE = 10000
+# Resamples of one robustness request at most
+MAX_RESAMPLES = 100000
 
 app = FastAPI()
 
@@ -52,46 +202,548 @@ app.add_middleware(
 async def root():
     return {"message": "Backend running"}
 
-@app.post("/api/backtest", response_model=BacktestResponse)
-async def backtest(params: BacktestRequest):
+def getStrategyClass(name: str) -> Type[Strategy]:
     """
-    Post endpoint to run backtest with specified parameters.
+    Retrieves the class of a requested strategy, importing it on first use.
 
     Parameters:
-        param (BacktestRequest): Parameters for backtest.
+        name (str): Name of the strategy.
+
+    Returns:
+        strategyClass (Type[Strategy]): The strategy class, HTTP 400 if it doesn't exist.
+    """
+    if name not in strategyRegistry:
+        raise HTTPException(status_code=400, detail=f"Unknown strategy: {name}")
+    return strategyRegistry.get(name)
+
+def executeBacktest(
+        params: BacktestRequest,
+        progress: Optional[Callable[[int, int], None]] = None,
+        profiler: Optional[Profiler] = None,
+        useCache: bool = True
+    ) -> Dict[str, Any]:
+    """
+    Runs a backtest with the parameters of a request. The results of a request
+    already run on the same market data and strategy code are read from the result
+    cache instead, intraday bars aren't versioned so their results aren't cached.
+    Stages of a run are always profiled so they are counted by the /metrics endpoint.
+
+    Parameters:
+        params (BacktestRequest): Parameters for backtest.
+        progress (Callable[[int, int], None]): Called with the bars done and the
+        total bars as the backtest advances.
+        profiler (Profiler): Profiler recording the backtest, a coarse one by default.
+        useCache (bool): Read and store the results in the result cache.
+
+    Returns:
+        results (Dict[str, Any]): The metrics of the backtest and its trades as a
+        Blotter under "trades".
     """
-    # Run backtest with parameters
+    strategyClass = strategyRegistry.get(params.strategy)
+    key = None
+    if useCache and params.interval == "1d":
+        dataVersions = Engine.getDataVersions(params.symbols, params.startDate, params.endDate)
+        key = getFingerprint(params.model_dump(mode="json"), strategyClass, dataVersions)
+        results = resultCache.get(key)
+        if results is not None:
+            if progress:
+                progress(1, 1)
+            return results
+
     backtestResults = Engine.runBacktest(
         symbols=params.symbols,
         startDate=params.startDate,
         endDate=params.endDate,
         startingCash=params.startingCash,
-        strategyClass=strategies[params.strategy],
+        strategyClass=strategyClass,
         strategyParams=params.strategyParams,
+        mode=params.mode,
+        progress=progress,
+        profiler=profiler or Profiler(),
+        interval=params.interval
     )
-    metrics = [
-        "profitLoss",
-        "annualizedReturn",
-        "maxDrawdown",
-        "winProbability"
-    ]
-    # Assign metrics to ouput
-    output = {
-        metrics[0]: backtestResults[metrics[0]],
-        metrics[1]: backtestResults[metrics[1]],
-        metrics[2]: backtestResults[metrics[2]],
-        metrics[3]: backtestResults[metrics[3]],
-        "trades": []
-    }
-    # Add trades made during backtest ot ouput
-    for trade in backtestResults["portfolio"].getTrades():
-        tradeInfo = {
-            "side": trade.side,
-            "symbol": trade.symbol,
-            "shares": trade.shares,
-            "price": trade.sharePrice,
-            "time": trade.timestamp
+    results = {metric: backtestResults[metric] for metric in METRICS}
+    results["trades"] = backtestResults["portfolio"].getTrades()
+    # Data written during the run, such as missing days fetched, isn't what the key was built from
+    if key is not None and Engine.getDataVersions(params.symbols, params.startDate, params.endDate) == dataVersions:
+        resultCache.put(key, results)
+    return results
+
+def getSummary(backtestResults: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Converts the metrics of a backtest into the API output.
+
+    Parameters:
+        backtestResults (Dict[str, Any]): Results returned by executeBacktest.
+
+    Returns:
+        summary (Dict[str, Any]): Metrics, the number of trades and the profile if
+        one was requested, matching BacktestResponse without trades.
+    """
+    summary = {metric: backtestResults[metric] for metric in METRICS}
+    summary["totalTrades"] = len(backtestResults["trades"])
+    if "profile" in backtestResults:
+        summary["profile"] = backtestResults["profile"]
+    return summary
+
+def getTradeInfo(trades: Blotter, start: int = 0, end: Optional[int] = None) -> List[Dict[str, Any]]:
+    """
+    Converts a range of trades into the API output, reading the trade columns.
+
+    Parameters:
+        trades (Blotter): Trades made during backtest.
+        start (int): First trade, inclusive.
+        end (int): Last trade, exclusive, None for every trade after start.
+
+    Returns:
+        tradeInfo (List[Dict[str, Any]]): Trades matching TradeInfo.
+    """
+    arrays = trades.getArrays(start, end)
+    symbols = trades.getSymbols()
+    # Dates repeat across trades, convert each once
+    uniqueTimes, timeIds = np.unique(arrays["time"], return_inverse=True)
+    times = list(pd.DatetimeIndex(uniqueTimes))
+    return [
+        {
+            "side": "BUY" if buy else "SELL",
+            "symbol": symbols[symbolId],
+            "shares": shares,
+            "price": price,
+            "time": times[timeId]
         }
-        output["trades"].append(tradeInfo)
+        for symbolId, buy, shares, price, timeId in zip(
+            arrays["symbol"].tolist(),
+            arrays["buy"].tolist(),
+            arrays["shares"].tolist(),
+            arrays["price"].tolist(),
+            timeIds.tolist()
+        )
+    ]
+
+def runBacktest(
+        params: BacktestRequest,
+        progress: Optional[Callable[[int, int], None]] = None,
+        offset: int = 0,
+        limit: Optional[int] = None,
+        summaryOnly: bool = False
+    ) -> Dict[str, Any]:
+    """
+    Runs a backtest and converts its results into the API output.
+
+    Parameters:
+        params (BacktestRequest): Parameters for backtest.
+        progress (Callable[[int, int], None]): Called with the bars done and the
+        total bars as the backtest advances.
+        offset (int): Number of trades skipped.
+        limit (int): Maximum number of trades returned, None returns every trade after offset.
+        summaryOnly (bool): Return the metrics without trades.
+
+    Returns:
+        output (Dict[str, Any]): Metrics and trades matching BacktestResponse.
+    """
+    backtestResults = executeBacktest(params, progress)
+    return getOutput(backtestResults, offset, limit, summaryOnly)
+
+def executeSweep(
+        params: SweepRequest,
+        strategyClass: Type[Strategy],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+    """
+    Runs the sweep of a request.
+
+    Parameters:
+        params (SweepRequest): Parameters for the sweep.
+        strategyClass (Type[Strategy]): Class of the requested strategy.
+        progress (Callable[[int, int], None]): Unused, the sweep doesn't report progress.
+
+    Returns:
+        results (List[Dict[str, Any]]): Results matching SweepResult, best first.
+    """
+    return Sweep.sweep(
+        symbols=params.symbols,
+        startDate=params.startDate,
+        endDate=params.endDate,
+        strategyClass=strategyClass,
+        paramRanges=params.paramRanges,
+        startingCash=params.startingCash,
+        rankBy=params.rankBy,
+        mode=params.mode,
+        workers=params.workers
+    )
+
+def executeBatch(
+        params: BatchRequest,
+        configs: List[StrategyConfig],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+    """
+    Runs the backtests of a batch request and converts their results into the API output.
+
+    Parameters:
+        params (BatchRequest): Parameters for the backtests.
+        configs (List[StrategyConfig]): Strategy class and parameters of each
+        requested strategy.
+        progress (Callable[[int, int], None]): Called with the bars done and the
+        total bars as the backtests advance.
+
+    Returns:
+        results (List[Dict[str, Any]]): Results matching BatchResult, in the order of
+        the requested strategies.
+    """
+    batchResults = Engine.runBatch(
+        symbols=params.symbols,
+        startDate=params.startDate,
+        endDate=params.endDate,
+        configs=configs,
+        startingCash=params.startingCash,
+        mode=params.mode,
+        progress=progress
+    )
+    results = []
+    for config, backtestResults in zip(params.strategies, batchResults):
+        result = {"strategy": config.strategy, "params": config.strategyParams, "trades": len(backtestResults["portfolio"].getTrades())}
+        for metric in METRICS:
+            result[metric] = float(backtestResults[metric])
+        results.append(result)
+    return results
+
+def executeWalkForward(
+        params: WalkForwardRequest,
+        strategyClass: Type[Strategy],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> List[Dict[str, Any]]:
+    """
+    Runs the walk-forward optimization of a request.
+
+    Parameters:
+        params (WalkForwardRequest): Parameters for the walk-forward optimization.
+        strategyClass (Type[Strategy]): Class of the requested strategy.
+        progress (Callable[[int, int], None]): Unused, the optimization doesn't report progress.
+
+    Returns:
+        windows (List[Dict[str, Any]]): Windows matching WalkForwardWindow.
+    """
+    return Sweep.walkForward(
+        symbols=params.symbols,
+        startDate=params.startDate,
+        endDate=params.endDate,
+        strategyClass=strategyClass,
+        paramRanges=params.paramRanges,
+        startingCash=params.startingCash,
+        trainBars=params.trainBars,
+        testBars=params.testBars,
+        stepBars=params.stepBars,
+        anchored=params.anchored,
+        rankBy=params.rankBy,
+        mode=params.mode,
+        workers=params.workers
+    )
+
+def executeRobustness(
+        params: RobustnessRequest,
+        strategyClass: Type[Strategy],
+        progress: Optional[Callable[[int, int], None]] = None
+    ) -> Dict[str, Any]:
+    """
+    Runs the backtest of a robustness request and resamples its results.
+
+    Parameters:
+        params (RobustnessRequest): Parameters for the backtest and the resampling.
+        strategyClass (Type[Strategy]): Class of the requested strategy.
+        progress (Callable[[int, int], None]): Called with the bars done and the
+        total bars as the backtest advances.
+
+    Returns:
+        output (Dict[str, Any]): Metrics and intervals matching RobustnessResponse.
+    """
+    # The resamples need the equity curve, which the result cache doesn't keep
+    backtestResults = Engine.runBacktest(
+        symbols=params.symbols,
+        startDate=params.startDate,
+        endDate=params.endDate,
+        startingCash=params.startingCash,
+        strategyClass=strategyClass,
+        strategyParams=params.strategyParams,
+        mode=params.mode,
+        progress=progress
+    )
+    metrics = {metric: backtestResults[metric] for metric in METRICS}
+    intervals = analyzeRobustness(
+        backtestResults["portfolio"],
+        metrics,
+        method=params.method,
+        resamples=params.resamples,
+        confidence=params.confidence,
+        blockSize=params.blockSize,
+        seed=params.seed
+    )
+    return {"metrics": metrics, "intervals": intervals}
+
+def getOutput(backtestResults: Dict[str, Any], offset: int, limit: Optional[int], summaryOnly: bool) -> Dict[str, Any]:
+    """
+    Converts the results of a backtest into the API output with a page of its trades.
+
+    Parameters:
+        backtestResults (Dict[str, Any]): Results returned by executeBacktest.
+        offset (int): Number of trades skipped.
+        limit (int): Maximum number of trades returned, None returns every trade after offset.
+        summaryOnly (bool): Return the metrics without trades.
 
+    Returns:
+        output (Dict[str, Any]): Metrics and trades matching BacktestResponse.
+    """
+    output = getSummary(backtestResults)
+    if summaryOnly:
+        output["trades"] = []
+    else:
+        end = None if limit is None else offset + limit
+        output["trades"] = getTradeInfo(backtestResults["trades"], offset, end)
     return output
+
+def streamOutput(backtestResults: Dict[str, Any], offset: int, limit: Optional[int], summaryOnly: bool) -> Iterator[str]:
+    """
+    Serializes the results of a backtest as newline delimited JSON. The first line
+    holds the metrics and the number of trades, every following line one trade.
+    Trades are serialized a batch at a time, so the whole response is never held
+    in memory.
+
+    Parameters:
+        backtestResults (Dict[str, Any]): Results returned by executeBacktest.
+        offset (int): Number of trades skipped.
+        limit (int): Maximum number of trades streamed, None streams every trade after offset.
+        summaryOnly (bool): Stream the metrics without trades.
+
+    Returns:
+        lines (Iterator[str]): Chunks of the response body.
+    """
+    yield json.dumps(getSummary(backtestResults)) + "\n"
+    if summaryOnly:
+        return
+    trades = backtestResults["trades"]
+    end = len(trades) if limit is None else min(len(trades), offset + limit)
+    # Symbols and dates repeat across trades, serialize each once
+    symbols = [json.dumps(symbol) for symbol in trades.getSymbols()]
+    times = {} # {nanoseconds since epoch: ISO 8601 string}
+    for batchStart in range(offset, end, TRADE_BATCH_SIZE):
+        arrays = trades.getArrays(batchStart, min(batchStart + TRADE_BATCH_SIZE, end))
+        lines = []
+        for symbolId, buy, shares, price, timestamp in zip(
+                arrays["symbol"].tolist(),
+                arrays["buy"].tolist(),
+                arrays["shares"].tolist(),
+                arrays["price"].tolist(),
+                arrays["time"].view(np.int64).tolist()
+            ):
+            time = times.get(timestamp)
+            if time is None:
+                time = times[timestamp] = pd.Timestamp(timestamp).isoformat()
+            lines.append(
+                f'{{"side":"{"BUY" if buy else "SELL"}","symbol":{symbols[symbolId]},"shares":{shares},'
+                f'"price":{price!r},"time":"{time}"}}\n'
+            )
+        yield "".join(lines)
+
+def getJobInfo(jobId: str) -> Dict[str, Any]:
+    """
+    Retrieves the state of a job.
+
+    Parameters:
+        jobId (str): Id of the job.
+
+    Returns:
+        jobInfo (Dict[str, Any]): State of the job matching JobInfo.
+    """
+    job = jobQueue.get(jobId)
+    if job is None:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return {
+        "jobId": job.jobId,
+        "status": job.status,
+        "progress": job.progress,
+        "error": job.error,
+        "result": job.result
+    }
+
+async def awaitJob(function: Callable[..., Any], *args, **kwargs) -> Any:
+    """
+    Runs a function on the job pool and waits for it without blocking the event loop,
+    for endpoints responding with the result directly.
+
+    Parameters:
+        function (Callable[..., Any]): The work to run, see JobQueue.submit.
+
+    Returns:
+        result (Any): Return value of the function, HTTP 400 if it raised a ValueError
+        and HTTP 500 if it failed otherwise or was cancelled.
+    """
+    job = jobQueue.submit(function, *args, **kwargs)
+    await job.wait()
+    jobQueue.remove(job.jobId)
+    if job.status != "done":
+        invalid = job.errorType is not None and issubclass(job.errorType, ValueError)
+        raise HTTPException(status_code=400 if invalid else 500, detail=job.error)
+    return job.result
+
+@app.get("/api/strategies", response_model=StrategiesResponse)
+def listStrategies():
+    """
+    Get endpoint for every strategy and the parameters it takes. The strategies are
+    imported on the first call.
+    """
+    return {"strategies": strategyRegistry.getSchemas()}
+
+@app.get("/api/cache")
+async def cacheStats():
+    """
+    Get endpoint for the hit, miss and size counters of the market data cache.
+    """
+    return marketDataCache.getStats()
+
+@app.get("/api/cache/results")
+async def resultCacheStats():
+    """
+    Get endpoint for the hit, miss and size counters of the backtest result cache.
+    """
+    return resultCache.getStats()
+
+@app.get("/metrics", response_class=PlainTextResponse)
+async def metrics():
+    """
+    Get endpoint for the time, calls and rows of every backtest stage summed over
+    the process, in the Prometheus text format.
+    """
+    return PlainTextResponse(stageCounters.toPrometheus(), media_type="text/plain; version=0.0.4")
+
+@app.post("/api/backtest", response_model=BacktestResponse, response_model_exclude_none=True)
+async def backtest(
+        params: BacktestRequest,
+        stream: bool = False,
+        summaryOnly: bool = False,
+        offset: int = Query(0, ge=0),
+        limit: Optional[int] = Query(None, ge=0),
+        profile: bool = False,
+        profileMemory: bool = False,
+        profileCalls: bool = False
+    ):
+    """
+    Post endpoint to run backtest with specified parameters. The backtest runs
+    on the job pool and the response is sent once it is done.
+
+    Parameters:
+        param (BacktestRequest): Parameters for backtest.
+        stream (bool): Stream the response as newline delimited JSON, the metrics
+        on the first line and one trade per line after.
+        summaryOnly (bool): Respond with the metrics without trades.
+        offset (int): Number of trades skipped.
+        limit (int): Maximum number of trades in the response, all by default.
+        profile (bool): Add the time, calls and rows of every stage to the response,
+        timing each call of the per bar stages.
+        profileMemory (bool): Add the peak memory of every stage to the profile.
+        profileCalls (bool): Add the functions with the most cumulative time to the profile.
+    """
+    profiler = Profiler(detailed=profile, traceMemory=profileMemory, profileCalls=profileCalls)
+    profiling = profile or profileMemory or profileCalls
+    getStrategyClass(params.strategy)
+    # A profile needs the backtest to run
+    backtestResults = await awaitJob(executeBacktest, params, profiler=profiler, useCache=not profiling)
+    if profiling:
+        backtestResults["profile"] = profiler.getReport()
+    if stream:
+        return StreamingResponse(
+            streamOutput(backtestResults, offset, limit, summaryOnly),
+            media_type="application/x-ndjson"
+        )
+    return getOutput(backtestResults, offset, limit, summaryOnly)
+
+@app.post("/api/jobs", response_model=JobInfo)
+async def submitJob(params: BacktestRequest):
+    """
+    Post endpoint to queue a backtest with specified parameters.
+
+    Parameters:
+        param (BacktestRequest): Parameters for backtest.
+    """
+    getStrategyClass(params.strategy)
+    job = jobQueue.submit(runBacktest, params)
+    return getJobInfo(job.jobId)
+
+@app.get("/api/jobs/{jobId}", response_model=JobInfo)
+async def getJob(jobId: str):
+    """
+    Get endpoint to poll the status, progress and result of a backtest job.
+
+    Parameters:
+        jobId (str): Id of the job.
+    """
+    return getJobInfo(jobId)
+
+@app.delete("/api/jobs/{jobId}", response_model=JobInfo)
+async def cancelJob(jobId: str):
+    """
+    Delete endpoint to cancel a queued or running backtest job.
+
+    Parameters:
+        jobId (str): Id of the job.
+    """
+    jobQueue.cancel(jobId)
+    return getJobInfo(jobId)
+
+@app.post("/api/sweep", response_model=SweepResponse)
+async def sweep(params: SweepRequest):
+    """
+    Post endpoint to run a backtest for every combination of strategy parameter
+    ranges, ranked best first by the selected metric. The sweep runs on the job
+    pool and the response is sent once it is done.
+
+    Parameters:
+        param (SweepRequest): Parameters for the sweep.
+    """
+    strategyClass = getStrategyClass(params.strategy)
+    results = await awaitJob(executeSweep, params, strategyClass)
+    return {"results": results}
+
+@app.post("/api/batch", response_model=BatchResponse)
+async def batch(params: BatchRequest):
+    """
+    Post endpoint to backtest several strategies on the same market data, loaded
+    once and walked once for all of them. The results are in the order of the
+    requested strategies. The backtests run on the job pool and the response is
+    sent once they are done.
+
+    Parameters:
+        param (BatchRequest): Parameters for the backtests.
+    """
+    configs = [(getStrategyClass(config.strategy), config.strategyParams) for config in params.strategies]
+    results = await awaitJob(executeBatch, params, configs)
+    return {"results": results}
+
+@app.post("/api/walkforward", response_model=WalkForwardResponse)
+async def walkForward(params: WalkForwardRequest):
+    """
+    Post endpoint to run a walk-forward optimization: the strategy parameters are
+    optimized on every train period and the best ones backtested on the test
+    period following it. The optimization runs on the job pool and the response is
+    sent once it is done.
+
+    Parameters:
+        param (WalkForwardRequest): Parameters for the walk-forward optimization.
+    """
+    strategyClass = getStrategyClass(params.strategy)
+    windows = await awaitJob(executeWalkForward, params, strategyClass)
+    return {"windows": windows, "testProfitLoss": sum(window["test"]["profitLoss"] for window in windows)}
+
+@app.post("/api/robustness", response_model=RobustnessResponse)
+async def robustness(params: RobustnessRequest):
+    """
+    Post endpoint to run a backtest and resample its results into confidence
+    intervals of its metrics. The backtest and the resampling run on the job pool
+    and the response is sent once they are done.
+
+    Parameters:
+        param (RobustnessRequest): Parameters for the backtest and the resampling.
+    """
+    if not 1 <= params.resamples <= MAX_RESAMPLES:
+        raise HTTPException(status_code=400, detail=f"Resamples must be between 1 and {MAX_RESAMPLES}")
+    strategyClass = getStrategyClass(params.strategy)
+    return await awaitJob(executeRobustness, params, strategyClass)
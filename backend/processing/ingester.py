@@ -1,15 +1,28 @@
 import argparse
-from datetime import datetime, timedelta
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+import json
 import os
+import threading
+import time
+from typing import Dict, List, Optional, Tuple, get_args
 
-import yfinance as yf
+from pandas import DataFrame
 
-from database import sqLiteDB
-from database.base import DBInterface
+from database.backends import openDatabase
+from database.base import DBInterface, Interval
+from processing.providers import CSVProvider, DataProvider, YahooProvider
 
 
 
-def addSymbol(symbol: str, startDate: datetime, endDate: datetime, database: DBInterface) -> None:
+def addSymbol(
+        symbol: str,
+        startDate: datetime,
+        endDate: datetime,
+        database: DBInterface,
+        provider: Optional[DataProvider] = None,
+        interval: Interval = "1d"
+    ) -> None:
     """
     Get historical data for a specified symbol within a date range from Yahoo Finance and put it into the database.
 
@@ -18,18 +31,227 @@ def addSymbol(symbol: str, startDate: datetime, endDate: datetime, database: DBI
         startDate (datetime): Start date for the data range, inclusive.
         endDate (datetime): End date for the data range, inclusive.
         database (DBInterface): Database to put the retrieved data into.
+        provider (DataProvider): Source of the data, defaults to Yahoo Finance.
+        interval (Interval): Interval of the bars, intraday bars are stored by timestamp.
     """
-    data = yf.download(symbol, start=startDate, end=endDate+timedelta(days=1), interval="1d")
-    # Make into single index df
-    data.columns = data.columns.droplevel(1)
-    database.setData(symbol, data)
+    data = (provider or YahooProvider()).download(symbol, startDate, endDate, interval)
+    if data.empty:
+        return
+    if interval == "1d":
+        database.setData(symbol, data)
+    else:
+        database.setBarsMany(interval, {symbol: data})
+
+class RateLimiter:
+    def __init__(self, rate: float):
+        """
+        Initializes a limiter spacing calls evenly across threads.
+
+        Parameters:
+            rate (float): Maximum number of calls per second.
+        """
+        self._interval = 1.0 / rate
+        self._nextTime = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """
+        Blocks until the next call is allowed.
+        """
+        with self._lock:
+            now = time.monotonic()
+            wait = self._nextTime - now
+            self._nextTime = max(self._nextTime, now) + self._interval
+        if wait > 0:
+            time.sleep(wait)
+
+def downloadWithRetry(
+        symbol: str,
+        startDate: datetime,
+        endDate: datetime,
+        provider: DataProvider,
+        limiter: RateLimiter,
+        retries: int = 3,
+        backoff: float = 1.0,
+        interval: Interval = "1d"
+    ) -> DataFrame:
+    """
+    Downloads the data of a symbol, retrying failed downloads with exponential backoff.
+
+    Parameters:
+        symbol (str): Stock symbol to get historical data from.
+        startDate (datetime): Start date for the data range, inclusive.
+        endDate (datetime): End date for the data range, inclusive.
+        provider (DataProvider): Source of the data.
+        limiter (RateLimiter): Limiter every attempt waits on.
+        retries (int): Number of retries after the first attempt.
+        backoff (float): Seconds waited before the first retry, doubled for each retry after.
+        interval (Interval): Interval of the bars.
+
+    Returns:
+        data (DataFrame): The downloaded OHLCV data indexed by "Date".
+    """
+    for attempt in range(retries + 1):
+        limiter.acquire()
+        try:
+            return provider.download(symbol, startDate, endDate, interval)
+        except Exception:
+            if attempt == retries:
+                raise
+            time.sleep(backoff * 2 ** attempt)
+
+def loadCheckpoint(path: Optional[str], startDate: datetime, endDate: datetime, interval: Interval = "1d") -> List[str]:
+    """
+    Reads the symbols already ingested by an earlier run over the same date range.
+
+    Parameters:
+        path (str): Path of the checkpoint file, None disables checkpoints.
+        startDate (datetime): Start date of the current run.
+        endDate (datetime): End date of the current run.
+        interval (Interval): Interval of the bars of the current run.
+
+    Returns:
+        symbols (List[str]): Symbols stored by the earlier run, empty if there is
+        no checkpoint or it was for another date range or interval.
+    """
+    if path is None or not os.path.isfile(path):
+        return []
+    with open(path) as file:
+        checkpoint = json.load(file)
+    if checkpoint["start"] != startDate.strftime("%Y-%m-%d") or checkpoint["end"] != endDate.strftime("%Y-%m-%d"):
+        return []
+    # Checkpoints written before intraday bars are of daily runs
+    if checkpoint.get("interval", "1d") != interval:
+        return []
+    return checkpoint["done"]
+
+def saveCheckpoint(path: Optional[str], startDate: datetime, endDate: datetime, done: List[str], interval: Interval = "1d"):
+    """
+    Atomically writes the symbols stored so far.
+
+    Parameters:
+        path (str): Path of the checkpoint file, None disables checkpoints.
+        startDate (datetime): Start date of the run.
+        endDate (datetime): End date of the run.
+        done (List[str]): Symbols stored in the database.
+        interval (Interval): Interval of the bars of the run.
+    """
+    if path is None:
+        return
+    temporaryPath = path + ".tmp"
+    with open(temporaryPath, "w") as file:
+        json.dump({"start": startDate.strftime("%Y-%m-%d"), "end": endDate.strftime("%Y-%m-%d"), "interval": interval, "done": done}, file)
+    os.replace(temporaryPath, path)
+
+def addSymbols(
+        symbols: List[str],
+        startDate: datetime,
+        endDate: datetime,
+        database: DBInterface,
+        provider: Optional[DataProvider] = None,
+        workers: int = 4,
+        rate: float = 2.0,
+        retries: int = 3,
+        backoff: float = 1.0,
+        batchSize: int = 50,
+        checkpointPath: Optional[str] = None,
+        interval: Interval = "1d"
+    ) -> Tuple[List[str], Dict[str, str]]:
+    """
+    Get historical data for many symbols within a date range and put it into the database.
+
+    Downloads run concurrently on a bounded pool of threads and are rate limited. The
+    calling thread is the only writer, storing the downloaded data in batches. With a
+    checkpoint the symbols stored by a crashed or interrupted run are skipped.
+
+    Parameters:
+        symbols (List[str]): Stock symbols to get historical data from.
+        startDate (datetime): Start date for the data range, inclusive.
+        endDate (datetime): End date for the data range, inclusive.
+        database (DBInterface): Database to put the retrieved data into.
+        provider (DataProvider): Source of the data, defaults to Yahoo Finance.
+        workers (int): Number of downloads running at the same time.
+        rate (float): Maximum number of downloads started per second.
+        retries (int): Number of retries of a failed download.
+        backoff (float): Seconds waited before the first retry, doubled for each retry after.
+        batchSize (int): Number of symbols stored per write.
+        checkpointPath (str): Path of the checkpoint file, None disables checkpoints.
+        interval (Interval): Interval of the bars, intraday bars are stored by timestamp.
+
+    Returns:
+        done (List[str]): Symbols stored, including those of an earlier run.
+        failed (Dict[str, str]): Error of each symbol whose download failed or returned no data.
+    """
+    provider = provider or YahooProvider()
+    limiter = RateLimiter(rate)
+    done = loadCheckpoint(checkpointPath, startDate, endDate, interval)
+    skipped = set(done)
+    pending = [symbol for symbol in dict.fromkeys(symbols) if symbol not in skipped]
+    failed = {}
+    batch = {}
+
+    def flush():
+        database.setBarsMany(interval, batch)
+        done.extend(batch)
+        batch.clear()
+        saveCheckpoint(checkpointPath, startDate, endDate, done, interval)
+
+    executor = ThreadPoolExecutor(max_workers=workers)
+    try:
+        futures = {
+            executor.submit(downloadWithRetry, symbol, startDate, endDate, provider, limiter, retries, backoff, interval): symbol
+            for symbol in pending
+        }
+        for future in as_completed(futures):
+            symbol = futures[future]
+            try:
+                data = future.result()
+            except Exception as error:
+                failed[symbol] = f"{type(error).__name__}: {error}"
+                continue
+            # Left out of the checkpoint so a resumed run tries the symbol again
+            if data.empty:
+                failed[symbol] = "No data returned"
+                continue
+            batch[symbol] = data
+            if len(batch) >= batchSize:
+                flush()
+    finally:
+        executor.shutdown(wait=False, cancel_futures=True)
+        # Keep what was downloaded when the run is interrupted
+        if batch:
+            flush()
+    return done, failed
+
+def readSymbols(path: str) -> List[str]:
+    """
+    Reads symbols from a file with one symbol per line, ignoring blank lines and lines starting with #.
+
+    Parameters:
+        path (str): Path of the file.
+
+    Returns:
+        symbols (List[str]): The symbols in file order.
+    """
+    with open(path) as file:
+        return [line.strip() for line in file if line.strip() and not line.strip().startswith("#")]
 
 if __name__ == "__main__":
     parser = argparse.ArgumentParser()
 
-    parser.add_argument("--symbol", type=str, required=True)
+    symbolGroup = parser.add_mutually_exclusive_group(required=True)
+    symbolGroup.add_argument("--symbol", type=str)
+    symbolGroup.add_argument("--symbols", type=str, help="Comma separated symbols.")
+    symbolGroup.add_argument("--symbol-file", type=str, help="File with one symbol per line.")
     parser.add_argument("--start", type=str, required=True)
     parser.add_argument("--end", type=str, required=True,)
+    parser.add_argument("--provider", type=str, choices=["yahoo", "csv"], default="yahoo")
+    parser.add_argument("--csv-dir", type=str, help="Directory of <symbol>.csv files for the csv provider.")
+    parser.add_argument("--interval", type=str, choices=get_args(Interval), default="1d", help="Interval of the bars.")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--rate", type=float, default=2.0, help="Maximum downloads started per second.")
+    parser.add_argument("--retries", type=int, default=3)
+    parser.add_argument("--checkpoint", type=str, help="Checkpoint file to resume an interrupted run.")
 
     args = parser.parse_args()
 
@@ -40,10 +262,32 @@ if __name__ == "__main__":
         print("Error: Use YYYY-MM-DD.")
         exit(1)
 
-    dbPath = os.path.abspath(os.path.join("..", "data", "symbol_data.db"))
+    if args.provider == "csv":
+        if args.csv_dir is None:
+            print("Error: --csv-dir is required for the csv provider.")
+            exit(1)
+        provider = CSVProvider(args.csv_dir)
+    else:
+        provider = YahooProvider()
 
-    # Ensure the data directory exists
-    os.makedirs(os.path.dirname(dbPath), exist_ok=True)
-    database = sqLiteDB(dbPath)
-    addSymbol(args.symbol, startDate, endDate, database)
+    database = openDatabase()
+    if args.symbol:
+        addSymbol(args.symbol, startDate, endDate, database, provider, args.interval)
+    else:
+        symbols = args.symbols.split(",") if args.symbols else readSymbols(args.symbol_file)
+        done, failed = addSymbols(
+            [symbol.strip() for symbol in symbols if symbol.strip()],
+            startDate,
+            endDate,
+            database,
+            provider,
+            workers=args.workers,
+            rate=args.rate,
+            retries=args.retries,
+            checkpointPath=args.checkpoint,
+            interval=args.interval
+        )
+        print(f"Ingested {len(done)} symbols, {len(failed)} failed")
+        for symbol, error in failed.items():
+            print(f"{symbol}: {error}")
     database.close()
@@ -0,0 +1,107 @@
+from abc import ABC, abstractmethod
+from datetime import datetime, timedelta
+import os
+
+from pandas import DataFrame
+import pandas as pd
+
+from database.base import Interval, getEndTime
+
+# Descriptions of the errors Yahoo Finance answers with for ranges it has no prices for
+YAHOO_NO_DATA_ERRORS = ("Data doesn't exist", "No data found")
+
+
+class DataProvider(ABC):
+    @abstractmethod
+    def download(self, symbol: str, startDate: datetime, endDate: datetime, interval: Interval = "1d") -> DataFrame:
+        """
+        Downloads market data for a single symbol over a date range.
+
+        Parameters:
+            symbol (str): The asset symbol to download.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+            interval (Interval): Interval of the bars.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing OHLCV data indexed by "Date",
+            the time each bar starts at, empty only if the source confirms it has no data
+            for the range. A failed download raises instead.
+        """
+        pass
+
+class YahooProvider(DataProvider):
+    def download(self, symbol: str, startDate: datetime, endDate: datetime, interval: Interval = "1d") -> DataFrame:
+        """
+        Downloads market data for a single symbol over a date range from Yahoo Finance.
+        Intraday bars are only available for recent dates, 1m bars for the last 30 days.
+
+        Parameters:
+            symbol (str): The asset symbol to download.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+            interval (Interval): Interval of the bars.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing OHLCV data indexed by "Date",
+            the time each bar starts at, empty if Yahoo Finance answered without prices
+            for the range, like for halts, dates before a listing or after a delisting.
+            Transport errors, rate limits, unknown symbols and other error responses raise.
+        """
+        # Imported on first download, it takes longer to import than the rest of the backend
+        import yfinance as yf
+        from yfinance.exceptions import YFPricesMissingError
+        try:
+            # A Ticker per call, yf.download shares module level state between concurrent calls
+            data = yf.Ticker(symbol).history(
+                start=startDate,
+                end=endDate + timedelta(days=1),
+                interval=interval,
+                auto_adjust=True,
+                actions=False,
+                raise_errors=True
+            )
+        except YFPricesMissingError as error:
+            # Also raised for failed requests, which name Yahoo's status code or error
+            if "Yahoo status_code" in error.debug_info:
+                raise
+            if "Yahoo error" in error.debug_info and not any(text in error.debug_info for text in YAHOO_NO_DATA_ERRORS):
+                raise
+            return DataFrame(columns=["Open", "High", "Low", "Close", "Volume"], index=pd.DatetimeIndex([], name="Date"))
+        # Intraday bars come indexed by "Datetime" in the exchange's time zone, kept as its local time
+        data.index.name = "Date"
+        if data.index.tz is not None:
+            data.index = data.index.tz_localize(None)
+        return data
+
+class CSVProvider(DataProvider):
+    def __init__(self, directory: str):
+        """
+        Initializes a provider reading local CSV files, one per symbol named
+        <symbol>.csv with a "Date" column and OHLCV columns, and <symbol>_<interval>.csv
+        with the time of every bar in "Date" for other intervals. Used to ingest offline.
+
+        Parameters:
+            directory (str): The directory holding the CSV files.
+        """
+        self.directory = directory
+
+    def download(self, symbol: str, startDate: datetime, endDate: datetime, interval: Interval = "1d") -> DataFrame:
+        """
+        Reads market data for a single symbol over a date range from its CSV file.
+
+        Parameters:
+            symbol (str): The asset symbol to read.
+            startDate (datetime): The start date for the data range, inclusive.
+            endDate (datetime): The end date for the data range, inclusive.
+            interval (Interval): Interval of the bars.
+
+        Returns:
+            data (DataFrame): A pandas DataFrame containing OHLCV data indexed by "Date",
+            empty if the file has no data for the range.
+        """
+        name = symbol if interval == "1d" else f"{symbol}_{interval}"
+        data = pd.read_csv(os.path.join(self.directory, f"{name}.csv"), index_col="Date", parse_dates=["Date"])
+        if interval == "1d":
+            return data.sort_index().loc[pd.Timestamp(startDate).normalize():pd.Timestamp(endDate).normalize()]
+        return data.sort_index().loc[pd.Timestamp(startDate):getEndTime(endDate, interval)]
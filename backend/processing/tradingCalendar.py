@@ -0,0 +1,62 @@
+from datetime import datetime
+
+import pandas as pd
+from pandas import DatetimeIndex
+from pandas.tseries.holiday import (
+    AbstractHolidayCalendar,
+    GoodFriday,
+    Holiday,
+    USLaborDay,
+    USMartinLutherKingJr,
+    USMemorialDay,
+    USPresidentsDay,
+    USThanksgivingDay,
+    nearest_workday,
+    sunday_to_monday
+)
+
+
+# Days the exchange closed outside of its regular holidays
+SPECIAL_CLOSURES = pd.to_datetime([
+    "2001-09-11", "2001-09-12", "2001-09-13", "2001-09-14", # September 11
+    "2004-06-11", # Ronald Reagan's funeral
+    "2007-01-02", # Gerald Ford's funeral
+    "2012-10-29", "2012-10-30", # Hurricane Sandy
+    "2018-12-05", # George H. W. Bush's funeral
+    "2025-01-09" # Jimmy Carter's funeral
+])
+
+class NYSEHolidayCalendar(AbstractHolidayCalendar):
+    """
+    Regular full day holidays of the New York Stock Exchange. Unlike federal holidays
+    a New Year's Day on Saturday isn't observed on the Friday before, Good Friday is a
+    holiday and Columbus Day and Veterans Day are not.
+    """
+    rules = [
+        Holiday("New Year's Day", month=1, day=1, observance=sunday_to_monday),
+        USMartinLutherKingJr,
+        USPresidentsDay,
+        GoodFriday,
+        USMemorialDay,
+        Holiday("Juneteenth", month=6, day=19, start_date="2022-01-01", observance=nearest_workday),
+        Holiday("Independence Day", month=7, day=4, observance=nearest_workday),
+        USLaborDay,
+        USThanksgivingDay,
+        Holiday("Christmas Day", month=12, day=25, observance=nearest_workday)
+    ]
+
+def getTradingDays(startDate: datetime, endDate: datetime) -> DatetimeIndex:
+    """
+    Retrieves the days the New York Stock Exchange is open within a date range.
+
+    Parameters:
+        startDate (datetime): The start date for the range, inclusive.
+        endDate (datetime): The end date for the range, inclusive.
+
+    Returns:
+        tradingDays (DatetimeIndex): The trading days in ascending order.
+    """
+    start = pd.Timestamp(startDate).normalize()
+    end = pd.Timestamp(endDate).normalize()
+    holidays = NYSEHolidayCalendar().holidays(start=start, end=end).union(SPECIAL_CLOSURES)
+    return pd.bdate_range(start=start, end=end).difference(holidays)
@@ -1,66 +1,161 @@
 from datetime import datetime, timedelta
+import logging
+from typing import List, Optional, Tuple
 
-from pandas import DataFrame
-from pandas.tseries.holiday import USFederalHolidayCalendar
+import numpy as np
+from pandas import DataFrame, DatetimeIndex
 import pandas as pd
 
+from core.profiler import profileStage
 from database.base import DBInterface
 from processing.ingester import addSymbol
+from processing.tradingCalendar import getTradingDays
 
 
+logger = logging.getLogger("backtester.validator")
+
+# Missing runs separated by at most this many trading days are fetched as one range
+MAX_FETCH_GAP = 5
+
 class Validator:
-    def getDataRange(symbol: str, startDate: datetime, endDate: datetime, database: DBInterface) -> DataFrame:
+    def getDataRange(
+            symbol: str,
+            startDate: datetime,
+            endDate: datetime,
+            database: DBInterface,
+            data: Optional[DataFrame] = None
+        ) -> DataFrame:
         """
         Validates and retrieves a complete range of market data for a symbol.
 
-        It checks for missing business days and automatically
-        fetches and backfills any gaps it finds and updates the database.
+        It checks for missing or incomplete trading days of the exchange calendar,
+        fetches the gaps it finds in as few ranges as possible and updates the database.
+        Days present after fetching, or that the provider answered for without data,
+        are recorded in the database so they are never checked or fetched again. Days
+        of failed fetches and days that haven't closed yet are left unchecked.
 
         Parameters:
             symbol (str): The asset symbol to query.
             startDate (datetime): The start date for the data range, inclusive.
             endDate (datetime): The end date for the data range, inclusive.
             database (DBInterface): A database connection object used for data retrieval and storage.
+            data (DataFrame): The symbol's data for the range if it was already queried,
+            otherwise it is queried from the database.
 
         Returns:
-            data (DataFrame): A pandas DataFrame containing a complete and sorted set of market data for the 
+            data (DataFrame): A pandas DataFrame containing a complete and sorted set of market data for the
             specified range.
         """
-        data = database.getDataRange(symbol, startDate, endDate)
+        if data is None:
+            data = database.getDataRange(symbol, startDate, endDate)
+
+        start = pd.Timestamp(startDate).normalize()
+        checkEnd = min(pd.Timestamp(endDate).normalize(), pd.Timestamp.now().normalize() - timedelta(days=1))
+        if checkEnd < start:
+            return data.sort_index()
 
-        if data.empty:
-            addSymbol(symbol, startDate, endDate, database)
+        coverage = database.getCoverage(symbol)
+        if any(coveredStart <= start and checkEnd <= coveredEnd for coveredStart, coveredEnd in coverage):
+            return data.sort_index()
+
+        expectedDates = getTradingDays(start, checkEnd)
+        completeDates = data.index[data.notna().all(axis=1).to_numpy()]
+        missing = ~expectedDates.isin(completeDates) & ~Validator._isCovered(expectedDates, coverage)
+
+        fetchRanges = Validator._getFetchRanges(expectedDates, missing)
+        confirmed = np.zeros(len(expectedDates), dtype=bool)
+        for fetchStart, fetchEnd in fetchRanges:
+            try:
+                with profileStage("fetch"):
+                    addSymbol(symbol, fetchStart.to_pydatetime(), fetchEnd.to_pydatetime(), database)
+            except Exception:
+                # Left unchecked so the range is fetched again next time
+                logger.warning("Failed to fetch %s from %s to %s", symbol, fetchStart.date(), fetchEnd.date(), exc_info=True)
+                continue
+            # The provider answered for the range, days it had no data for aren't available
+            confirmed |= (expectedDates >= fetchStart) & (expectedDates <= fetchEnd)
+        if fetchRanges:
             data = database.getDataRange(symbol, startDate, endDate)
-            return data
-
-
-        expectedDates = pd.bdate_range(start=startDate, end=endDate)
-        holidays = USFederalHolidayCalendar().holidays(start=startDate, end=endDate)
-        expectedDates.difference(holidays)
-
-        consecutiveStartDate = None
-        for date in expectedDates:
-            # if date is not in data
-            # if values at a certain date are null
-            if date not in data.index or data.loc[date].isnull().any():
-                if consecutiveStartDate is None:
-                    consecutiveStartDate = date
-                    consecutiveStartDate = consecutiveStartDate.tz_localize(None)
-            # If there is filled date on current date and previous data that was missing
-            # then fetch the previous data
-            elif consecutiveStartDate:
-                end = date - timedelta(1)
-                addSymbol(symbol, consecutiveStartDate, end, database)
-                data.loc[consecutiveStartDate : end] = database.getDataRange(symbol, consecutiveStartDate, end)
-                consecutiveStartDate = None
-
-        if consecutiveStartDate:
-            # Remove timezone from dates
-            expectedDate = expectedDates[-1]
-            expectedDate = expectedDate.tz_localize(None)
-            addSymbol(symbol, consecutiveStartDate, expectedDate, database)
-            data.loc[consecutiveStartDate : expectedDate] = database.getDataRange(symbol, consecutiveStartDate, expectedDate)
-
-        data.sort_index()
-
-        return data
\ No newline at end of file
+            completeDates = data.index[data.notna().all(axis=1).to_numpy()]
+
+        checked = ~missing | expectedDates.isin(completeDates) | confirmed
+        for checkedStart, checkedEnd in Validator._getCheckedRanges(expectedDates, checked, start, checkEnd):
+            database.addCoverage(symbol, checkedStart, checkedEnd)
+
+        return data.sort_index()
+
+    def _isCovered(dates: DatetimeIndex, coverage: List[Tuple[datetime, datetime]]) -> np.ndarray:
+        """
+        A private method to find the dates within already checked ranges.
+
+        Parameters:
+            dates (DatetimeIndex): Sorted dates to look up.
+            coverage (List[Tuple[datetime, datetime]]): Disjoint inclusive (start, end)
+            date ranges sorted by start date.
+
+        Returns:
+            covered (ndarray): Boolean mask of the dates inside a checked range.
+        """
+        if not coverage:
+            return np.zeros(len(dates), dtype=bool)
+        starts = pd.DatetimeIndex([coveredStart for coveredStart, _ in coverage]).values
+        ends = pd.DatetimeIndex([coveredEnd for _, coveredEnd in coverage]).values
+        # Last checked range starting on or before each date
+        positions = np.searchsorted(starts, dates.values, side="right") - 1
+        return (positions >= 0) & (dates.values <= ends[np.maximum(positions, 0)])
+
+    def _getCheckedRanges(
+            expectedDates: DatetimeIndex,
+            checked: np.ndarray,
+            start: pd.Timestamp,
+            checkEnd: pd.Timestamp
+        ) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        A private method to turn runs of checked trading days into date ranges to
+        record as covered. Runs at either end of the range extend to its bounds.
+
+        Parameters:
+            expectedDates (DatetimeIndex): Sorted trading days of the checked range.
+            checked (ndarray): Boolean mask of the trading days present or confirmed missing.
+            start (Timestamp): Start of the checked range.
+            checkEnd (Timestamp): End of the checked range.
+
+        Returns:
+            checkedRanges (List[Tuple[Timestamp, Timestamp]]): Inclusive (start, end) date
+            ranges in ascending order.
+        """
+        if checked.all():
+            return [(start, checkEnd)]
+        positions = np.flatnonzero(checked)
+        if len(positions) == 0:
+            return []
+        breaks = np.flatnonzero(np.diff(positions) > 1)
+        firsts = positions[np.concatenate(([0], breaks + 1))]
+        lasts = positions[np.concatenate((breaks, [len(positions) - 1]))]
+        checkedRanges = list(zip(expectedDates[firsts], expectedDates[lasts]))
+        if firsts[0] == 0:
+            checkedRanges[0] = (start, checkedRanges[0][1])
+        if lasts[-1] == len(expectedDates) - 1:
+            checkedRanges[-1] = (checkedRanges[-1][0], checkEnd)
+        return checkedRanges
+
+    def _getFetchRanges(expectedDates: DatetimeIndex, missing: np.ndarray) -> List[Tuple[pd.Timestamp, pd.Timestamp]]:
+        """
+        A private method to merge runs of missing dates into fetch ranges. Runs close
+        together are merged, refetching the few complete days between them.
+
+        Parameters:
+            expectedDates (DatetimeIndex): Sorted trading days of the checked range.
+            missing (ndarray): Boolean mask of the trading days to fetch.
+
+        Returns:
+            fetchRanges (List[Tuple[Timestamp, Timestamp]]): Inclusive (start, end) date
+            ranges in ascending order.
+        """
+        positions = np.flatnonzero(missing)
+        if len(positions) == 0:
+            return []
+        breaks = np.flatnonzero(np.diff(positions) > MAX_FETCH_GAP + 1)
+        firsts = positions[np.concatenate(([0], breaks + 1))]
+        lasts = positions[np.concatenate((breaks, [len(positions) - 1]))]
+        return list(zip(expectedDates[firsts], expectedDates[lasts]))